@@ -1,18 +1,25 @@
 import streamlit as st
 import pandas as pd
-import requests
 from openai import OpenAI
 import json
-import plotly.express as px
-import tempfile
 import os
+import time
+
+from mintic import audio, enrutador, esquema, graficos, motor, respuesta, sesion, soql, trazas, voz
+from mintic.cache_figuras import obtener_cache_figuras
+from mintic.cache_llm import obtener_cache
+from mintic.cache_tts import obtener_cache_tts
+from mintic.dataset import obtener_dataset
+from mintic.datos import CSV_PATH
+from mintic.enrutador import obtener_enrutador
+from mintic.http_cache import obtener_cache_http
+from mintic.sesion import ResultadosSesion
+from mintic.soql import obtener_cliente_soql
 
 # ======================================================
 # CONFIGURACIÓN GENERAL
 # ======================================================
 
-CSV_PATH = "Asset_Inventory_-_Public_20251119.csv"
-API_URL = "https://www.datos.gov.co/resource/uzcf-b9dh.json?$limit=50000"
 
 # OPENAI API KEY (usar secrets en Streamlit Cloud)
 API_KEY = None
@@ -27,6 +34,10 @@ if not API_KEY:
 
 client = OpenAI(api_key=API_KEY)
 
+MODELO_LLM = "gpt-4o-mini"
+# Subir la versión al cambiar el prompt invalida las respuestas en caché
+VERSION_PROMPT = "5"
+
 # ======================================================
 # SELECCIÓN DE FUENTE DE DATOS (CSV vs API)
 # ======================================================
@@ -41,29 +52,24 @@ data_source = st.sidebar.radio(
 # CARGA DE DATOS
 # ======================================================
 
-@st.cache_data(ttl=3600, show_spinner=True)
 def load_data_from_csv():
     if not os.path.exists(CSV_PATH):
         st.error(f"❌ No se encontró el archivo CSV: {CSV_PATH}")
         return pd.DataFrame()
     try:
-        df = pd.read_csv(CSV_PATH, encoding="utf-8")
-        return df
+        # Versión compartida por todas las sesiones (Arrow mapeado, sin copias)
+        return obtener_dataset().vista("csv")
     except Exception as e:
         st.error(f"❌ Error leyendo el CSV: {e}")
         return pd.DataFrame()
 
 
-@st.cache_data(ttl=3600, show_spinner=True)
 def load_data_from_api():
     try:
-        st.info("📥 Descargando datos desde datos.gov.co...")
-        r = requests.get(API_URL, timeout=30)
-        r.raise_for_status()
-        data = r.json()
-        df = pd.DataFrame(data)
-        st.success(f"✅ Datos API cargados: {df.shape[0]} filas, {df.shape[1]} columnas.")
-        return df
+        # Solo la primera vez sin copia local espera a la descarga; después se
+        # sirve la copia vigente y se revalida en segundo plano (GET condicional)
+        with st.spinner("📥 Sincronizando datos desde datos.gov.co..."):
+            return obtener_dataset().vista("api")
     except Exception as e:
         st.error(f"❌ Error al cargar datos desde la API: {e}")
         return pd.DataFrame()
@@ -74,166 +80,345 @@ if data_source == "CSV local":
     df = load_data_from_csv()
 else:
     df = load_data_from_api()
+    error_revalidacion = obtener_dataset().errores.get("api")
+    if error_revalidacion:
+        st.sidebar.caption(f"⚠ Mostrando la última copia; no se pudo actualizar: {error_revalidacion}")
 
 if df.empty:
     st.error("No hay datos disponibles. Revisa la fuente seleccionada.")
     st.stop()
 
+# Resultados previos de esta sesión (ids de fila) para las preguntas de seguimiento
+if "resultados" not in st.session_state:
+    st.session_state.resultados = ResultadosSesion()
+resultados = st.session_state.resultados
+
 # ======================================================
 # FUNCIÓN LLM
 # ======================================================
 
-def ask_llm(question: str) -> str:
+def ask_llm_stream(question: str, uso: dict | None = None, previos: str = ""):
     """
-    Envía la pregunta al modelo y devuelve texto (puede ser JSON).
+    Envía la pregunta al modelo y va entregando el texto a medida que llega.
+    El modelo responde en modo JSON: siempre un único objeto (instrucción,
+    plan o {"accion": "texto", ...}), así que no hay respuestas mal formadas
+    que obliguen a repetir la pregunta. Las respuestas se reutilizan desde la
+    caché persistente si el esquema no cambió.
+    Si se pasa `uso`, se completa con los tokens consumidos. `previos` resume
+    los resultados anteriores de la sesión (preguntas de seguimiento) y forma
+    parte de la clave de la caché.
     """
 
-    columnas = ", ".join(df.columns.astype(str))
-
-    prompt = f"""
-Eres un asistente experto en análisis de datos.
-Tienes un dataset con {df.shape[0]} filas y {df.shape[1]} columnas.
-
-Columnas disponibles (usa SOLO estos nombres exactamente):
-{columnas}
-
-Reglas:
-1) Si el usuario pide un GRÁFICO → responde SOLO JSON:
-{{
-  "accion": "graficar",
-  "tipo": "bar"|"line"|"pie",
-  "x": "nombre_columna_existente",
-  "y": "nombre_columna_existente_o_vacio",
-  "agregacion": "count"|"sum"|"none"
-}}
-
-   - Para "count" puedes dejar "y" vacío o cualquiera, el backend contará registros.
-
-2) Si el usuario pide una TABLA → responde SOLO JSON:
-{{
-  "accion": "tabla",
-  "columnas": ["col1", "col2", ...]  // deben existir en el dataset
-}}
-
-3) Si el usuario pide FILTROS → responde SOLO JSON:
-{{
-  "accion": "filtrar",
-  "columna": "nombre_columna_existente",
-  "valor": "valor_a_filtrar"
-}}
-
-4) Si es una pregunta normal (explicación, descripción, etc.) → responde en texto plano.
-
-Pregunta del usuario:
-{question}
-"""
-
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": "Eres un asistente analítico. Cuando se piden gráficos o tablas, respondes con JSON válido."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-    )
+    cache = obtener_cache()
+    modelo_clave = f"{MODELO_LLM}/v{VERSION_PROMPT}"
+    cacheada = cache.obtener(question, df.columns, df.shape[0], modelo_clave, previos)
+    if cacheada is not None:
+        trazas.sumar(cache_llm_aciertos=1, bytes_respuesta_llm=len(cacheada.encode("utf-8")))
+        if uso is not None:
+            uso.update(cache=True, prompt_tokens=0, cached_tokens=0, completion_tokens=0)
+        yield cacheada
+        return
 
-    return completion.choices[0].message.content
+    # Prefijo estable (reglas + diccionario de alias) y sufijo corto por pregunta
+    mensajes = esquema.construir_mensajes(esquema.obtener_esquema(df), question, previos)
+    traza = trazas.actual()
+    with traza.etapa("llm", modelo=MODELO_LLM) as etapa:
+        inicio = time.perf_counter()
+        stream = client.chat.completions.create(
+            model=MODELO_LLM,
+            messages=mensajes,
+            response_format={"type": "json_object"},
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        partes = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not partes:
+                    etapa.anotar(primer_token_ms=round((time.perf_counter() - inicio) * 1000, 2))
+                partes.append(chunk.choices[0].delta.content)
+                yield partes[-1]
+            if chunk.usage is not None:
+                detalles = getattr(chunk.usage, "prompt_tokens_details", None)
+                cached_tokens = getattr(detalles, "cached_tokens", 0) or 0
+                traza.sumar(
+                    tokens_prompt=chunk.usage.prompt_tokens,
+                    tokens_prompt_cache=cached_tokens,
+                    tokens_completion=chunk.usage.completion_tokens,
+                )
+                if uso is not None:
+                    uso.update(
+                        cache=False,
+                        prompt_tokens=chunk.usage.prompt_tokens,
+                        cached_tokens=cached_tokens,
+                        completion_tokens=chunk.usage.completion_tokens,
+                    )
+
+    respuesta = "".join(partes)
+    traza.sumar(cache_llm_fallos=1, bytes_respuesta_llm=len(respuesta.encode("utf-8")))
+    cache.guardar(question, df.columns, df.shape[0], modelo_clave, respuesta, previos)
+
+
+def ask_llm(question: str) -> str:
+    """
+    Envía la pregunta al modelo y devuelve texto (puede ser JSON).
+    """
+    return "".join(ask_llm_stream(question))
 
 
 # ======================================================
 # EJECUTAR INSTRUCCIONES JSON
 # ======================================================
 
-def ejecutar_instruccion(instr: str):
+def ejecutar_instruccion(instr: str) -> motor.Resultado | None:
     """
-    Si la respuesta es JSON con 'accion', ejecuta tabla/filtro/grafico.
-    Si no es JSON válido, muestra el texto tal cual.
+    Si la respuesta es JSON con 'accion', ejecuta tabla/filtro/grafico/búsqueda
+    o un plan de varios pasos. Si no es JSON válido, muestra el texto tal cual.
+    Con "sobre" la instrucción se ejecuta solo sobre las filas de un resultado
+    previo de la sesión; cada resultado con filas queda guardado como "rN".
+    Devuelve el resultado ejecutado (None si no era JSON).
     """
     try:
-        obj = json.loads(instr)
+        with trazas.etapa("parseo_json"):
+            obj = json.loads(instr)
     except Exception:
         # No era JSON → mostrar como texto normal
         st.write(instr)
+        return None
+
+    # El LLM responde con alias cortos; se traducen a los nombres reales
+    huella = df.attrs.get("huella")
+    with trazas.etapa("motor", accion=obj.get("accion") if isinstance(obj, dict) else None) as etapa:
+        obj = esquema.resolver_alias(esquema.obtener_esquema(df), obj)
+        res = None
+        previo = None
+        if isinstance(obj, dict) and isinstance(obj.get("pasos"), list):
+            etapa.anotar(pasos=len(obj["pasos"]))
+        if isinstance(obj, dict) and obj.get("sobre"):
+            previo = resultados.obtener(obj["sobre"], huella)
+            if previo is None:
+                st.info("No hay un resultado previo vigente; se consulta todo el dataset.")
+        if previo is None and data_source == "API datos.gov.co" and soql.ACTIVO:
+            # Agregación en el servidor; None si hay que resolverla en local
+            res = obtener_cliente_soql().ejecutar(df, obj)
+        if res is None:
+            base = previo.ids(df) if previo is not None else None
+            if previo is not None:
+                etapa.anotar(sobre=previo.id, filas_base=len(base) if base is not None else len(df))
+            contexto = f"del resultado {previo.id}" if previo is not None else ""
+            res = motor.ejecutar(df, obj, sobre=base, contexto=contexto)
+    filas = sum(len(r.datos) for r in (res.partes or (res,)) if r.datos is not None)
+    with trazas.etapa("render", clase=res.clase, filas=filas):
+        mostrar_resultado(res)
+
+    if res.clase in ("tabla", "grafico", "plan"):
+        agregado = res.datos if res.clase == "grafico" else None
+        nuevo = resultados.guardar(huella, obj, res.filas, len(df), agregado)
+        sobre = f" · sobre {previo.id}" if previo is not None else ""
+        st.caption(f"Resultado {nuevo.id}{sobre} (se puede refinar: «ahora solo…», «ordénalo por…»)")
+    return res
+
+
+def mostrar_resultado(res: motor.Resultado):
+    """Dibuja en Streamlit el resultado del motor de ejecución."""
+    if res.clase == "aviso":
+        st.warning(res.mensaje)
+        if res.crudo is not None:
+            st.write(res.crudo)
         return
 
-    accion = obj.get("accion")
-
-    # ----------------- TABLA -----------------
-    if accion == "tabla":
-        columnas = obj.get("columnas", [])
-        columnas_validas = [c for c in columnas if c in df.columns]
-        if not columnas_validas:
-            st.warning("Las columnas indicadas no existen o están vacías.")
-            return
-        st.dataframe(df[columnas_validas].head())
+    if res.clase == "tabla":
+        st.dataframe(res.datos)
+        if res.mensaje:
+            st.caption(res.mensaje)
         return
 
-    # ----------------- FILTRO -----------------
-    if accion == "filtrar":
-        col = obj.get("columna")
-        val = obj.get("valor")
+    if res.clase == "texto":
+        st.markdown(res.mensaje)
+        return
 
-        if col not in df.columns:
-            st.warning(f"La columna '{col}' no existe en el dataset.")
-            return
+    if res.clase == "plan":
+        # Todos los pasos comparten el filtro, ya resuelto una sola vez
+        if res.mensaje:
+            st.caption(res.mensaje)
+        for parte in res.partes:
+            mostrar_resultado(parte)
+        return
 
-        filtrado = df[df[col] == val]
-        st.dataframe(filtrado.head())
-        st.caption(f"Filas filtradas donde {col} == {val} (mostrando primeras 5).")
+    if res.clase == "grafico":
+        # Plotly con cola larga agrupada, LTTB y WebGL según el tamaño
+        fig = graficos.figura(res.tipo, res.datos, res.x, res.y, nombre=f"llm-{res.tipo}")
+        st.plotly_chart(fig, use_container_width=True)
         return
 
-    # ----------------- GRAFICO -----------------
-    if accion == "graficar":
-        tipo = obj.get("tipo")
-        x = obj.get("x")
-        y = obj.get("y")
-        agg = obj.get("agregacion", "count")
+    # Si no coincide con nada, mostramos el JSON crudo
+    st.write(res.crudo)
 
-        if x not in df.columns:
-            st.warning(f"La columna de eje X '{x}' no existe en el dataset.")
-            return
 
-        dtemp = df.copy()
-
-        # Manejo robusto para 'count' aunque 'y' no exista o venga vacío
-        if agg == "count":
-            dtemp = dtemp.groupby(x).size().reset_index(name="valor")
-            y_col = "valor"
-        elif agg == "sum":
-            if y not in df.columns:
-                st.warning(f"La columna '{y}' no existe para agregación 'sum'.")
-                return
-            dtemp = dtemp.groupby(x)[y].sum().reset_index()
-            y_col = y
-        else:  # none
-            if y not in df.columns:
-                st.warning(f"La columna '{y}' no existe.")
-                return
-            dtemp = dtemp[[x, y]]
-            y_col = y
-
-        # Crear gráfico con Plotly
-        if tipo == "bar":
-            fig = px.bar(dtemp, x=x, y=y_col)
-        elif tipo == "line":
-            fig = px.line(dtemp, x=x, y=y_col)
-        elif tipo == "pie":
-            fig = px.pie(dtemp, names=x, values=y_col)
-        else:
-            st.warning(f"Tipo de gráfico desconocido: {tipo}")
-            st.write(obj)
-            return
+# ======================================================
+# RESPUESTA EN VIVO (TEXTO Y VOZ)
+# ======================================================
 
-        st.plotly_chart(fig, use_container_width=True)
-        return
+def responder_en_vivo(question: str, pipeline=None) -> str:
+    """
+    Muestra la respuesta del LLM a medida que llega.
+    Si es una instrucción JSON se ejecuta al completarse; si es
+    {"accion": "texto"}, el texto se muestra mientras se genera. Con un
+    PipelineVoz, cada oración completa se sintetiza en paralelo y la primera
+    se reproduce apenas está lista; de una instrucción se sintetiza un
+    resumen corto del resultado, no el JSON.
+    """
+    zona_texto = st.empty()
+    zona_audio = st.empty()
+    separador = voz.SeparadorOraciones()
+    extractor = respuesta.ExtractorTexto()
+    partes = []
+    es_json = None
+    audio_mostrado = False
+    uso = {}
+
+    # Una pregunta de seguimiento lleva al LLM el resumen de los resultados previos
+    previos = resultados.contexto(df.attrs.get("huella")) if sesion.es_seguimiento(question) else ""
+
+    # Las preguntas frecuentes se resuelven en local sin llamar al modelo
+    instr = None
+    if enrutador.ACTIVO and not previos:
+        with trazas.etapa("enrutador"):
+            instr = obtener_enrutador().enrutar(df, question)
+    if instr is not None:
+        trazas.sumar(enrutador_aciertos=1)
+        partes.append(json.dumps(instr, ensure_ascii=False))
+        es_json = True
+
+    inicio = time.perf_counter()
+    for fragmento in ([] if instr is not None else ask_llm_stream(question, uso, previos)):
+        partes.append(fragmento)
+        texto = "".join(partes)
+        if es_json is None and texto.strip():
+            es_json = texto.lstrip().startswith(("{", "```"))
+        if es_json:
+            # Solo se muestra en vivo el campo "texto"; las instrucciones esperan al final
+            fragmento = extractor.agregar(fragmento)
+            if not fragmento:
+                continue
+            texto = extractor.texto
+
+        zona_texto.markdown(texto + "▌")
+        if pipeline is not None:
+            for oracion in separador.agregar(fragmento):
+                pipeline.agregar(oracion)
+            if not audio_mostrado and pipeline.primero_listo():
+                zona_audio.audio(pipeline.primero(), format="audio/mp3", autoplay=True)
+                audio_mostrado = True
+
+    segundos_llm = time.perf_counter() - inicio
+    texto = "".join(partes)
+    hablado = None
+    if extractor.encontrado:
+        es_json = False
+        texto = extractor.texto
+        zona_texto.markdown(texto)
+    elif es_json:
+        zona_texto.empty()
+        res = ejecutar_instruccion(texto)
+        if pipeline is not None:
+            hablado = voz.resumen_hablado(res) if res is not None else texto
+    else:
+        zona_texto.markdown(texto)
+
+    if instr is not None:
+        st.caption("Resuelta localmente por el enrutador, sin consultar el modelo (0 tokens).")
+    elif uso.get("cache"):
+        st.caption("Respuesta servida desde la caché (0 tokens).")
+    elif uso:
+        obtener_enrutador().registrar_llm(segundos_llm)
+        st.caption(
+            f"Tokens: {uso['prompt_tokens']} de entrada "
+            f"({uso['cached_tokens']} en caché) · {uso['completion_tokens']} de salida"
+        )
+
+    if pipeline is not None:
+        try:
+            pipeline.agregar(hablado if es_json else separador.cerrar())
+            if not audio_mostrado:
+                primero = pipeline.primero()
+                if primero:
+                    zona_audio.audio(primero, format="audio/mp3", autoplay=True)
+            resto = pipeline.resto()
+            if resto:
+                st.audio(resto, format="audio/mp3")
+        except Exception as e:
+            st.warning(f"No se pudo generar audio de respuesta (TTS): {e}")
+
+    return texto
 
-    # Si no coincide con nada, mostramos el JSON crudo
-    st.write(obj)
+
+# ======================================================
+# PANEL DE RENDIMIENTO
+# ======================================================
+
+def metricas_caches() -> dict:
+    """Gauges de las cachés compartidas para el endpoint de Prometheus."""
+    llm = obtener_cache().estadisticas()
+    figs = obtener_cache_figuras().estadisticas()
+    http = obtener_cache_http().estadisticas()
+    ruteo = obtener_enrutador().estadisticas()
+    tts = obtener_cache_tts().estadisticas()
+    return {
+        "enrutador_consultas": ruteo["consultas"],
+        "enrutador_aciertos": ruteo["aciertos"],
+        "enrutador_segundos_ahorrados": round(ruteo["segundos_ahorrados"], 3),
+        "cache_llm_entradas": llm["entradas"],
+        "cache_figuras_entradas": figs["entradas"],
+        "cache_figuras_bytes": figs["bytes"],
+        "cache_tts_aciertos": tts["aciertos"],
+        "cache_tts_entradas": tts["entradas"],
+        "cache_tts_bytes": tts["bytes"],
+        "http_revalidadas_304": http["revalidadas"],
+        "http_descargas": http["descargas"],
+        "http_bytes_descargados": http["bytes_descargados"],
+    }
+
+
+if trazas.PUERTO_METRICAS:
+    trazas.servir_metricas(int(trazas.PUERTO_METRICAS), extra=metricas_caches)
+
+
+def panel_rendimiento():
+    """Latencia por etapa, tokens y últimas peticiones trazadas (en la barra lateral)."""
+    registro = trazas.obtener_registro()
+    with st.sidebar.expander("⏱ Rendimiento", expanded=True):
+        if not trazas.ACTIVO:
+            st.caption("Trazas desactivadas (MINTIC_TRAZAS=0).")
+            return
+        resumen = registro.resumen_etapas()
+        if not resumen:
+            st.caption("Aún no hay peticiones trazadas.")
+            return
+
+        st.dataframe(pd.DataFrame(resumen).set_index("etapa"), width="stretch")
+        if registro.contadores:
+            st.caption(" · ".join(f"{k}: {v:,}" for k, v in sorted(registro.contadores.items())))
+        stats_sesion = resultados.estadisticas()
+        st.caption(
+            f"Resultados de la sesión: {stats_sesion['entradas']} "
+            f"({stats_sesion['bytes'] / 1024:.0f} KB) · {stats_sesion['reutilizados']} refinamientos"
+        )
+
+        ultimas = []
+        for d in registro.ultimas(10):
+            fila = {"tipo": d["tipo"], "total_ms": d["ms"]}
+            for e in d["etapas"]:
+                fila[e["etapa"]] = fila.get(e["etapa"], 0) + e["ms"]
+            ultimas.append(fila)
+        st.write("Últimas peticiones (ms por etapa)")
+        st.dataframe(pd.DataFrame(ultimas), width="stretch", hide_index=True)
+
+        st.download_button("Trazas (JSON lines)", registro.jsonl(),
+                           file_name="trazas.jsonl", mime="application/x-ndjson")
+        st.download_button("Métricas (Prometheus)", registro.prometheus(metricas_caches()),
+                           file_name="metricas.prom", mime="text/plain")
 
 
 # ======================================================
@@ -247,6 +432,28 @@ st.markdown(
     f"({df.shape[0]} filas, {df.shape[1]} columnas)"
 )
 
+stats_cache = obtener_cache().estadisticas()
+st.sidebar.caption(
+    f"Caché LLM: {stats_cache['aciertos']} aciertos / {stats_cache['fallos']} fallos "
+    f"({stats_cache['entradas']} respuestas guardadas)"
+)
+stats_ruteo = obtener_enrutador().estadisticas()
+if stats_ruteo["consultas"]:
+    st.sidebar.caption(
+        f"Enrutador local: {stats_ruteo['aciertos']}/{stats_ruteo['consultas']} preguntas "
+        f"({stats_ruteo['tasa_aciertos']:.0%}) en {stats_ruteo['ms_promedio']:.1f} ms · "
+        f"≈{stats_ruteo['segundos_ahorrados']:.0f} s de LLM ahorrados"
+    )
+
+stats_tts = obtener_cache_tts().estadisticas()
+if stats_tts["aciertos"] + stats_tts["fallos"]:
+    st.sidebar.caption(
+        f"Caché de voz: {stats_tts['aciertos']} oraciones reutilizadas / {stats_tts['fallos']} sintetizadas "
+        f"({stats_tts['entradas']} audios, {stats_tts['bytes'] / 2**20:.1f} MB)"
+    )
+
+mostrar_panel = st.sidebar.checkbox("⏱ Panel de rendimiento", value=False)
+
 with st.expander("Ver columnas del dataset"):
     st.write(list(df.columns))
 
@@ -261,60 +468,55 @@ if st.button("Enviar pregunta"):
     if query.strip() == "":
         st.warning("Escribe una pregunta.")
     else:
-        resp = ask_llm(query)
-        ejecutar_instruccion(resp)
+        with trazas.traza("texto", pregunta=query[:120]):
+            responder_en_vivo(query)
 
 # ---------------------- Pregunta por VOZ ------------------------
 st.subheader("🎤 Habla con el Chatbot")
 
-audio_file = st.audio_input("Graba tu pregunta:")
+# 16 kHz mono desde el navegador: lo que usa Whisper, sin remuestrear aquí
+audio_file = st.audio_input("Graba tu pregunta:", sample_rate=audio.FRECUENCIA)
 
 if audio_file is not None:
     try:
-        with st.spinner("Procesando audio..."):
-            # audio_input devuelve un UploadedFile → usar getvalue()
-            audio_bytes = audio_file.getvalue()
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_audio:
-                tmp_audio.write(audio_bytes)
-                audio_path = tmp_audio.name
-
-            # WHISPER → voz a texto
-            with open(audio_path, "rb") as f:
-                transcripcion = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=f
+        with trazas.traza("voz") as traza:
+            with st.spinner("Procesando audio..."):
+                # WHISPER → voz a texto (el audio se envía desde memoria)
+                audio_bytes = audio_file.getvalue()
+                nombre_audio = "pregunta.wav"
+                preparado = None
+                if audio.ACTIVO:
+                    # Mono 16 kHz, sin silencios y comprimido antes de subirlo
+                    with traza.etapa("audio") as etapa:
+                        preparado = audio.preparar(audio_bytes, nombre_audio)
+                        etapa.anotar(**preparado.resumen())
+                    traza.sumar(bytes_audio_ahorrados=preparado.bytes_entrada - preparado.bytes_salida)
+                    audio_bytes, nombre_audio = preparado.datos, preparado.nombre
+                with traza.etapa("stt", bytes_audio=len(audio_bytes)):
+                    texto_usuario = voz.transcribir(client, audio_bytes, nombre_audio)
+            traza.anotar(pregunta=texto_usuario[:120])
+
+            if preparado is not None and preparado.formato != "original":
+                st.caption(
+                    f"🎙 Audio enviado: {preparado.bytes_entrada / 1024:.0f} KB → "
+                    f"{preparado.bytes_salida / 1024:.0f} KB ({preparado.formato}), "
+                    f"{preparado.segundos_entrada:.1f} s → {preparado.segundos_salida:.1f} s · "
+                    f"≈{preparado.segundos_subida_ahorrados:.1f} s menos de subida a {audio.KBPS_SUBIDA:.0f} kbps"
                 )
 
-            texto_usuario = transcripcion.text
             st.success(f"🧍 Dijiste: **{texto_usuario}**")
-
-            respuesta_texto = ask_llm(texto_usuario)
-
             st.write("🤖 Respuesta:")
-            ejecutar_instruccion(respuesta_texto)
 
-            # TTS → texto a voz
+            # TTS → texto a voz, oración por oración mientras llega la respuesta
+            pipeline = voz.PipelineVoz(client)
             try:
-                speech_resp = client.audio.speech.create(
-                    model="gpt-4o-mini-tts",
-                    voice="alloy",
-                    input=respuesta_texto
-                )
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_out:
-                    # En SDK nuevo, hay que usar .read()
-                    if hasattr(speech_resp, "read"):
-                        tmp_out.write(speech_resp.read())
-                    else:
-                        # por si la respuesta ya son bytes
-                        tmp_out.write(speech_resp)
-                    audio_out_path = tmp_out.name
-
-                with open(audio_out_path, "rb") as f:
-                    st.audio(f.read(), format="audio/mp3")
-            except Exception as e:
-                st.warning(f"No se pudo generar audio de respuesta (TTS): {e}")
+                responder_en_vivo(texto_usuario, pipeline)
+            finally:
+                pipeline.cerrar()
 
     except Exception as e:
         st.error(f"Error procesando el audio: {e}")
+
+# Al final del script para que incluya la petición que se acaba de responder
+if mostrar_panel:
+    panel_rendimiento()
@@ -0,0 +1,3 @@
+"""
+Benchmarks del camino de datos (generador sintético y medición por etapa).
+"""
@@ -0,0 +1,497 @@
+"""
+Prueba de carga de extremo a extremo: N sesiones simultáneas contra un nodo Streamlit.
+
+Levanta los servidores simulados (bench.simulados) y `streamlit run app.py`
+apuntando a ellos (OPENAI_BASE_URL y SODA_DOMINIO), y luego conecta N
+sesiones por el mismo websocket que usa el navegador (/_stcore/stream). Cada
+sesión carga la página, opcionalmente elige la fuente API y hace preguntas
+por texto (área de texto + botón) o por voz (sube un WAV al audio_input),
+con una pausa aleatoria entre interacciones.
+
+Se mide la latencia de extremo a extremo de cada interacción (desde que se
+envía hasta que el script termina de correr), el throughput y el RSS de los
+procesos del nodo y de los simulados. Como el LLM, Whisper, TTS y SODA son
+locales y con latencia fija, lo que cambia entre corridas es el costo del
+propio nodo: sirve para dimensionar despliegues y validar cambios de caché o
+concurrencia sin red.
+
+Uso:
+    python -m bench.carga --sesiones 20 --interacciones 5
+    python -m bench.carga --sesiones 50 --proporcion-voz 0.3 --latencia-llm 1.0
+    python -m bench.carga --fuente api --filas-soda 50000
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+import numpy as np
+import requests
+
+from bench import generar, simulados
+from bench.correr import entorno, version_git
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, "app.py")
+CARPETA_RESULTADOS = os.path.join("bench", "resultados")
+
+SESIONES = 10
+INTERACCIONES = 5
+PAUSA = 2.0                 # segundos promedio entre interacciones de una sesión
+RAMPA = 5.0                 # segundos en los que se reparten los inicios de sesión
+PROPORCION_VOZ = 0.3
+TIMEOUT = 120.0
+INTERVALO_RSS = 0.2
+FILAS_CSV = 50_000
+
+ETIQUETA_BOTON = "Enviar pregunta"
+OPCION_API = "API datos.gov.co"
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wav_pregunta(segundos: float = 2.0, frecuencia: int = 16000, silencio: float = 0.8) -> bytes:
+    """
+    WAV mono de 16 bits con un tono entre dos silencios, como el que graba
+    st.audio_input (los silencios los recorta mintic.audio antes de subirlo).
+    """
+    t = np.arange(int(segundos * frecuencia)) / frecuencia
+    pausa = np.zeros(int(silencio * frecuencia))
+    muestras = (np.concatenate([pausa, 0.2 * np.sin(2 * math.pi * 220 * t), pausa]) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(frecuencia)
+        w.writeframes(muestras.tobytes())
+    return buffer.getvalue()
+
+
+# ======================================================
+# MEMORIA DE LOS PROCESOS
+# ======================================================
+
+def rss_proceso(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class MonitorRSS:
+    """Muestrea el RSS de varios procesos en un hilo; guarda el pico y el último valor."""
+
+    def __init__(self, procesos: dict):
+        self.procesos = procesos
+        self.pico = {n: 0 for n in procesos}
+        self.final = {n: 0 for n in procesos}
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while True:
+            for nombre, pid in self.procesos.items():
+                rss = rss_proceso(pid)
+                self.final[nombre] = rss
+                self.pico[nombre] = max(self.pico[nombre], rss)
+            if self._parar.wait(INTERVALO_RSS):
+                return
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
+        return False
+
+    def reporte(self) -> dict:
+        return {
+            n: {"pico_mb": round(self.pico[n] / 1e6, 1), "final_mb": round(self.final[n] / 1e6, 1)}
+            for n in self.procesos
+        }
+
+
+# ======================================================
+# SESIÓN SIMULADA (PROTOCOLO DEL NAVEGADOR)
+# ======================================================
+
+class Sesion:
+    """Un navegador: websocket propio, estado de widgets y mediciones por flujo."""
+
+    def __init__(self, numero: int, puerto: int, timeout: float = TIMEOUT):
+        self.numero = numero
+        self.base = f"http://127.0.0.1:{puerto}"
+        self.url_ws = f"ws://127.0.0.1:{puerto}/_stcore/stream"
+        self.timeout = timeout
+        self.ws = None
+        self.id_sesion = ""
+        self.hash_pagina = ""
+        self.widgets: dict = {}       # (tipo, etiqueta) → id del widget
+        self.fijos: list = []         # estados que el navegador reenvía en cada rerun
+        self.latencias: dict = {}     # flujo → [segundos]
+        self.errores: list = []
+        self.avisos = 0
+
+    async def abrir(self) -> None:
+        from websockets.asyncio.client import connect
+
+        self.ws = await connect(self.url_ws, subprotocols=["streamlit"], max_size=None,
+                                open_timeout=self.timeout)
+
+    async def cerrar(self) -> None:
+        if self.ws is not None:
+            await self.ws.close()
+
+    def _widget(self, tipo: str, etiqueta: str | None = None) -> str | None:
+        return next((i for (t, e), i in self.widgets.items() if t == tipo and etiqueta in (None, e)), None)
+
+    def _procesar(self, msg) -> str | None:
+        tipo = msg.WhichOneof("type")
+        if tipo == "new_session":
+            self.hash_pagina = msg.new_session.page_script_hash
+            self.id_sesion = msg.new_session.initialize.session_id or self.id_sesion
+        elif tipo == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            elemento = msg.delta.new_element
+            clase = elemento.WhichOneof("type")
+            if clase in ("text_area", "button", "radio", "audio_input"):
+                widget = getattr(elemento, clase)
+                self.widgets[(clase, widget.label)] = widget.id
+            elif clase == "exception":
+                self.errores.append(elemento.exception.message)
+            elif clase == "alert":
+                from streamlit.proto.Alert_pb2 import Alert
+
+                if elemento.alert.format == Alert.ERROR:
+                    self.errores.append(elemento.alert.body)
+                elif elemento.alert.format == Alert.WARNING:
+                    self.avisos += 1
+        return tipo
+
+    async def _esperar(self, tipo_esperado: str):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        async with asyncio.timeout(self.timeout):
+            while True:
+                msg = ForwardMsg()
+                msg.ParseFromString(await self.ws.recv())
+                if self._procesar(msg) == tipo_esperado:
+                    return msg
+
+    async def _rerun(self, estados: list) -> None:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        back = BackMsg()
+        back.rerun_script.query_string = ""
+        back.rerun_script.page_script_hash = self.hash_pagina
+        for estado in self.fijos + estados:
+            back.rerun_script.widget_states.widgets.append(estado)
+        await self.ws.send(back.SerializeToString())
+
+    async def correr(self, flujo: str, estados: list | None = None, antes=None) -> None:
+        """Un rerun medido de punta a punta (incluye `antes`, p. ej. la subida del audio)."""
+        errores_previos = len(self.errores)
+        inicio = time.perf_counter()
+        try:
+            if antes is not None:
+                estados = (estados or []) + await antes()
+            await self._rerun(estados or [])
+            await self._esperar("script_finished")
+        except (TimeoutError, OSError, RuntimeError) as e:
+            self.errores.append(f"{flujo}: {type(e).__name__} {e}")
+        if len(self.errores) == errores_previos:
+            self.latencias.setdefault(flujo, []).append(time.perf_counter() - inicio)
+
+    # ---------- Flujos ----------
+
+    def _estado(self, widget_id: str):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        estado = WidgetState()
+        estado.id = widget_id
+        return estado
+
+    async def inicio(self) -> None:
+        await self.abrir()
+        await self.correr("inicio")
+
+    async def elegir_api(self) -> None:
+        radio = self._widget("radio")
+        if radio is None:
+            self.errores.append("no se encontró el selector de fuente")
+            return
+        estado = self._estado(radio)
+        estado.string_value = OPCION_API
+        self.fijos.append(estado)
+        await self.correr("carga_api")
+
+    async def texto(self, pregunta: str) -> None:
+        area, boton = self._widget("text_area"), self._widget("button", ETIQUETA_BOTON)
+        if area is None or boton is None:
+            self.errores.append("no se encontró el área de texto o el botón")
+            return
+        valor = self._estado(area)
+        valor.string_value = pregunta
+        disparo = self._estado(boton)
+        disparo.trigger_value = True
+        await self.correr("texto", [valor, disparo])
+
+    async def voz(self, audio: bytes) -> None:
+        widget = self._widget("audio_input")
+        if widget is None:
+            self.errores.append("no se encontró el audio_input")
+            return
+
+        async def subir() -> list:
+            from streamlit.proto.BackMsg_pb2 import BackMsg
+
+            # Igual que el navegador: pide URLs de subida y hace PUT del archivo
+            back = BackMsg()
+            back.file_urls_request.request_id = uuid.uuid4().hex
+            back.file_urls_request.session_id = self.id_sesion
+            back.file_urls_request.file_names.append("pregunta.wav")
+            await self.ws.send(back.SerializeToString())
+            urls = (await self._esperar("file_urls_response")).file_urls_response.file_urls[0]
+            respuesta = await asyncio.to_thread(
+                requests.put, urljoin(self.base, urls.upload_url),
+                files={"file": ("pregunta.wav", audio, "audio/wav")}, timeout=self.timeout,
+            )
+            respuesta.raise_for_status()
+
+            estado = self._estado(widget)
+            archivo = estado.file_uploader_state_value.uploaded_file_info.add()
+            archivo.file_id = urls.file_id
+            archivo.name = "pregunta.wav"
+            archivo.size = len(audio)
+            archivo.file_urls.CopyFrom(urls)
+            return [estado]
+
+        await self.correr("voz", antes=subir)
+
+
+async def simular_sesion(numero: int, args, audio: bytes) -> Sesion:
+    rng = random.Random(numero)
+    sesion = Sesion(numero, args.puerto_app, args.timeout)
+    await asyncio.sleep(rng.uniform(0, args.rampa))
+    try:
+        await sesion.inicio()
+        if args.fuente == "api":
+            await sesion.elegir_api()
+        for i in range(args.interacciones):
+            await asyncio.sleep(rng.expovariate(1 / args.pausa) if args.pausa > 0 else 0)
+            if rng.random() < args.proporcion_voz:
+                await sesion.voz(audio)
+            else:
+                pregunta, _ = args.escenarios[(numero + i) % len(args.escenarios)]
+                # Sufijo único: cada pregunta llega al LLM en vez de salir de la caché
+                await sesion.texto(pregunta if args.repetir else f"{pregunta} (sesión {numero}, {i})")
+    except Exception as e:
+        sesion.errores.append(f"sesión {numero}: {type(e).__name__} {e}")
+    finally:
+        await sesion.cerrar()
+    return sesion
+
+
+async def simular(args) -> tuple:
+    audio = wav_pregunta()
+    inicio = time.perf_counter()
+    sesiones = await asyncio.gather(*(simular_sesion(n, args, audio) for n in range(args.sesiones)))
+    return sesiones, time.perf_counter() - inicio
+
+
+# ======================================================
+# PROCESOS
+# ======================================================
+
+def _esperar_salud(url: str, timeout: float, proceso: subprocess.Popen) -> None:
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El proceso terminó antes de estar listo (código {proceso.returncode})")
+        try:
+            if requests.get(url, timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.3)
+    raise TimeoutError(f"{url} no respondió en {timeout:.0f} s")
+
+
+def preparar_directorio(directorio: str, csv: str, puerto_openai: int, puerto_soda: int) -> dict:
+    """Directorio de trabajo del nodo (CSV, secrets, caché) y su entorno."""
+    from mintic.datos import CSV_PATH
+
+    os.symlink(os.path.abspath(csv), os.path.join(directorio, CSV_PATH))
+    os.makedirs(os.path.join(directorio, ".streamlit"))
+    with open(os.path.join(directorio, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        f.write('OPENAI_API_KEY = "sk-simulado"\n')
+    return {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-simulado",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{puerto_openai}/v1",
+        "SODA_DOMINIO": f"http://127.0.0.1:{puerto_soda}",
+        "MINTIC_CACHE_DIR": os.path.join(directorio, ".cache"),
+    }
+
+
+def percentiles(valores: list) -> dict:
+    if not valores:
+        return {"n": 0}
+    arr = np.asarray(valores)
+    return {
+        "n": len(valores),
+        "p50": round(float(np.percentile(arr, 50)), 4),
+        "p95": round(float(np.percentile(arr, 95)), 4),
+        "p99": round(float(np.percentile(arr, 99)), 4),
+        "media": round(float(arr.mean()), 4),
+        "max": round(float(arr.max()), 4),
+    }
+
+
+def correr_carga(args) -> dict:
+    csv = args.csv or os.path.abspath(generar.asegurar(args.filas_csv))
+    puerto_openai, puerto_soda = _puerto_libre(), _puerto_libre()
+    args.puerto_app = args.puerto_app or _puerto_libre()
+
+    with tempfile.TemporaryDirectory() as trabajo:
+        entorno_app = preparar_directorio(trabajo, csv, puerto_openai, puerto_soda)
+        comando_simulados = [
+            sys.executable, "-m", "bench.simulados",
+            "--puerto-openai", str(puerto_openai), "--puerto-soda", str(puerto_soda),
+            "--latencia-llm", str(args.latencia_llm), "--tokens-por-segundo", str(args.tokens_por_segundo),
+            "--latencia-stt", str(args.latencia_stt), "--latencia-tts", str(args.latencia_tts),
+            "--latencia-soda", str(args.latencia_soda), "--filas-soda", str(args.filas_soda),
+        ]
+        if args.archivo_escenarios:
+            comando_simulados += ["--escenarios", os.path.abspath(args.archivo_escenarios)]
+        comando_app = [
+            sys.executable, "-m", "streamlit", "run", APP,
+            "--server.headless", "true", "--server.port", str(args.puerto_app),
+            "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false",
+        ]
+
+        registro = open(os.path.join(trabajo, "streamlit.log"), "w")
+        sim = subprocess.Popen(comando_simulados, cwd=RAIZ, stdout=subprocess.PIPE, text=True)
+        app = None
+        try:
+            if not (sim.stdout.readline() or "").startswith("listo"):
+                raise RuntimeError("Los servidores simulados no arrancaron")
+            app = subprocess.Popen(comando_app, cwd=trabajo, env=entorno_app,
+                                   stdout=registro, stderr=subprocess.STDOUT)
+            _esperar_salud(f"http://127.0.0.1:{args.puerto_app}/_stcore/health", args.timeout, app)
+
+            with MonitorRSS({"streamlit": app.pid, "simulados": sim.pid}) as monitor:
+                sesiones, duracion = asyncio.run(simular(args))
+        finally:
+            for proceso in (app, sim):
+                if proceso is not None:
+                    proceso.terminate()
+                    try:
+                        proceso.wait(10)
+                    except subprocess.TimeoutExpired:
+                        proceso.kill()
+            registro.close()
+
+    por_flujo: dict = {}
+    for s in sesiones:
+        for flujo, tiempos in s.latencias.items():
+            por_flujo.setdefault(flujo, []).extend(tiempos)
+    errores = [e for s in sesiones for e in s.errores]
+    interacciones = sum(len(por_flujo.get(f, [])) for f in ("texto", "voz"))
+
+    parametros = {k: v for k, v in vars(args).items() if k != "escenarios"}
+    return {
+        "version": version_git(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": entorno(),
+        "parametros": parametros,
+        "duracion_s": round(duracion, 3),
+        "interacciones": interacciones,
+        "throughput_por_s": round(interacciones / duracion, 3) if duracion else 0.0,
+        "flujos": {f: percentiles(v) for f, v in por_flujo.items()},
+        "todas": percentiles([t for f in ("texto", "voz") for t in por_flujo.get(f, [])]),
+        "errores": len(errores),
+        "ejemplos_errores": errores[:20],
+        "avisos": sum(s.avisos for s in sesiones),
+        "rss": monitor.reporte(),
+    }
+
+
+def imprimir(reporte: dict) -> None:
+    print(f"{reporte['parametros']['sesiones']} sesiones · {reporte['interacciones']} interacciones "
+          f"en {reporte['duracion_s']:.1f} s → {reporte['throughput_por_s']:.2f} interacciones/s")
+    print(f"  {'flujo':<10} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for flujo, p in {**reporte["flujos"], "total": reporte["todas"]}.items():
+        if p.get("n"):
+            print(f"  {flujo:<10} {p['n']:>5} {p['p50']:>8.3f} {p['p95']:>8.3f} {p['p99']:>8.3f} {p['max']:>8.3f}")
+    for proceso, rss in reporte["rss"].items():
+        print(f"  RSS {proceso}: pico {rss['pico_mb']} MB, final {rss['final_mb']} MB")
+    print(f"  errores: {reporte['errores']} · avisos: {reporte['avisos']}")
+    for e in reporte["ejemplos_errores"][:5]:
+        print(f"    - {e[:200]}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga con OpenAI y SODA simulados.")
+    parser.add_argument("--sesiones", type=int, default=SESIONES)
+    parser.add_argument("--interacciones", type=int, default=INTERACCIONES, help="preguntas por sesión")
+    parser.add_argument("--pausa", type=float, default=PAUSA, help="pausa promedio entre preguntas (s)")
+    parser.add_argument("--rampa", type=float, default=RAMPA, help="segundos para arrancar todas las sesiones")
+    parser.add_argument("--proporcion-voz", type=float, default=PROPORCION_VOZ)
+    parser.add_argument("--repetir", action="store_true", help="repetir preguntas (permite aciertos de caché)")
+    parser.add_argument("--fuente", choices=("csv", "api"), default="csv")
+    parser.add_argument("--csv", default=None, help="CSV del inventario (por defecto, uno sintético)")
+    parser.add_argument("--filas-csv", type=int, default=FILAS_CSV)
+    parser.add_argument("--filas-soda", type=int, default=simulados.FILAS_SODA)
+    parser.add_argument("--latencia-llm", type=float, default=simulados.LATENCIA_LLM)
+    parser.add_argument("--tokens-por-segundo", type=float, default=simulados.TOKENS_POR_SEGUNDO)
+    parser.add_argument("--latencia-stt", type=float, default=simulados.LATENCIA_STT)
+    parser.add_argument("--latencia-tts", type=float, default=simulados.LATENCIA_TTS)
+    parser.add_argument("--latencia-soda", type=float, default=simulados.LATENCIA_SODA)
+    parser.add_argument("--archivo-escenarios", default=None, help="JSON con preguntas y respuestas enlatadas")
+    parser.add_argument("--puerto-app", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--salida", default=None, help="archivo JSON de resultados")
+    args = parser.parse_args()
+    args.escenarios = (simulados.leer_escenarios(args.archivo_escenarios)
+                       if args.archivo_escenarios else simulados.ESCENARIOS)
+
+    reporte = correr_carga(args)
+    imprimir(reporte)
+
+    salida = args.salida or os.path.join(
+        CARPETA_RESULTADOS, f"carga-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{reporte['version']}.json"
+    )
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"Resultados → {salida}")
+    return 1 if reporte["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
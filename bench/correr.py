@@ -0,0 +1,346 @@
+"""
+Benchmark del camino de datos por etapa: tiempo y memoria.
+
+Para cada tamaño (50k, 500k, 5M filas por defecto) genera el inventario
+sintético (bench.generar) y mide, en un proceso nuevo para que las cachés
+y la memoria de un tamaño no contaminen al siguiente:
+
+- csv.*: huella, lectura Arrow, plan de tipos, escritura de la caché y
+  carga del DataFrame desde la caché (lo que hace mintic.datos).
+- api.*: parseo de páginas CSV como las de SODA (soda._leer_pagina_csv),
+  plan de tipos y paso a pandas. La red queda fuera; las páginas se leen
+  del archivo generado.
+- metricas.*: completitud, actualización y sector (mintic.metricas), que
+  son las que usan las páginas de objetivos.
+- accion.*: cada acción de ejecutar_instruccion (tabla, filtrar, graficar
+  con count/sum/none), incluida la figura de mintic.graficos. Se reporta
+  la primera llamada (construye índices) y la mediana de las siguientes.
+
+La memoria es el pico de RSS muestreado durante la etapa, menos el RSS al
+empezarla, y los bytes que quedan reservados en el pool de Arrow.
+
+Uso:
+    python -m bench.correr                            # 50k, 500k y 5M
+    python -m bench.correr --tamanos 50000 500000
+    python -m bench.correr --comparar bench/resultados/anterior.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+TAMANOS = [50_000, 500_000, 5_000_000]
+REPETICIONES = 5
+INTERVALO_MEMORIA = 0.005
+CARPETA_RESULTADOS = os.path.join("bench", "resultados")
+# Una etapa es regresión si tarda más que este múltiplo de la referencia
+UMBRAL_REGRESION = 1.25
+
+COLUMNA_SECTOR = "Información de la Entidad: Sector"
+COLUMNA_FECHA = "Fecha de creación (UTC)"
+COLUMNA_NUMERICA = "Vistas"
+
+INSTRUCCIONES = {
+    "tabla": {"accion": "tabla", "columnas": ["Titulo", "Dueño", COLUMNA_SECTOR, COLUMNA_NUMERICA]},
+    "filtrar": {"accion": "filtrar", "columna": COLUMNA_SECTOR, "valor": "Educación"},
+    "graficar_count": {"accion": "graficar", "tipo": "bar", "x": COLUMNA_SECTOR, "agregacion": "count"},
+    "graficar_sum": {"accion": "graficar", "tipo": "bar", "x": COLUMNA_SECTOR,
+                     "y": COLUMNA_NUMERICA, "agregacion": "sum"},
+    "graficar_none": {"accion": "graficar", "tipo": "line", "x": COLUMNA_FECHA,
+                      "y": COLUMNA_NUMERICA, "agregacion": "none"},
+}
+
+
+# ======================================================
+# MEDICIÓN
+# ======================================================
+
+_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    """RSS actual del proceso (Linux); 0 si no se puede leer."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGINA
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class Medidor:
+    """Cronómetro + muestreo de RSS en un hilo mientras dura la etapa."""
+
+    def __init__(self):
+        self.pico = 0
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._parar.wait(INTERVALO_MEMORIA):
+            self.pico = max(self.pico, rss_bytes())
+
+    def __enter__(self):
+        import pyarrow as pa
+
+        self.rss_inicio = self.pico = rss_bytes()
+        self.arrow_inicio = pa.total_allocated_bytes()
+        self._hilo.start()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        import pyarrow as pa
+
+        self.segundos = time.perf_counter() - self.inicio
+        self._parar.set()
+        self._hilo.join()
+        self.pico = max(self.pico, rss_bytes())
+        self.arrow = pa.total_allocated_bytes() - self.arrow_inicio
+        return False
+
+
+def _mb(n: int) -> float:
+    return round(n / 1e6, 1)
+
+
+def medir(resultados: list, filas: int, etapa: str, funcion, repeticiones: int = 1):
+    """
+    Ejecuta `funcion` y agrega una fila a `resultados`. Con varias repeticiones
+    la primera se reporta aparte (en frío) y `segundos` es la mediana del resto.
+    """
+    with Medidor() as m:
+        valor = funcion()
+    tiempos = []
+    for _ in range(repeticiones - 1):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    fila = {
+        "filas": filas,
+        "etapa": etapa,
+        "segundos": round(statistics.median(tiempos) if tiempos else m.segundos, 6),
+        "segundos_frio": round(m.segundos, 6),
+        "repeticiones": repeticiones,
+        "rss_inicio_mb": _mb(m.rss_inicio),
+        "rss_pico_mb": _mb(m.pico),
+        "rss_delta_mb": _mb(m.pico - m.rss_inicio),
+        "arrow_mb": _mb(m.arrow),
+    }
+    resultados.append(fila)
+    print(f"  {filas:>9} {etapa:<28} {fila['segundos']:>9.4f} s  "
+          f"(frío {fila['segundos_frio']:.4f})  +{fila['rss_delta_mb']} MB", flush=True)
+    return valor
+
+
+# ======================================================
+# ETAPAS
+# ======================================================
+
+def _paginas(ruta: str, tam_pagina: int):
+    """Cuerpos CSV de `tam_pagina` filas con cabecera, como los devuelve SODA."""
+    with open(ruta, "rb") as f:
+        cabecera = f.readline()
+        lineas = []
+        for linea in f:
+            lineas.append(linea)
+            if len(lineas) == tam_pagina:
+                yield cabecera + b"".join(lineas)
+                lineas = []
+        if lineas:
+            yield cabecera + b"".join(lineas)
+
+
+def correr_tamano(filas: int, repeticiones: int = REPETICIONES) -> list:
+    """Todas las etapas para un tamaño. Corre en un proceso propio."""
+    from bench import generar
+
+    resultados = []
+    ruta = medir(resultados, filas, "generar", lambda: generar.asegurar(filas))
+
+    with tempfile.TemporaryDirectory() as cache:
+        # La caché columnar de este tamaño va a un directorio temporal
+        from mintic import datos
+
+        datos.CACHE_DIR = cache
+        _etapas_csv(resultados, filas, ruta)
+        _etapas_api(resultados, filas, ruta)
+        _etapas_metricas(resultados, filas, ruta, repeticiones)
+        _etapas_acciones(resultados, filas, ruta, repeticiones)
+    return resultados
+
+
+def _etapas_csv(resultados: list, filas: int, ruta: str) -> None:
+    from mintic import datos, tipos
+
+    huella = medir(resultados, filas, "csv.huella", lambda: datos.huella_csv(ruta))
+    tabla = medir(resultados, filas, "csv.leer", lambda: datos.leer_csv(ruta))
+    tipada = medir(resultados, filas, "csv.tipos", lambda: tipos.aplicar(tabla))
+    del tabla
+    destino = datos._ruta_cache(ruta, huella)
+    medir(resultados, filas, "csv.escribir_cache", lambda: datos.escribir_arrow(tipada, destino))
+    del tipada
+    medir(resultados, filas, "csv.cargar_inventario", lambda: datos.cargar_inventario(path=ruta))
+
+
+def _etapas_api(resultados: list, filas: int, ruta: str) -> None:
+    import pyarrow as pa
+
+    from mintic import soda, tipos
+
+    def paginas():
+        partes = [soda._leer_pagina_csv(io.BytesIO(p)) for p in _paginas(ruta, soda.TAM_PAGINA)]
+        return soda.sin_campos_sistema(pa.concat_tables(partes, promote_options="default"))
+
+    tabla = medir(resultados, filas, "api.paginas", paginas)
+    tipada = medir(resultados, filas, "api.tipos", lambda: tipos.aplicar(tabla))
+    del tabla
+    medir(resultados, filas, "api.a_pandas", lambda: tipos.a_pandas(tipada))
+
+
+def _etapas_metricas(resultados: list, filas: int, ruta: str, repeticiones: int) -> None:
+    from mintic import datos, metricas
+
+    destino, huella = datos.asegurar_cache(ruta)
+    tabla = datos.abrir_arrow(destino)
+    columna_fecha = next((c for c in metricas.COLUMNAS_ACTUALIZACION if c in tabla.column_names), None)
+    columna_sector = metricas._detectar_sector(tabla.column_names)
+    # Cada métrica por separado, calculada sobre la proyección que la activa
+    excluidas = {*metricas.COLUMNAS_ACTUALIZACION, *metricas.COLUMNAS_TEMA}
+    resto = [c for c in tabla.column_names if c not in excluidas and "sector" not in c.lower()]
+    partes = {
+        "metricas.completitud": resto,
+        "metricas.actualizacion": [columna_fecha],
+        "metricas.sector": [columna_sector],
+    }
+    for etapa, columnas in partes.items():
+        proyeccion = tabla.select([c for c in columnas if c])
+        medir(resultados, filas, etapa,
+              lambda: metricas.calcular_metricas(proyeccion, huella), repeticiones)
+    medir(resultados, filas, "metricas.total",
+          lambda: metricas.calcular_metricas(tabla, huella), repeticiones)
+
+
+def _etapas_acciones(resultados: list, filas: int, ruta: str, repeticiones: int) -> None:
+    from mintic import esquema, graficos, motor
+    from mintic.datos import cargar_inventario
+
+    df = cargar_inventario(path=ruta)
+    info = medir(resultados, filas, "accion.esquema", lambda: esquema.obtener_esquema(df))
+
+    for nombre, instruccion in INSTRUCCIONES.items():
+        texto = json.dumps(instruccion, ensure_ascii=False)
+
+        def ejecutar():
+            # Igual que app.ejecutar_instruccion, sin la parte de Streamlit
+            obj = esquema.resolver_alias(info, json.loads(texto))
+            res = motor.ejecutar(df, obj)
+            if res.clase == "grafico":
+                graficos.figura(res.tipo, res.datos, res.x, res.y, nombre=f"bench-{nombre}")
+            elif res.clase != "tabla":
+                raise RuntimeError(f"{nombre}: {res.mensaje or res.clase}")
+            return res
+
+        medir(resultados, filas, f"accion.{nombre}", ejecutar, repeticiones)
+
+
+# ======================================================
+# REPORTE
+# ======================================================
+
+def version_git() -> str:
+    try:
+        salida = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, timeout=10
+        )
+        return salida.stdout.strip() or "desconocida"
+    except (OSError, subprocess.SubprocessError):
+        return "desconocida"
+
+
+def entorno() -> dict:
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def comparar(actual: list, referencia: list, umbral: float = UMBRAL_REGRESION) -> list:
+    """Etapas (filas, etapa, razón) que empeoraron más del umbral."""
+    previas = {(r["filas"], r["etapa"]): r for r in referencia}
+    regresiones = []
+    for r in actual:
+        previa = previas.get((r["filas"], r["etapa"]))
+        if not previa or not previa["segundos"]:
+            continue
+        razon = r["segundos"] / previa["segundos"]
+        marca = "  ⚠ regresión" if razon > umbral else ""
+        print(f"  {r['filas']:>9} {r['etapa']:<28} {previa['segundos']:>9.4f} → {r['segundos']:.4f} s"
+              f"  ×{razon:.2f}{marca}")
+        if razon > umbral:
+            regresiones.append((r["filas"], r["etapa"], round(razon, 2)))
+    return regresiones
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del camino de datos por etapa.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS)
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--salida", default=None, help="archivo JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    version = version_git()
+    fecha = datetime.now(timezone.utc)
+    salida = args.salida or os.path.join(
+        CARPETA_RESULTADOS, f"bench-{fecha:%Y%m%d-%H%M%S}-{version}.json"
+    )
+
+    resultados = []
+    for filas in args.tamanos:
+        print(f"== {filas} filas", flush=True)
+        # Proceso nuevo por tamaño: cachés y memoria empiezan de cero
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+            resultados += pool.submit(correr_tamano, filas, args.repeticiones).result()
+
+    reporte = {
+        "version": version,
+        "fecha": fecha.isoformat(timespec="seconds"),
+        "entorno": entorno(),
+        "resultados": resultados,
+    }
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"Resultados → {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            referencia = json.load(f)
+        print(f"== comparación con {referencia.get('version')} ({args.comparar})")
+        if comparar(resultados, referencia["resultados"]):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
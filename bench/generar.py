@@ -0,0 +1,296 @@
+"""
+Generador de inventarios sintéticos con el esquema real.
+
+Reproduce los campos de diagnostico_output/completitud_por_campo.csv con su
+tasa de nulos observada, cardinalidades parecidas a las del inventario
+(pocos dominios y sectores, miles de dueños, títulos casi únicos) y los
+formatos de fecha de la exportación del portal. Las filas se escriben por
+lotes, así que generar 5 millones no exige tenerlas todas en memoria.
+
+Uso:
+    python -m bench.generar --filas 50000
+    python -m bench.generar --filas 5000000 --salida /tmp/inventario-5m.csv
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from mintic.diagnostico import normalizar_columna
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+COMPLETITUD = os.path.join("diagnostico_output", "completitud_por_campo.csv")
+CARPETA = os.path.join("bench", "datos")
+TAM_LOTE = 100_000
+SEMILLA = 20251119
+
+# Rango de fechas del inventario (2012 → 2025), en segundos Unix
+DESDE = 1325376000
+HASTA = 1763510400
+
+FORMATO_PORTAL = "%m/%d/%Y %I:%M:%S %p"
+
+SECTORES = [
+    "Educación", "Salud y Protección Social", "Hacienda y Crédito Público",
+    "Ambiente y Desarrollo Sostenible", "Transporte", "Minas y Energía",
+    "Agricultura y Desarrollo Rural", "Cultura", "Interior", "Justicia y del Derecho",
+    "Trabajo", "Vivienda, Ciudad y Territorio", "Comercio, Industria y Turismo",
+    "Tecnologías de la Información y las Comunicaciones", "Defensa", "Inclusión Social",
+    "Planeación", "Estadística", "Función Pública", "Ciencia, Tecnología e Innovación",
+    "Deporte", "Relaciones Exteriores", "Igualdad y Equidad", "Organismos de Control",
+]
+DEPARTAMENTOS = [
+    "Bogotá D.C.", "Antioquia", "Valle del Cauca", "Cundinamarca", "Santander",
+    "Atlántico", "Bolívar", "Boyacá", "Nariño", "Tolima", "Caldas", "Risaralda",
+    "Huila", "Meta", "Cauca", "Córdoba", "Norte de Santander", "Quindío", "Cesar",
+    "Magdalena", "Sucre", "La Guajira", "Casanare", "Chocó", "Caquetá", "Putumayo",
+    "Arauca", "Amazonas", "Guaviare", "Vaupés", "Vichada", "San Andrés",
+]
+TEMAS = [
+    "Vacunación", "Matrícula escolar", "Calidad del agua", "Contratos", "Presupuesto",
+    "Accidentes de tránsito", "Homicidios", "Población", "Empresas", "Turismo",
+    "Precios", "Cultivos", "Licencias ambientales", "Predios", "Subsidios",
+    "Nacimientos", "Defunciones", "Energía", "Conectividad", "Bibliotecas",
+]
+CIUDADES = [
+    "Bogotá", "Medellín", "Cali", "Barranquilla", "Cartagena", "Bucaramanga",
+    "Pereira", "Manizales", "Pasto", "Ibagué", "Neiva", "Villavicencio",
+    "Santa Marta", "Montería", "Cúcuta", "Armenia", "Popayán", "Tunja",
+]
+
+
+# ======================================================
+# CAMPOS
+# ======================================================
+# (encabezado de la exportación, generador, parámetros). La tasa de nulos no
+# va aquí: se lee de COMPLETITUD, buscando por el nombre normalizado.
+
+CAMPOS = [
+    ("UID", "uid", {}),
+    ("Titulo", "titulo", {}),
+    ("Dueño", "categoria", {"n": 3000, "prefijo": "Entidad"}),
+    ("UID del Dueño", "categoria", {"n": 3000, "prefijo": "own", "uid": True}),
+    ("Etapa de publicación", "categoria", {"valores": ["published", "unpublished", "draft"]}),
+    ("Estado de aprobación", "categoria", {"valores": ["approved", "pending", "rejected", "not ready"]}),
+    ("Público", "booleano", {"p": 0.8}),
+    ("Origen", "categoria", {"valores": ["Manual", "Federado", "API"]}),
+    ("Tipo", "categoria", {"valores": ["dataset", "chart", "filter", "map", "file", "href",
+                                       "story", "visualization", "calendar", "form"]}),
+    ("Descargas", "entero", {"media": 3.0, "sigma": 2.0}),
+    ("Access URL", "url", {"ruta": "d"}),
+    ("Fecha de última actualización de metadatos (UTC)", "fecha", {"formato": FORMATO_PORTAL}),
+    ("Fecha de creación (UTC)", "fecha", {"formato": FORMATO_PORTAL}),
+    ("Fecha de última actualización de datos (UTC)", "fecha", {"formato": FORMATO_PORTAL}),
+    ("Vistas", "entero", {"media": 4.5, "sigma": 2.0}),
+    ("Recurso derivado", "booleano", {"p": 0.4}),
+    ("Dominio", "categoria", {"valores": ["www.datos.gov.co"]}),
+    ("API", "url", {"ruta": "resource", "sufijo": ".json"}),
+    ("Descripción", "descripcion", {}),
+    ("Etiqueta", "categoria", {"n": 5000, "prefijo": "etiqueta"}),
+    ("Información de datos: Idioma", "categoria", {"valores": ["Español", "Inglés", "Español, Inglés"]}),
+    ("Información de la Entidad: Nombre de la Entidad", "categoria", {"n": 2500, "prefijo": "Entidad"}),
+    ("Información de datos: Frecuencia de actualización", "categoria", {
+        "valores": ["Anual", "Mensual", "Trimestral", "Semestral", "Diaria", "Semanal",
+                    "No aplica", "Cada 5 años"]}),
+    ("Información de la Entidad: Departamento", "categoria", {"valores": DEPARTAMENTOS}),
+    ("Información de la Entidad: Orden", "categoria", {"valores": ["Nacional", "Territorial", "Internacional"]}),
+    ("Información de la Entidad: Municipio", "categoria", {"valores": CIUDADES, "n": 1100, "prefijo": "Municipio"}),
+    ("Información de datos: Cobertura Geográfica", "categoria", {
+        "valores": ["Nacional", "Departamental", "Municipal", "Regional", "Internacional"]}),
+    ("Categoría", "categoria", {"valores": SECTORES}),
+    ("Información de la Entidad: Área o dependencia", "categoria", {"n": 4000, "prefijo": "Área"}),
+    ("Información de la Entidad: Sector", "categoria", {"valores": SECTORES}),
+    ("Atribución", "categoria", {"n": 2500, "prefijo": "Entidad"}),
+    ("Número de Columnas", "entero", {"media": 2.5, "sigma": 0.8}),
+    ("Licencia", "categoria", {"valores": ["Creative Commons Attribution | Share Alike 4.0 International",
+                                           "Public Domain", "Open Database License",
+                                           "Creative Commons 1.0 Universal"]}),
+    ("Información de datos: Fecha Emisión (aaaa_mm_dd)", "fecha", {"formato": "%Y_%m_%d"}),
+    ("Número de Filas", "entero", {"media": 6.0, "sigma": 3.0}),
+    ("Enlace de atribución", "url", {"ruta": "entidad"}),
+    ("Common Core: Publisher", "categoria", {"n": 2000, "prefijo": "Entidad"}),
+    ("Common Core: Unique Identifier", "url", {"ruta": "id"}),
+    ("Common Core: Public Access Level", "categoria", {"valores": ["public", "restricted public", "non-public"]}),
+    ("Common Core: Last Update", "fecha", {"formato": "%Y-%m-%d"}),
+    ("Common Core: Contact Email", "email", {}),
+    ("Common Core: Departamento", "categoria", {"valores": DEPARTAMENTOS}),
+    ("Correo electrónico de contacto", "email", {}),
+    ("Common Core: Homepage", "url", {"ruta": "inicio"}),
+    ("Common Core: License", "categoria", {"valores": ["CC BY-SA 4.0", "CC0", "ODbL"]}),
+    ("Common Core: Issued", "fecha", {"formato": "%Y-%m-%d"}),
+    ("Common Core: Theme", "categoria", {"valores": SECTORES}),
+    ("Etiqueta de las filas", "categoria", {"n": 800, "prefijo": "registro"}),
+    ("Common Core: Category", "categoria", {"valores": SECTORES}),
+    ("UID del conjunto de datos superior", "categoria", {"n": 20000, "prefijo": "sup", "uid": True}),
+    ("Información de datos: URL Documentación", "url", {"ruta": "docs"}),
+    ("Common Core: Municipio", "categoria", {"valores": CIUDADES}),
+    ("Nombre del recurso publicado", "titulo", {}),
+    ("UID del recurso publicado", "uid", {}),
+    ("Información de datos: Fecha Emisión (dd/mm/aaaa)", "fecha", {"formato": "%d/%m/%Y"}),
+    ("Información de la Entidad: Autor", "categoria", {"n": 50, "prefijo": "Autor"}),
+    ("Información de la Entidad: Storage", "texto", {}),
+]
+
+
+def leer_completitud(path: str = COMPLETITUD) -> dict:
+    """{nombre normalizado: fracción no nula} según el último diagnóstico."""
+    serie = pd.read_csv(path, index_col=0)["completitud"]
+    return {str(k): float(v) for k, v in serie.items()}
+
+
+# ======================================================
+# GENERADORES POR TIPO
+# ======================================================
+
+def _zipf(rng: np.random.Generator, n: int, k: int) -> np.ndarray:
+    """Índices en [0, k) con sesgo de Zipf: pocas categorías concentran la mayoría."""
+    pesos = 1.0 / np.arange(1, k + 1) ** 1.1
+    return rng.choice(k, size=n, p=pesos / pesos.sum())
+
+
+def _codigos(valores: np.ndarray) -> pa.Array:
+    """Códigos tipo Socrata ('abcd-1234') a partir de enteros, sin bucles por fila."""
+    letras = np.frombuffer(b"abcdefghijkmnpqrstuvwxyz23456789", dtype=np.uint8)
+    base = len(letras)
+    # Una fila de 9 bytes por código: 4 letras, guion, 4 letras
+    bytes_ = np.full((len(valores), 9), ord("-"), dtype=np.uint8)
+    for posicion in (0, 1, 2, 3, 5, 6, 7, 8):
+        bytes_[:, posicion] = letras[valores % base]
+        valores = valores // base
+    return pa.array(bytes_.view("S9").ravel()).cast(pa.string())
+
+
+def _vocabulario(params: dict) -> list:
+    valores = list(params.get("valores", []))
+    faltan = params.get("n", len(valores)) - len(valores)
+    if faltan > 0:
+        if params.get("uid"):
+            extra = _codigos(np.arange(faltan) * 7919 + 104729).to_pylist()
+            valores += [f"{params['prefijo']}-{c}" for c in extra]
+        else:
+            valores += [f"{params['prefijo']} {i + 1}" for i in range(faltan)]
+    return valores
+
+
+def _columna(tipo: str, params: dict, n: int, inicio: int, rng: np.random.Generator) -> pa.Array:
+    if tipo == "uid":
+        # Únicos dentro del archivo: se derivan del número de fila
+        return _codigos((np.arange(inicio + 1, inicio + n + 1, dtype=np.int64) * 2654435761) % (32 ** 8))
+
+    if tipo in ("titulo", "descripcion"):
+        tema = pa.array(TEMAS).take(pa.array(rng.integers(0, len(TEMAS), n)))
+        ciudad = pa.array(CIUDADES).take(pa.array(rng.integers(0, len(CIUDADES), n)))
+        anio = pc.cast(pa.array(rng.integers(2012, 2026, n)), pa.string())
+        # La entidad multiplica las combinaciones: títulos casi únicos, como en el portal
+        entidad = pc.cast(pa.array(rng.integers(1, 3000, n)), pa.string())
+        titulo = pc.binary_join_element_wise(tema, ciudad, anio, "- Entidad", entidad, " ")
+        if tipo == "titulo":
+            return titulo
+        return pc.binary_join_element_wise(
+            "Datos de", pc.utf8_lower(titulo), "publicados por la entidad para consulta ciudadana.", " "
+        )
+
+    if tipo == "categoria":
+        vocabulario = _vocabulario(params)
+        return pa.array(vocabulario).take(pa.array(_zipf(rng, n, len(vocabulario))))
+
+    if tipo == "entero":
+        return pa.array(np.floor(rng.lognormal(params["media"], params["sigma"], n)).astype(np.int64))
+
+    if tipo == "booleano":
+        return pa.array(rng.random(n) < params["p"])
+
+    if tipo == "fecha":
+        segundos = pa.array(rng.integers(DESDE, HASTA, n)).cast(pa.timestamp("s"))
+        return pc.strftime(segundos, format=params["formato"])
+
+    if tipo == "url":
+        ruta = f"https://www.datos.gov.co/{params['ruta']}/"
+        codigos = _codigos(rng.integers(0, 32 ** 8, n))
+        return pc.binary_join_element_wise(ruta, codigos, params.get("sufijo", ""), "")
+
+    if tipo == "email":
+        dominios = pa.array(["gov.co", "mintic.gov.co", "dane.gov.co", "gmail.com"])
+        usuario = pc.binary_join_element_wise("contacto", pc.cast(pa.array(rng.integers(1, 2000, n)), pa.string()), "")
+        return pc.binary_join_element_wise(usuario, dominios.take(pa.array(_zipf(rng, n, 4))), "@")
+
+    return pa.array(np.full(n, "sin dato"), type=pa.string())
+
+
+def generar_lote(n: int, inicio: int, completitud: dict, rng: np.random.Generator) -> pa.Table:
+    columnas = {}
+    for nombre, tipo, params in CAMPOS:
+        valores = _columna(tipo, params, n, inicio, rng)
+        presente = completitud.get(normalizar_columna(nombre), 1.0)
+        if presente < 1.0:
+            valores = pc.if_else(pa.array(rng.random(n) < presente), valores, None)
+        columnas[nombre] = valores
+    return pa.table(columnas)
+
+
+# ======================================================
+# ESCRITURA
+# ======================================================
+
+def ruta_por_defecto(filas: int) -> str:
+    return os.path.join(CARPETA, f"inventario-{filas}.csv")
+
+
+def generar(filas: int, salida: str | None = None, semilla: int = SEMILLA,
+            tam_lote: int = TAM_LOTE) -> str:
+    """Escribe un CSV sintético de `filas` filas y devuelve su ruta."""
+    salida = salida or ruta_por_defecto(filas)
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    completitud = leer_completitud()
+    faltantes = {normalizar_columna(n) for n, _, _ in CAMPOS} ^ set(completitud)
+    if faltantes:
+        raise ValueError(f"Campos sin correspondencia con {COMPLETITUD}: {sorted(faltantes)}")
+
+    rng = np.random.default_rng(semilla)
+    tmp = f"{salida}.{os.getpid()}.tmp"
+    escritor = None
+    try:
+        for inicio in range(0, filas, tam_lote):
+            lote = generar_lote(min(tam_lote, filas - inicio), inicio, completitud, rng)
+            if escritor is None:
+                escritor = pacsv.CSVWriter(tmp, lote.schema)
+            escritor.write_table(lote)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    os.replace(tmp, salida)
+    return salida
+
+
+def asegurar(filas: int, semilla: int = SEMILLA) -> str:
+    """Ruta del CSV de `filas` filas; solo se genera si no existe."""
+    ruta = ruta_por_defecto(filas)
+    if not os.path.exists(ruta):
+        generar(filas, ruta, semilla)
+    return ruta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera un inventario sintético con el esquema real.")
+    parser.add_argument("--filas", type=int, default=50_000)
+    parser.add_argument("--salida", default=None, help="ruta del CSV (por defecto bench/datos/)")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    ruta = generar(args.filas, args.salida, args.semilla)
+    print(f"{args.filas} filas → {ruta} ({os.path.getsize(ruta) / 1e6:.1f} MB, "
+          f"{time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Servidores locales que reemplazan a OpenAI y a datos.gov.co en las pruebas de carga.
+
+- OpenAI (usar con OPENAI_BASE_URL=http://127.0.0.1:<puerto>/v1):
+  /v1/chat/completions (con y sin streaming), /v1/audio/transcriptions y
+  /v1/audio/speech. El chat responde instrucciones JSON enlatadas; los
+  marcadores <<palabra>> se reemplazan por el alias que el prompt asigna a
+  la columna que contiene esa palabra, así la respuesta sirve tanto con los
+  nombres del CSV como con los de la API. Con response_format json_object
+  las respuestas en texto se envuelven en {"accion": "texto", ...}.
+- SODA (usar con SODA_DOMINIO=http://127.0.0.1:<puerto>): el recurso
+  uzcf-b9dh con filas sintéticas de bench.generar en un SQLite en memoria.
+  Acepta el subconjunto de SoQL que usan la ingesta y mintic.soql ($select
+  con agregaciones, $where, $group, $order, $limit, $offset), responde en
+  JSON o CSV y emite ETag con 304 como el portal.
+
+Cada endpoint tiene una latencia configurable y el chat emite los tokens a
+un ritmo fijo, para simular el tiempo al primer token y el de generación. La
+síntesis de voz tarda y pesa en proporción al texto que recibe.
+
+Uso:
+    python -m bench.simulados --puerto-openai 8001 --puerto-soda 8002 --latencia-llm 0.8
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+LATENCIA_LLM = 0.5          # segundos hasta el primer token
+TOKENS_POR_SEGUNDO = 80.0
+LATENCIA_STT = 0.4
+LATENCIA_TTS = 0.3
+# La síntesis y el MP3 crecen con el texto: ~15 caracteres por segundo de voz a 128 kbps
+CARACTERES_POR_SEGUNDO_TTS = 400.0
+BYTES_POR_CARACTER = 1_000
+LATENCIA_SODA = 0.2
+FILAS_SODA = 20_000
+BYTES_AUDIO = 24_000        # tamaño mínimo de cada MP3 simulado (≈1,5 s a 128 kbps)
+CARACTERES_POR_TOKEN = 4
+
+# (pregunta, respuesta enlatada). Las preguntas se usan también en la carga.
+ESCENARIOS = [
+    ("¿Cuántos activos hay por sector?",
+     '{"accion": "graficar", "tipo": "bar", "x": "<<sector>>", "y": "", "agregacion": "count"}'),
+    ("Muéstrame los activos del sector Educación",
+     '{"accion": "filtrar", "columna": "<<sector>>", "valor": "Educación"}'),
+    ("Dame una tabla con el título y el sector de los activos",
+     '{"accion": "tabla", "columnas": ["<<titulo>>", "<<sector>>"]}'),
+    ("Filtra el sector Educación, grafica por departamento y muestra título y vistas",
+     '{"accion": "plan", "filtro": {"columna": "<<sector>>", "valor": "Educación"}, "pasos": ['
+     '{"accion": "graficar", "tipo": "bar", "x": "<<departamento>>", "y": "", "agregacion": "count"}, '
+     '{"accion": "tabla", "columnas": ["<<titulo>>", "<<vistas>>"]}]}'),
+    ("Ahora solo los del departamento Antioquia",
+     '{"accion": "filtrar", "sobre": "previo", "columna": "<<departamento>>", "valor": "Antioquia"}'),
+    ("Ordénalos por vistas",
+     '{"accion": "filtrar", "sobre": "previo", "orden": "<<vistas>>", "descendente": true}'),
+    ("¿Qué es un activo de datos abiertos?",
+     "Un activo de datos abiertos es un conjunto de datos que una entidad publica para "
+     "que cualquiera lo consulte. Puede descargarse en formatos abiertos. "
+     "El inventario reúne la información de todos los activos del portal."),
+]
+
+_MARCADOR = re.compile(r"<<(\w+)>>")
+# Líneas de columnas relevantes del prompt: '- alias = Nombre real (...)'
+_LINEA_COLUMNA = re.compile(r"^- (\S+) = (.+)$", re.MULTILINE)
+
+
+def responder(mensajes: list, escenarios: list = ESCENARIOS, turno: int = 0) -> str:
+    """Respuesta enlatada para la conversación, con los alias ya resueltos."""
+    ultimo = str(mensajes[-1].get("content", "")) if mensajes else ""
+    respuesta = next((r for p, r in escenarios if p.lower() in ultimo.lower()), None)
+    if respuesta is None:
+        respuesta = escenarios[turno % len(escenarios)][1]
+    columnas = _LINEA_COLUMNA.findall("\n".join(str(m.get("content", "")) for m in mensajes))
+
+    def alias(coincidencia):
+        palabra = coincidencia.group(1).lower()
+        return next((a for a, nombre in columnas if palabra in nombre.lower()), palabra)
+
+    return _MARCADOR.sub(alias, respuesta)
+
+
+# ======================================================
+# DATOS SODA
+# ======================================================
+
+def nombre_api(nombre: str) -> str:
+    """Nombre de campo como lo expone Socrata ('Información de la Entidad: Sector' → 'informaci_n_de_la_entidad_sector')."""
+    return re.sub(r"_+", "_", re.sub(r"[^a-z0-9]", "_", nombre.lower())).strip("_")
+
+
+def tabla_soda(filas: int) -> pa.Table:
+    """Inventario sintético con nombres de la API y los campos de sistema :id y :updated_at."""
+    from bench import generar
+
+    completitud = generar.leer_completitud()
+    rng = np.random.default_rng(generar.SEMILLA)
+    lotes = [
+        generar.generar_lote(min(generar.TAM_LOTE, filas - inicio), inicio, completitud, rng)
+        for inicio in range(0, filas, generar.TAM_LOTE)
+    ]
+    tabla = pa.concat_tables(lotes)
+    tabla = tabla.rename_columns([nombre_api(c) for c in tabla.column_names])
+    ids = pc.binary_join_element_wise("row-", pc.cast(pa.array(np.arange(filas)), pa.string()), "")
+    marcas = pc.strftime(
+        pa.array(generar.DESDE + np.arange(filas, dtype=np.int64) * 60).cast(pa.timestamp("s")),
+        format="%Y-%m-%dT%H:%M:%S.000",
+    )
+    return tabla.add_column(0, ":id", ids).add_column(1, ":updated_at", marcas)
+
+
+# ======================================================
+# SERVIDORES
+# ======================================================
+
+class _Base(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _enviar(self, cuerpo: bytes, tipo: str, estado: int = 200, etag: str | None = None) -> None:
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _json(self, datos, estado: int = 200, etag: str | None = None) -> None:
+        self._enviar(json.dumps(datos, ensure_ascii=False).encode("utf-8"), "application/json", estado, etag)
+
+    def _cuerpo(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+class ManejadorOpenAI(_Base):
+    config: dict = {}
+    _turnos = itertools.count()
+
+    def do_POST(self):
+        cuerpo = self._cuerpo()
+        c = self.config
+        if self.path.endswith("/chat/completions"):
+            self._chat(json.loads(cuerpo))
+        elif self.path.endswith("/audio/transcriptions"):
+            time.sleep(c["latencia_stt"])
+            turno = next(self._turnos)
+            pregunta = c["escenarios"][turno % len(c["escenarios"])][0]
+            self._json({"text": f"{pregunta} (voz {turno})"})
+        elif self.path.endswith("/audio/speech"):
+            caracteres = len(json.loads(cuerpo).get("input") or "")
+            time.sleep(c["latencia_tts"] + caracteres / CARACTERES_POR_SEGUNDO_TTS)
+            tamano = max(c["bytes_audio"], caracteres * BYTES_POR_CARACTER)
+            self._enviar(b"ID3" + bytes(tamano - 3), "audio/mpeg")
+        else:
+            self._json({"error": {"message": f"Ruta no simulada: {self.path}"}}, 404)
+
+    def _chat(self, peticion: dict) -> None:
+        c = self.config
+        texto = responder(peticion.get("messages", []), c["escenarios"], next(self._turnos))
+        formato = (peticion.get("response_format") or {}).get("type")
+        if formato == "json_object" and not texto.lstrip().startswith("{"):
+            texto = json.dumps({"accion": "texto", "texto": texto}, ensure_ascii=False)
+        time.sleep(c["latencia_llm"])
+        uso = {"prompt_tokens": 1200, "completion_tokens": max(1, len(texto) // CARACTERES_POR_TOKEN),
+               "prompt_tokens_details": {"cached_tokens": 1024}}
+        uso["total_tokens"] = uso["prompt_tokens"] + uso["completion_tokens"]
+        base = {"id": "chatcmpl-simulado", "created": int(time.time()), "model": peticion.get("model", "")}
+
+        if not peticion.get("stream"):
+            self._json({**base, "object": "chat.completion", "usage": uso, "choices": [
+                {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": texto}}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def evento(datos) -> None:
+            linea = f"data: {datos if isinstance(datos, str) else json.dumps(datos, ensure_ascii=False)}\n\n"
+            trozo = linea.encode("utf-8")
+            self.wfile.write(f"{len(trozo):x}\r\n".encode() + trozo + b"\r\n")
+            self.wfile.flush()
+
+        pausa = 1.0 / c["tokens_por_segundo"] if c["tokens_por_segundo"] > 0 else 0.0
+        for i in range(0, len(texto), CARACTERES_POR_TOKEN):
+            evento({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": texto[i:i + CARACTERES_POR_TOKEN]}, "finish_reason": None}]})
+            time.sleep(pausa)
+        evento({**base, "object": "chat.completion.chunk", "choices": [], "usage": uso})
+        evento("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class BaseSoda:
+    """
+    El recurso en SQLite. Los parámetros SoQL se pasan casi tal cual a SQL:
+    los identificadores con comillas invertidas y las funciones upper() y
+    starts_with() se comportan como en Socrata.
+    """
+
+    def __init__(self, tabla: pa.Table):
+        self.columnas = tabla.column_names
+        self.booleanas = {f.name for f in tabla.schema if pa.types.is_boolean(f.type)}
+        tipos = {f.name: "INTEGER" if pa.types.is_integer(f.type) or f.name in self.booleanas else "TEXT"
+                 for f in tabla.schema}
+        self._con = sqlite3.connect(":memory:", check_same_thread=False)
+        self._con.create_function("upper", 1, lambda v: v.upper() if isinstance(v, str) else v)
+        self._con.create_function(
+            "starts_with", 2, lambda v, p: isinstance(v, str) and isinstance(p, str) and v.startswith(p)
+        )
+        definicion = ", ".join(f'"{c}" {tipos[c]}' for c in self.columnas)
+        self._con.execute(f"CREATE TABLE t ({definicion})")
+        marcas = ", ".join("?" * len(self.columnas))
+        self._con.executemany(f"INSERT INTO t VALUES ({marcas})",
+                              (tuple(f.values()) for f in tabla.to_pylist()))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sql(texto: str) -> str:
+        # Los campos de sistema (:id, :updated_at) son columnas con comillas
+        return re.sub(r"(?<![\w'])(:id|:updated_at)\b", r'"\1"', texto)
+
+    def consultar(self, params: dict) -> tuple[list, list]:
+        select = params.get("$select", "*").strip()
+        if select.replace(" ", "") == ":*,*":
+            select = "*"
+        elif select == "*":
+            select = ", ".join(f'"{c}"' for c in self.columnas if not c.startswith(":"))
+        sql = f"SELECT {self._sql(select)} FROM t"
+        if params.get("$where"):
+            sql += f" WHERE {self._sql(params['$where'])}"
+        if params.get("$group"):
+            sql += f" GROUP BY {self._sql(params['$group'])}"
+        if params.get("$order"):
+            sql += f" ORDER BY {self._sql(params['$order'])}"
+        sql += f" LIMIT {int(params.get('$limit', 1000))} OFFSET {int(params.get('$offset', 0))}"
+        with self._lock:
+            cursor = self._con.execute(sql)
+            columnas = [d[0] for d in cursor.description]
+            filas = cursor.fetchall()
+        return columnas, filas
+
+    def modificar(self, sql: str, parametros: tuple = ()) -> tuple[int, str | None]:
+        """Aplica un UPDATE/DELETE sobre la tabla t; devuelve (filas, marca máxima)."""
+        with self._lock:
+            self._con.execute(sql, parametros)
+            return self._con.execute('SELECT count(*), max(":updated_at") FROM t').fetchone()
+
+    def texto(self, columna: str, valor) -> str:
+        if columna in self.booleanas:
+            return "true" if valor else "false"
+        return str(valor)
+
+
+class ManejadorSoda(_Base):
+    config: dict = {}
+    base: BaseSoda | None = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith("/resource/"):
+            self._json({"error": True, "message": "not found"}, 404)
+            return
+        time.sleep(self.config["latencia_soda"])
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        # Como SODA: la ETag cambia con la versión del recurso y permite 304
+        etag = self.config.get("etag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        try:
+            columnas, filas = self.base.consultar(params)
+        except (sqlite3.Error, ValueError) as e:
+            self._json({"error": True, "message": f"query.soql.invalid: {e}"}, 400)
+            return
+
+        if url.path.endswith(".json"):
+            # SODA entrega todo como texto y omite los campos nulos
+            self._json([
+                {c: self.base.texto(c, v) for c, v in zip(columnas, fila) if v is not None}
+                for fila in filas
+            ], etag=etag)
+            return
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, lineterminator="\n")
+        escritor.writerow(columnas)
+        for fila in filas:
+            escritor.writerow(["" if v is None else self.base.texto(c, v) for c, v in zip(columnas, fila)])
+        self._enviar(buffer.getvalue().encode("utf-8"), "text/csv; charset=utf-8", etag=etag)
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Los clientes cierran conexiones keep-alive al terminar: no es un error
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def _servir(manejador, puerto: int) -> ThreadingHTTPServer:
+    servidor = _Servidor(("127.0.0.1", puerto), manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def arrancar(puerto_openai: int = 0, puerto_soda: int = 0, latencia_llm: float = LATENCIA_LLM,
+             tokens_por_segundo: float = TOKENS_POR_SEGUNDO, latencia_stt: float = LATENCIA_STT,
+             latencia_tts: float = LATENCIA_TTS, latencia_soda: float = LATENCIA_SODA,
+             filas_soda: int = FILAS_SODA, escenarios: list | None = None) -> tuple:
+    """Arranca ambos servidores en hilos; devuelve (servidor_openai, servidor_soda)."""
+    ManejadorOpenAI.config = {
+        "latencia_llm": latencia_llm, "tokens_por_segundo": tokens_por_segundo,
+        "latencia_stt": latencia_stt, "latencia_tts": latencia_tts,
+        "bytes_audio": BYTES_AUDIO, "escenarios": escenarios or ESCENARIOS,
+    }
+    tabla = tabla_soda(filas_soda)
+    ManejadorSoda.base = BaseSoda(tabla)
+    marca = pc.max(tabla[":updated_at"]).as_py()
+    ManejadorSoda.config = {"latencia_soda": latencia_soda, "etag": f'"{filas_soda}-{marca}"'}
+    return _servir(ManejadorOpenAI, puerto_openai), _servir(ManejadorSoda, puerto_soda)
+
+
+def modificar_soda(sql: str, parametros: tuple = ()) -> None:
+    """
+    Cambia el recurso SODA ya arrancado (p. ej. actualizar o borrar filas) y,
+    como el portal al publicar una versión nueva, cambia su ETag.
+    """
+    filas, marca = ManejadorSoda.base.modificar(sql, parametros)
+    ManejadorSoda.config["etag"] = f'"{filas}-{marca}"'
+
+
+def leer_escenarios(path: str) -> list:
+    """Archivo JSON con una lista de {"pregunta": ..., "respuesta": ...}."""
+    with open(path, encoding="utf-8") as f:
+        return [(e["pregunta"], e["respuesta"]) for e in json.load(f)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidores simulados de OpenAI y SODA.")
+    parser.add_argument("--puerto-openai", type=int, default=8001)
+    parser.add_argument("--puerto-soda", type=int, default=8002)
+    parser.add_argument("--latencia-llm", type=float, default=LATENCIA_LLM)
+    parser.add_argument("--tokens-por-segundo", type=float, default=TOKENS_POR_SEGUNDO)
+    parser.add_argument("--latencia-stt", type=float, default=LATENCIA_STT)
+    parser.add_argument("--latencia-tts", type=float, default=LATENCIA_TTS)
+    parser.add_argument("--latencia-soda", type=float, default=LATENCIA_SODA)
+    parser.add_argument("--filas-soda", type=int, default=FILAS_SODA)
+    parser.add_argument("--escenarios", default=None, help="JSON con preguntas y respuestas enlatadas")
+    args = parser.parse_args()
+
+    openai, soda = arrancar(
+        args.puerto_openai, args.puerto_soda, args.latencia_llm, args.tokens_por_segundo,
+        args.latencia_stt, args.latencia_tts, args.latencia_soda, args.filas_soda,
+        leer_escenarios(args.escenarios) if args.escenarios else None,
+    )
+    # La primera línea la lee bench.carga para saber que ya están escuchando
+    print(f"listo openai={openai.server_port} soda={soda.server_port}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
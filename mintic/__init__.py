@@ -0,0 +1,3 @@
+"""
+Módulos compartidos por app.py y las páginas del chatbot de Datos Abiertos.
+"""
@@ -0,0 +1,260 @@
+"""
+Preparación en memoria del audio grabado antes de enviarlo a Whisper.
+
+`st.audio_input` entrega un WAV PCM sin comprimir (a menudo 44,1/48 kHz y
+con silencios al principio y al final). Antes de subirlo:
+- se mezcla a mono y se remuestrea a 16 kHz (la frecuencia con la que
+  trabaja Whisper), con un filtro por FFT que evita el aliasing;
+- un VAD por energía recorta los silencios de los extremos y acorta las
+  pausas largas;
+- se codifica en un formato compacto: OGG/Opus si está instalado
+  `soundfile` (opcional), o WAV μ-law de 8 bits, que no necesita nada.
+
+Todo ocurre en memoria y en CPU, sin archivos temporales. Si la entrada no
+es un WAV legible, o el resultado no sale más chico, se envía el original.
+"""
+
+import io
+import logging
+import math
+import os
+import struct
+import time
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:          # opcional: sin él se usa WAV μ-law
+    soundfile = None
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+ACTIVO = os.getenv("MINTIC_AUDIO", "1") != "0"
+FRECUENCIA = 16_000
+MARCO_MS = 30
+# Margen de voz que se conserva alrededor de cada tramo detectado
+MARGEN_MS = 200
+# Las pausas internas más largas se acortan a esta duración
+MAX_PAUSA_MS = 600
+# Decibeles sobre el ruido de fondo (percentil 10) para considerar voz
+SOBRE_RUIDO_DB = 12.0
+PISO_DB = -55.0
+# Velocidad de subida supuesta para estimar el tiempo ahorrado
+KBPS_SUBIDA = float(os.getenv("MINTIC_AUDIO_KBPS", "1000"))
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AudioPreparado:
+    datos: bytes
+    nombre: str                 # nombre de archivo con la extensión del formato
+    formato: str                # "ogg/opus", "ogg/vorbis", "wav/mulaw" u "original"
+    bytes_entrada: int
+    segundos_entrada: float
+    segundos_salida: float
+    ms_proceso: float
+
+    @property
+    def bytes_salida(self) -> int:
+        return len(self.datos)
+
+    @property
+    def segundos_subida_ahorrados(self) -> float:
+        """Estimación a KBPS_SUBIDA, descontando el tiempo de preparación."""
+        ahorro = (self.bytes_entrada - self.bytes_salida) * 8 / (KBPS_SUBIDA * 1000)
+        return ahorro - self.ms_proceso / 1000
+
+    def resumen(self) -> dict:
+        return {
+            "formato": self.formato,
+            "bytes_entrada": self.bytes_entrada,
+            "bytes_salida": self.bytes_salida,
+            "segundos_entrada": round(self.segundos_entrada, 2),
+            "segundos_salida": round(self.segundos_salida, 2),
+            "ms_proceso": round(self.ms_proceso, 2),
+            "segundos_subida_ahorrados": round(self.segundos_subida_ahorrados, 3),
+        }
+
+
+# ======================================================
+# LECTURA Y SEÑAL
+# ======================================================
+
+def leer_wav(datos: bytes) -> tuple[np.ndarray, int]:
+    """Muestras float32 en [-1, 1] con forma (n, canales) y la frecuencia."""
+    with wave.open(io.BytesIO(datos), "rb") as w:
+        canales, ancho, frecuencia = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        crudo = w.readframes(w.getnframes())
+
+    if ancho == 1:
+        muestras = (np.frombuffer(crudo, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif ancho == 2:
+        muestras = np.frombuffer(crudo, dtype="<i2").astype(np.float32) / 32768
+    elif ancho == 3:
+        bytes_ = np.frombuffer(crudo, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        enteros = bytes_[:, 0] | (bytes_[:, 1] << 8) | (bytes_[:, 2] << 16)
+        enteros = np.where(enteros & 0x800000, enteros - (1 << 24), enteros)
+        muestras = enteros.astype(np.float32) / (1 << 23)
+    elif ancho == 4:
+        muestras = np.frombuffer(crudo, dtype="<i4").astype(np.float32) / 2**31
+    else:
+        raise wave.Error(f"ancho de muestra no soportado: {ancho}")
+    return muestras.reshape(-1, canales), frecuencia
+
+
+def a_mono(muestras: np.ndarray) -> np.ndarray:
+    return muestras.mean(axis=1) if muestras.shape[1] > 1 else muestras[:, 0]
+
+
+def remuestrear(x: np.ndarray, origen: int, destino: int = FRECUENCIA) -> np.ndarray:
+    """
+    Remuestreo por FFT: recortar el espectro por encima de la nueva
+    frecuencia de Nyquist es a la vez el filtro antialiasing.
+    """
+    if origen == destino or not len(x):
+        return x.astype(np.float32, copy=False)
+    # Se rellena con ceros hasta q·2^k muestras: ambas longitudes de FFT quedan
+    # "suaves" (una longitud prima puede tardar cien veces más)
+    g = math.gcd(origen, destino)
+    q = origen // g
+    largo = q * (1 << max(0, math.ceil(len(x) / q) - 1).bit_length())
+    m = largo // q * (destino // g)
+    espectro = np.fft.rfft(x, n=largo)
+    nuevo = np.zeros(m // 2 + 1, dtype=espectro.dtype)
+    k = min(len(espectro), len(nuevo))
+    nuevo[:k] = espectro[:k]
+    salida = np.fft.irfft(nuevo, n=m) * (m / largo)
+    return salida[:int(round(len(x) * destino / origen))].astype(np.float32)
+
+
+# ======================================================
+# DETECCIÓN DE VOZ (ENERGÍA)
+# ======================================================
+
+def marcos_con_voz(x: np.ndarray, frecuencia: int = FRECUENCIA) -> np.ndarray:
+    """Máscara por marco de MARCO_MS: True donde la energía supera el umbral."""
+    tam = frecuencia * MARCO_MS // 1000
+    n = len(x) // tam
+    if n == 0:
+        return np.ones(1, dtype=bool)
+    marcos = x[:n * tam].reshape(n, tam)
+    db = 10 * np.log10(np.mean(marcos.astype(np.float64) ** 2, axis=1) + 1e-12)
+    umbral = max(np.percentile(db, 10) + SOBRE_RUIDO_DB, PISO_DB)
+    return db > umbral
+
+
+def recortar_silencios(x: np.ndarray, frecuencia: int = FRECUENCIA) -> np.ndarray:
+    """
+    Quita el silencio de los extremos y acorta las pausas internas a
+    MAX_PAUSA_MS. Si no se detecta voz, devuelve el audio completo.
+    """
+    voz = marcos_con_voz(x, frecuencia)
+    if not voz.any():
+        return x
+    tam = frecuencia * MARCO_MS // 1000
+    margen = MARGEN_MS // MARCO_MS
+    # Se extiende cada tramo de voz `margen` marcos hacia ambos lados
+    conservar = np.convolve(voz.astype(np.int32), np.ones(2 * margen + 1, dtype=np.int32), "same") > 0
+
+    # Pausas internas (silencio entre dos tramos de voz): se conservan hasta
+    # MAX_PAUSA_MS, la mitad pegada a cada lado; los extremos se descartan
+    max_pausa = MAX_PAUSA_MS // MARCO_MS
+    cambios = np.flatnonzero(np.diff(conservar.astype(np.int8)))
+    for inicio in cambios[conservar[cambios]] + 1:        # voz → silencio
+        fin = inicio
+        while fin < len(conservar) and not conservar[fin]:
+            fin += 1
+        if fin == len(conservar):
+            break
+        mitad = max_pausa // 2
+        if fin - inicio <= max_pausa:
+            conservar[inicio:fin] = True
+        else:
+            conservar[inicio:inicio + mitad] = True
+            conservar[fin - (max_pausa - mitad):fin] = True
+
+    # Los marcos sin voz del final incompleto siguen la suerte del último marco
+    muestras = np.repeat(conservar, tam)
+    resto = len(x) - len(muestras)
+    if resto > 0:
+        muestras = np.concatenate([muestras, np.full(resto, conservar[-1])])
+    return x[muestras[:len(x)]]
+
+
+# ======================================================
+# CODIFICACIÓN
+# ======================================================
+
+def mulaw(x: np.ndarray) -> bytes:
+    """Codificación G.711 μ-law (8 bits por muestra)."""
+    lineal = np.clip(np.round(x * 32768), -32768, 32767).astype(np.int32)
+    signo = (lineal < 0).astype(np.int32) << 7
+    magnitud = np.minimum(np.abs(lineal), 32635) + 0x84
+    exponente = np.floor(np.log2(magnitud)).astype(np.int32) - 7
+    mantisa = (magnitud >> (exponente + 3)) & 0x0F
+    return (~(signo | (exponente << 4) | mantisa) & 0xFF).astype(np.uint8).tobytes()
+
+
+def wav_mulaw(x: np.ndarray, frecuencia: int = FRECUENCIA) -> bytes:
+    """WAV mono μ-law (formato 7, con el chunk 'fact' que exige un WAV no PCM)."""
+    cuerpo = mulaw(x)
+    fmt = struct.pack("<HHIIHHH", 7, 1, frecuencia, frecuencia, 1, 8, 0)
+    fact = struct.pack("<I", len(cuerpo))
+    relleno = b"\0" if len(cuerpo) % 2 else b""
+    chunks = (
+        b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"fact" + struct.pack("<I", len(fact)) + fact
+        + b"data" + struct.pack("<I", len(cuerpo)) + cuerpo + relleno
+    )
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def _ogg(x: np.ndarray, frecuencia: int) -> tuple[bytes, str] | None:
+    for subtipo in ("OPUS", "VORBIS"):
+        buffer = io.BytesIO()
+        try:
+            soundfile.write(buffer, x, frecuencia, format="OGG", subtype=subtipo)
+            return buffer.getvalue(), subtipo.lower()
+        except Exception as e:      # libsndfile sin soporte para ese subtipo
+            log.debug("audio: OGG/%s no disponible: %s", subtipo, e)
+    return None
+
+
+def codificar(x: np.ndarray, frecuencia: int = FRECUENCIA) -> tuple[bytes, str, str]:
+    """(datos, nombre de archivo, formato) en el formato más compacto disponible."""
+    if soundfile is not None:
+        ogg = _ogg(x, frecuencia)
+        if ogg is not None:
+            return ogg[0], "pregunta.ogg", f"ogg/{ogg[1]}"
+    return wav_mulaw(x, frecuencia), "pregunta.wav", "wav/mulaw"
+
+
+# ======================================================
+# ETAPA COMPLETA
+# ======================================================
+
+def preparar(datos: bytes, nombre: str = "pregunta.wav") -> AudioPreparado:
+    """Mono 16 kHz, sin silencios y comprimido; el original si no conviene."""
+    inicio = time.perf_counter()
+    try:
+        muestras, frecuencia = leer_wav(datos)
+    except (wave.Error, EOFError, ValueError) as e:
+        log.info("audio: se envía el original (%s)", e)
+        return AudioPreparado(datos, nombre, "original", len(datos), 0.0, 0.0,
+                              (time.perf_counter() - inicio) * 1000)
+
+    segundos = len(muestras) / frecuencia if frecuencia else 0.0
+    # Una grabación de menos de 16 kHz no se sube de frecuencia
+    destino = min(frecuencia, FRECUENCIA)
+    x = recortar_silencios(remuestrear(a_mono(muestras), frecuencia, destino), destino)
+    salida, nombre_salida, formato = codificar(x, destino)
+    ms = (time.perf_counter() - inicio) * 1000
+    if len(salida) >= len(datos):
+        return AudioPreparado(datos, nombre, "original", len(datos), segundos, segundos, ms)
+    return AudioPreparado(salida, nombre_salida, formato, len(datos), segundos, len(x) / destino, ms)
@@ -0,0 +1,258 @@
+"""
+Búsqueda de texto completo (BM25) sobre Titulo, Descripción y Etiqueta.
+
+El índice invertido se construye una vez por versión del dataset, con
+plegado de tildes, palabras vacías y un stemmer ligero para español, y se
+guarda junto a la caché columnar (.cache/busqueda-<huella>.npz) para no
+reconstruirlo al reiniciar. Las consultas acumulan puntajes con numpy y
+devuelven los k activos más relevantes.
+"""
+
+import glob
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from mintic.datos import CACHE_DIR
+from mintic.texto import palabras
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+COLUMNAS_TITULO = ["Titulo", "Título", "titulo", "name"]
+COLUMNAS_DESCRIPCION = ["Descripción", "Descripcion", "descripcion", "descripci_n", "description"]
+COLUMNAS_ETIQUETA = ["Etiqueta", "Etiquetas", "etiqueta", "tags"]
+
+PESO_TITULO = 2          # las palabras del título cuentan doble
+K1 = 1.2
+B = 0.75
+TOP_K = 10
+TOP_K_MAX = 50           # tope para el "k" que pida el LLM
+MAX_VERSIONES = 4        # índices en memoria (uno por versión del dataset)
+
+VACIAS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "o",
+    "para", "por", "que", "se", "sin", "sobre", "su", "sus", "un", "una", "unos",
+    "unas", "y", "e", "u", "datos", "dataset", "conjunto", "conjuntos",
+}
+
+_SUFIJOS = sorted([
+    "amientos", "imientos", "amiento", "imiento", "aciones", "uciones", "adoras",
+    "adores", "ancias", "idades", "acion", "ucion", "adora", "ador", "ancia",
+    "mente", "idad", "ivas", "ivos", "iva", "ivo", "ables", "ibles", "able",
+    "ible", "istas", "ista", "osas", "osos", "osa", "oso", "es", "s", "a", "o", "e",
+], key=len, reverse=True)
+
+_RAICES: dict = {}
+
+
+def raiz(palabra: str) -> str:
+    """Stemmer ligero para español (recorta sufijos flexivos y derivativos)."""
+    r = _RAICES.get(palabra)
+    if r is None:
+        r = palabra
+        for sufijo in _SUFIJOS:
+            if r.endswith(sufijo) and len(r) - len(sufijo) >= 3:
+                r = r[: -len(sufijo)]
+                break
+        _RAICES[palabra] = r
+    return r
+
+
+def terminos(texto) -> list:
+    if texto is None or (isinstance(texto, float) and np.isnan(texto)):
+        return []
+    return [raiz(p) for p in palabras(str(texto)) if p not in VACIAS and len(p) > 1]
+
+
+def _primera(columnas, candidatas):
+    return next((c for c in candidatas if c in columnas), None)
+
+
+# ======================================================
+# ÍNDICE INVERTIDO
+# ======================================================
+
+class IndiceBM25:
+    """Listas de postings en formato CSR: términos → (docs, frecuencias)."""
+
+    def __init__(self, vocabulario: np.ndarray, cortes: np.ndarray, docs: np.ndarray,
+                 frecuencias: np.ndarray, longitudes: np.ndarray):
+        self.vocabulario = vocabulario
+        self._ids = {t: i for i, t in enumerate(vocabulario.tolist())}
+        self.cortes = cortes
+        self.docs = docs
+        self.frecuencias = frecuencias
+        self.longitudes = longitudes
+        self.n_docs = len(longitudes)
+        self.longitud_media = float(longitudes.mean()) if self.n_docs else 0.0
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame) -> "IndiceBM25":
+        columnas = list(df.columns)
+        campos = [
+            (_primera(columnas, COLUMNAS_TITULO), PESO_TITULO),
+            (_primera(columnas, COLUMNAS_DESCRIPCION), 1),
+            (_primera(columnas, COLUMNAS_ETIQUETA), 1),
+        ]
+        campos = [(c, peso) for c, peso in campos if c]
+
+        n = len(df)
+        ids: dict = {}
+        term_ids, doc_ids, pesos = [], [], []
+        for columna, peso in campos:
+            # Mismo tratamiento que `terminos`, pero vectorizado con Arrow
+            texto = pa.array(df[columna].astype("string"), type=pa.string())
+            if isinstance(texto, pa.ChunkedArray):
+                # Columnas respaldadas por Arrow en varios lotes (copia de la API)
+                texto = texto.combine_chunks()
+            texto = pc.utf8_lower(pc.replace_substring_regex(
+                pc.utf8_normalize(texto, "NFKD"), "[\u0300-\u036f]", ""
+            ))
+            listas = pc.split_pattern_regex(texto, "[^a-z0-9]+")
+            codificadas = pc.dictionary_encode(pc.list_flatten(listas))
+
+            # Stemmer y palabras vacías solo sobre las palabras distintas
+            mapa = np.array([
+                -1 if (p in VACIAS or len(p) <= 1) else ids.setdefault(raiz(p), len(ids))
+                for p in codificadas.dictionary.to_pylist()
+            ], dtype=np.int64)
+            terminos_col = mapa[codificadas.indices.to_numpy(zero_copy_only=False)]
+            validos = terminos_col >= 0
+            term_ids.append(terminos_col[validos])
+            doc_ids.append(pc.list_parent_indices(listas).to_numpy()[validos])
+            pesos.append(np.full(int(validos.sum()), peso, dtype=np.float32))
+
+        term_ids = np.concatenate(term_ids) if term_ids else np.empty(0, np.int64)
+        doc_ids = np.concatenate(doc_ids).astype(np.int64) if doc_ids else np.empty(0, np.int64)
+        pesos = np.concatenate(pesos) if pesos else np.empty(0, np.float32)
+
+        # Frecuencia por (término, doc): claves enteras ordenadas por término y doc
+        claves, inversa = np.unique(term_ids * max(n, 1) + doc_ids, return_inverse=True)
+        tf = np.bincount(inversa, weights=pesos, minlength=len(claves)).astype(np.float32)
+        terminos_tf = claves // max(n, 1)
+        cortes = np.concatenate([[0], np.cumsum(np.bincount(terminos_tf, minlength=len(ids)))])
+        longitudes = np.bincount(doc_ids, weights=pesos, minlength=n).astype(np.float32)
+        return cls(
+            np.array(list(ids), dtype=object),
+            cortes.astype(np.int64),
+            (claves % max(n, 1)).astype(np.int32),
+            tf,
+            longitudes,
+        )
+
+    # ---------- persistencia ----------
+    def guardar(self, ruta: str) -> None:
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        tmp = f"{ruta}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            vocabulario=self.vocabulario.astype(str),
+            cortes=self.cortes,
+            docs=self.docs,
+            frecuencias=self.frecuencias,
+            longitudes=self.longitudes,
+        )
+        os.replace(tmp, ruta)
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "IndiceBM25":
+        with np.load(ruta, allow_pickle=False) as z:
+            return cls(z["vocabulario"], z["cortes"], z["docs"], z["frecuencias"], z["longitudes"])
+
+    # ---------- consulta ----------
+    def buscar(self, consulta: str, k: int = TOP_K, filas: np.ndarray | None = None) -> tuple:
+        """
+        Devuelve (ids_de_fila, puntajes) de los k documentos más relevantes,
+        opcionalmente solo entre los ids de `filas`.
+        """
+        puntajes = np.zeros(self.n_docs, dtype=np.float32)
+        for t in set(terminos(consulta)):
+            i = self._ids.get(t)
+            if i is None:
+                continue
+            docs = self.docs[self.cortes[i]:self.cortes[i + 1]]
+            tf = self.frecuencias[self.cortes[i]:self.cortes[i + 1]]
+            idf = np.log1p((self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norma = K1 * (1 - B + B * self.longitudes[docs] / self.longitud_media)
+            puntajes[docs] += idf * tf * (K1 + 1) / (tf + norma)
+        if filas is not None:
+            fuera = np.ones(self.n_docs, dtype=bool)
+            fuera[filas] = False
+            puntajes[fuera] = 0
+
+        candidatos = np.flatnonzero(puntajes)
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(-puntajes[candidatos], k)[:k]]
+        orden = candidatos[np.argsort(-puntajes[candidatos], kind="stable")]
+        return orden, puntajes[orden]
+
+
+# ======================================================
+# CACHÉ POR VERSIÓN
+# ======================================================
+
+_INDICES: dict = {}
+_LOCK = threading.Lock()
+
+
+def obtener_indice(df: pd.DataFrame) -> IndiceBM25:
+    """
+    Índice de la versión actual: memoria → disco → construcción.
+    Sin huella (datos sin versión) el índice no se persiste.
+    """
+    huella = df.attrs.get("huella")
+    clave = huella or id(df)
+    with _LOCK:
+        indice = _INDICES.get(clave)
+        if indice is not None:
+            return indice
+
+        ruta = None
+        if huella:
+            # Una familia por fuente (CSV o API); solo se conserva su última versión
+            familia = "soda" if huella.startswith("soda-") else "csv"
+            nombre = re.sub(r"[^\w.-]", "_", huella)
+            ruta = os.path.join(CACHE_DIR, f"busqueda-{familia}-{nombre}.npz")
+        if ruta and os.path.exists(ruta):
+            indice = IndiceBM25.cargar(ruta)
+        else:
+            indice = IndiceBM25.construir(df)
+            if ruta:
+                indice.guardar(ruta)
+                for viejo in glob.glob(os.path.join(CACHE_DIR, f"busqueda-{familia}-*.npz")):
+                    if viejo != ruta:
+                        try:
+                            os.remove(viejo)
+                        except OSError:
+                            pass  # otro proceso ya lo borró
+
+        # Pocas versiones vivas a la vez (p. ej. CSV y API)
+        if len(_INDICES) >= MAX_VERSIONES:
+            _INDICES.pop(next(iter(_INDICES)))
+        _INDICES[clave] = indice
+        return indice
+
+
+def columnas_resultado(df: pd.DataFrame) -> list:
+    columnas = list(df.columns)
+    return [c for c in (
+        _primera(columnas, COLUMNAS_TITULO),
+        _primera(columnas, COLUMNAS_DESCRIPCION),
+        _primera(columnas, COLUMNAS_ETIQUETA),
+    ) if c]
+
+
+def buscar(df: pd.DataFrame, consulta: str, k: int = TOP_K,
+           filas: np.ndarray | None = None) -> pd.DataFrame:
+    """Top-k activos para la consulta (entre `filas`, si se indica), con la columna 'relevancia'."""
+    filas, puntajes = obtener_indice(df).buscar(consulta, k, filas)
+    resultado = df.iloc[filas][columnas_resultado(df)].copy()
+    resultado["relevancia"] = np.round(puntajes, 3)
+    return resultado
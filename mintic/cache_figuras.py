@@ -0,0 +1,114 @@
+"""
+Caché de figuras ya renderizadas (PNG de matplotlib o JSON de Plotly).
+
+La clave combina la versión del dataset (huella), la métrica y los parámetros
+del gráfico, así que un rerun de Streamlit con los mismos datos reutiliza la
+imagen en vez de volver a dibujarla y rasterizarla. Es compartida por todas
+las sesiones del proceso y expulsa por LRU cuando supera un tope de bytes.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+MAX_BYTES = 64 << 20
+# Mismos parámetros que usa st.pyplot al guardar la figura
+OPCIONES_PNG = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+
+
+class CacheFiguras:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _obtener(self, clave):
+        with self._lock:
+            valor = self._entradas.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def _guardar(self, clave, valor) -> None:
+        tamano = len(valor)
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior)
+            self._entradas[clave] = valor
+            self.bytes += tamano
+            # Expulsa las menos usadas recientemente hasta volver al tope
+            while self.bytes > self.max_bytes:
+                _, viejo = self._entradas.popitem(last=False)
+                self.bytes -= len(viejo)
+
+    def png(self, clave, dibujar) -> bytes:
+        """
+        PNG de la figura matplotlib que devuelve `dibujar()`.
+        Solo se dibuja (y se rasteriza) si la clave no está en caché.
+        """
+        imagen = self._obtener(clave)
+        if imagen is None:
+            import matplotlib.pyplot as plt
+
+            fig = dibujar()
+            buffer = io.BytesIO()
+            fig.savefig(buffer, **OPCIONES_PNG)
+            plt.close(fig)
+            imagen = buffer.getvalue()
+            self._guardar(clave, imagen)
+        return imagen
+
+    def plotly(self, clave, construir):
+        """Figura Plotly reconstruida desde el JSON guardado; `construir()` solo si falta."""
+        crudo = self._obtener(clave)
+        if crudo is None:
+            fig = construir()
+            crudo = fig.to_json()
+            self._guardar(clave, crudo)
+            return fig
+        return pio.from_json(crudo)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self.bytes = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            entradas = len(self._entradas)
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "entradas": entradas,
+            "bytes": self.bytes,
+        }
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_cache_figuras() -> CacheFiguras:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = CacheFiguras()
+        return _INSTANCIA
@@ -0,0 +1,176 @@
+"""
+Caché persistente (SQLite) de respuestas del LLM.
+
+La clave combina la pregunta normalizada, el hash del conjunto de columnas,
+el número de filas, el modelo y, en las preguntas de seguimiento, el
+resumen de los resultados previos que se envió al LLM. Es compartida por todas las sesiones del
+proceso, sobrevive a reinicios y expulsa entradas por TTL y por LRU cuando
+supera el tamaño máximo. Opcionalmente acepta coincidencias aproximadas
+(sin tildes, sin mayúsculas y con espacios colapsados).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from mintic.datos import CACHE_DIR
+from mintic.texto import colapsar_espacios
+from mintic.texto import normalizar as _normalizar_texto
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+RUTA = os.path.join(CACHE_DIR, "respuestas_llm.sqlite")
+TTL = 7 * 24 * 3600          # segundos
+MAX_ENTRADAS = 5000
+
+
+# ======================================================
+# NORMALIZACIÓN DE PREGUNTAS
+# ======================================================
+
+def normalizar(texto: str) -> str:
+    """Colapsa espacios y recorta extremos."""
+    return colapsar_espacios(texto)
+
+
+def normalizar_aprox(texto: str) -> str:
+    """Como `normalizar`, pero además sin tildes, en minúsculas y sin signos finales."""
+    return _normalizar_texto(texto).strip("¿?¡!.,;: ")
+
+
+def hash_columnas(columnas) -> str:
+    return hashlib.sha1("\x1f".join(map(str, columnas)).encode("utf-8")).hexdigest()
+
+
+# ======================================================
+# CACHÉ
+# ======================================================
+
+class CacheRespuestas:
+    def __init__(self, ruta: str = RUTA, ttl: float = TTL, max_entradas: int = MAX_ENTRADAS,
+                 aproximado: bool = True):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.aproximado = aproximado
+        self.aciertos = 0
+        self.aciertos_aprox = 0
+        self.fallos = 0
+
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                contexto TEXT NOT NULL,
+                clave_aprox TEXT NOT NULL,
+                respuesta TEXT NOT NULL,
+                creado REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL,
+                usos INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._con.execute("CREATE INDEX IF NOT EXISTS ix_aprox ON respuestas (contexto, clave_aprox)")
+        self._con.execute("CREATE INDEX IF NOT EXISTS ix_acceso ON respuestas (ultimo_acceso)")
+
+    @staticmethod
+    def _contexto(columnas, filas: int, modelo: str, previos: str = "") -> str:
+        contexto = f"{hash_columnas(columnas)}|{filas}|{modelo}"
+        if previos:
+            contexto += "|" + hashlib.sha1(previos.encode("utf-8")).hexdigest()
+        return contexto
+
+    @staticmethod
+    def _clave(contexto: str, pregunta: str) -> str:
+        return hashlib.sha256(f"{contexto}\n{normalizar(pregunta)}".encode("utf-8")).hexdigest()
+
+    def obtener(self, pregunta: str, columnas, filas: int, modelo: str, previos: str = "") -> str | None:
+        contexto = self._contexto(columnas, filas, modelo, previos)
+        limite = time.time() - self.ttl
+
+        with self._lock:
+            fila = self._con.execute(
+                "SELECT clave, respuesta FROM respuestas WHERE clave = ? AND creado >= ?",
+                (self._clave(contexto, pregunta), limite),
+            ).fetchone()
+            aprox = False
+            if fila is None and self.aproximado:
+                fila = self._con.execute(
+                    "SELECT clave, respuesta FROM respuestas "
+                    "WHERE contexto = ? AND clave_aprox = ? AND creado >= ? "
+                    "ORDER BY ultimo_acceso DESC LIMIT 1",
+                    (contexto, normalizar_aprox(pregunta), limite),
+                ).fetchone()
+                aprox = fila is not None
+
+            if fila is None:
+                self.fallos += 1
+                return None
+
+            self._con.execute(
+                "UPDATE respuestas SET ultimo_acceso = ?, usos = usos + 1 WHERE clave = ?",
+                (time.time(), fila[0]),
+            )
+            self.aciertos += 1
+            if aprox:
+                self.aciertos_aprox += 1
+            return fila[1]
+
+    def guardar(self, pregunta: str, columnas, filas: int, modelo: str, respuesta: str,
+                previos: str = "") -> None:
+        contexto = self._contexto(columnas, filas, modelo, previos)
+        ahora = time.time()
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO respuestas "
+                "(clave, contexto, clave_aprox, respuesta, creado, ultimo_acceso, usos) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (self._clave(contexto, pregunta), contexto, normalizar_aprox(pregunta),
+                 respuesta, ahora, ahora),
+            )
+            self._expulsar(ahora)
+
+    def _expulsar(self, ahora: float) -> None:
+        """Borra expiradas y, si sobra espacio ocupado, las menos usadas recientemente."""
+        self._con.execute("DELETE FROM respuestas WHERE creado < ?", (ahora - self.ttl,))
+        total = self._con.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+        if total > self.max_entradas:
+            self._con.execute(
+                "DELETE FROM respuestas WHERE clave IN "
+                "(SELECT clave FROM respuestas ORDER BY ultimo_acceso ASC LIMIT ?)",
+                (total - self.max_entradas,),
+            )
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._con.execute("DELETE FROM respuestas")
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            entradas = self._con.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "aciertos_aprox": self.aciertos_aprox,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "entradas": entradas,
+        }
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_cache() -> CacheRespuestas:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = CacheRespuestas()
+        return _INSTANCIA
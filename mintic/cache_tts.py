@@ -0,0 +1,157 @@
+"""
+Caché en disco del audio sintetizado (TTS), direccionada por contenido.
+
+La clave es el hash del texto (con espacios colapsados), la voz y el modelo:
+una oración que ya se sintetizó alguna vez, en cualquier sesión o antes de
+un reinicio, se reproduce desde el disco sin volver a llamar a la API. Los
+archivos se escriben de forma atómica y la carpeta se acota por bytes
+expulsando los menos usados recientemente (por fecha de modificación, que
+se actualiza en cada acierto). El tamaño y la cantidad de audios se llevan
+en contadores; la carpeta solo se recorre al crear la caché y cuando se
+supera el tope.
+"""
+
+import hashlib
+import os
+import threading
+
+from mintic.datos import CACHE_DIR
+from mintic.texto import colapsar_espacios
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+ACTIVO = os.getenv("MINTIC_CACHE_TTS", "1") != "0"
+RUTA = os.path.join(CACHE_DIR, "tts")
+MAX_BYTES = 128 << 20
+EXTENSION = ".mp3"
+
+
+def clave(texto: str, voz: str, modelo: str) -> str:
+    contenido = "\x1f".join((modelo, voz, colapsar_espacios(texto)))
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+# ======================================================
+# CACHÉ
+# ======================================================
+
+class CacheTTS:
+    def __init__(self, ruta: str = RUTA, max_bytes: int = MAX_BYTES):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.bytes_servidos = 0
+        self._lock = threading.Lock()
+        os.makedirs(ruta, exist_ok=True)
+        self.entradas, self.bytes = self._recorrer()[1:]
+
+    def _ruta(self, k: str) -> str:
+        return os.path.join(self.ruta, k + EXTENSION)
+
+    def obtener(self, texto: str, voz: str, modelo: str) -> bytes | None:
+        ruta = self._ruta(clave(texto, voz, modelo))
+        try:
+            with open(ruta, "rb") as f:
+                audio = f.read()
+            # Se marca como usada para que la expulsión por antigüedad la respete
+            os.utime(ruta)
+        except OSError:
+            audio = None
+        with self._lock:
+            if not audio:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self.bytes_servidos += len(audio)
+        return audio
+
+    def guardar(self, texto: str, voz: str, modelo: str, audio: bytes) -> None:
+        if not audio or len(audio) > self.max_bytes:
+            return
+        ruta = self._ruta(clave(texto, voz, modelo))
+        tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            anterior = os.path.getsize(ruta) if os.path.exists(ruta) else None
+            with open(tmp, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, ruta)
+        except OSError:
+            # Sin espacio o sin permisos: el audio se usa igual, solo no se guarda
+            return
+        with self._lock:
+            self.bytes += len(audio) - (anterior or 0)
+            self.entradas += anterior is None
+            excedida = self.bytes > self.max_bytes
+        if excedida:
+            self._expulsar()
+
+    def _recorrer(self) -> tuple[list, int, int]:
+        """(mtime, tamaño, nombre) de cada audio, cantidad y bytes totales."""
+        audios = []
+        total = 0
+        for nombre in os.listdir(self.ruta):
+            if not nombre.endswith(EXTENSION):
+                continue
+            try:
+                info = os.stat(os.path.join(self.ruta, nombre))
+            except OSError:
+                continue
+            audios.append((info.st_mtime, info.st_size, nombre))
+            total += info.st_size
+        return audios, len(audios), total
+
+    def _expulsar(self) -> None:
+        """
+        Borra los audios usados hace más tiempo hasta volver al tope de bytes.
+        El recorrido también corrige los contadores si otro proceso comparte
+        la carpeta.
+        """
+        audios, entradas, total = self._recorrer()
+        for _, tamano, nombre in sorted(audios):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.ruta, nombre))
+            except OSError:
+                continue
+            total -= tamano
+            entradas -= 1
+        with self._lock:
+            self.entradas, self.bytes = entradas, total
+
+    def limpiar(self) -> None:
+        for nombre in os.listdir(self.ruta):
+            try:
+                os.remove(os.path.join(self.ruta, nombre))
+            except OSError:
+                pass
+        with self._lock:
+            self.entradas, self.bytes = 0, 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "bytes_servidos": self.bytes_servidos,
+                "entradas": self.entradas,
+                "bytes": self.bytes,
+            }
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_cache_tts() -> CacheTTS:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = CacheTTS()
+        return _INSTANCIA
@@ -0,0 +1,250 @@
+"""
+Dataset compartido de solo lectura para todas las sesiones del proceso.
+
+`st.cache_data` serializa el DataFrame y entrega una copia a cada sesión en
+cada rerun. Aquí, en cambio, cada fuente (CSV o API) tiene una única versión
+vigente: un archivo Arrow con memoria mapeada y un DataFrame construido una
+sola vez a partir de él. Las columnas de texto del DataFrame apuntan
+directamente a los buffers mapeados; las categóricas (códigos), los enteros
+y booleanos nullable y las fechas con zona se materializan una vez por
+versión en la memoria del proceso. Las sesiones y las páginas reciben vistas
+sin copia de ese DataFrame; con copy-on-write de pandas, cualquier
+modificación sobre una vista copia solo lo que toca y nunca llega a la
+versión compartida.
+
+Cuando la versión vence (cambia el CSV o pasa el TTL de la API)
+se sigue sirviendo tal cual y un hilo en segundo plano la revalida
+(stale-while-revalidate): para la API primero pregunta con un GET condicional
+si hubo cambios, y solo si los hubo sincroniza. La versión siguiente se
+publica con un solo cambio de referencia: las sesiones en curso terminan con
+la versión que ya tenían y las siguientes ven la nueva. Solo la primera carga
+sin ninguna copia local espera a la descarga.
+"""
+
+import dataclasses
+import glob
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from mintic import soda, tipos, trazas
+from mintic.datos import CACHE_DIR, CSV_PATH, abrir_arrow, asegurar_cache, escribir_arrow
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+FUENTES = ("csv", "api")
+# Antigüedad máxima de la copia de la API antes de revalidarla en segundo plano
+TTL_API = 3600
+# Espera antes de reintentar una revalidación que falló
+REINTENTO = 60
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Version:
+    fuente: str
+    huella: str
+    tabla: pa.Table          # buffers mapeados desde el archivo Arrow
+    df: pd.DataFrame         # DataFrame compartido (no modificar): el texto comparte los buffers mapeados
+    cargado: float
+    firma: tuple | None = None   # (tamaño, mtime_ns) del CSV de origen
+
+    def vista(self) -> pd.DataFrame:
+        """Copia superficial: comparte los buffers y copia solo al escribir."""
+        return self.df.copy(deep=False)
+
+
+# ======================================================
+# CONSTRUCCIÓN DE VERSIONES
+# ======================================================
+
+def _version(fuente: str, huella: str, ruta: str, firma: tuple | None = None) -> Version:
+    tabla = abrir_arrow(ruta)
+    # Texto sin copia; categóricas, Int64, booleanos y fechas se convierten aquí
+    df = tipos.a_pandas(tabla)
+    df.attrs["huella"] = huella
+    return Version(fuente, huella, tabla, df, time.time(), firma)
+
+
+def firma_csv(path: str = CSV_PATH) -> tuple:
+    """Tamaño y fecha de modificación: un stat, sin leer el archivo."""
+    info = os.stat(path)
+    return info.st_size, info.st_mtime_ns
+
+
+def cargar_csv(path: str = CSV_PATH) -> Version:
+    with trazas.traza("carga", fuente="csv") as t, t.etapa("carga_datos"):
+        # Antes del hash: si el archivo cambia mientras tanto, la próxima
+        # comparación lo detecta y se vuelve a revalidar
+        firma = firma_csv(path)
+        ruta, huella = asegurar_cache(path)
+        version = _version("csv", huella, ruta, firma)
+        t.anotar(filas=version.tabla.num_rows)
+    return version
+
+
+def _ruta_api(huella: str) -> str:
+    nombre = "".join(c if c.isalnum() or c in "-_" else "_" for c in huella)
+    return os.path.join(CACHE_DIR, f"{nombre}-t{tipos.VERSION_PLAN}.arrow")
+
+
+def cargar_api(local: bool = False, sesion: requests.Session | None = None) -> Version | None:
+    """
+    Sincroniza con SODA y escribe la copia tipada como Arrow para mapearla,
+    igual que la caché del CSV. Borra las copias tipadas anteriores.
+    Con `local=True` usa la última copia sincronizada en disco sin ir a la red
+    (None si no existe).
+    """
+    with trazas.traza("carga", fuente="api", local=local) as t:
+        with t.etapa("sincronizar_soda"):
+            tabla = soda.leer_snapshot() if local else soda.sincronizar(sesion)
+        if tabla is None:
+            return None
+        with t.etapa("carga_datos"):
+            huella = soda.huella_snapshot(tabla)
+            ruta = _ruta_api(huella)
+            if not os.path.exists(ruta):
+                # Mismo plan de tipos que la caché del CSV (categorías, Int64, fechas UTC)
+                escribir_arrow(tipos.aplicar(soda.sin_campos_sistema(tabla)), ruta)
+                for viejo in glob.glob(os.path.join(CACHE_DIR, f"soda-*-t{tipos.VERSION_PLAN}.arrow")):
+                    if viejo != ruta:
+                        try:
+                            # En Linux las versiones en uso siguen mapeadas tras borrar el archivo
+                            os.remove(viejo)
+                        except OSError:
+                            pass
+            version = _version("api", huella, ruta)
+        t.anotar(filas=version.tabla.num_rows)
+    return version
+
+
+# ======================================================
+# VERSIÓN VIGENTE POR FUENTE
+# ======================================================
+
+class Dataset:
+    def __init__(self, path: str = CSV_PATH, ttl_api: float = TTL_API):
+        self.path = path
+        self.ttl_api = ttl_api
+        self.publicaciones = 0
+        self.revalidaciones = 0
+        self.errores: dict = {}
+        self._vigentes: dict = {}
+        self._proximo_intento: dict = {}
+        self._cargas = {fuente: threading.Lock() for fuente in FUENTES}
+
+    def _vencida(self, version: Version) -> bool:
+        if version.fuente == "api":
+            return time.time() - version.cargado > self.ttl_api
+        # Solo un stat del CSV en el hilo de la petición: el hash del contenido
+        # y la conversión a Arrow quedan para el hilo de revalidación
+        try:
+            return firma_csv(self.path) != version.firma
+        except OSError:
+            return False
+
+    def actual(self, fuente: str) -> Version:
+        """
+        Versión vigente de `fuente`. Si está vencida se devuelve igual y se
+        revalida en segundo plano; solo se espera cuando aún no hay ninguna.
+        """
+        vigente = self._vigentes.get(fuente)
+        if vigente is None:
+            return self._primera_carga(fuente)
+        if time.time() >= self._proximo_intento.get(fuente, 0) and self._vencida(vigente):
+            self.revalidar(fuente)
+        return vigente
+
+    def _primera_carga(self, fuente: str) -> Version:
+        with self._cargas[fuente]:
+            # Otra sesión pudo publicar mientras se esperaba el lock
+            vigente = self._vigentes.get(fuente)
+            if vigente is not None:
+                return vigente
+            local = None
+            if fuente == "csv":
+                nueva = cargar_csv(self.path)
+            else:
+                # Arranque en caliente: la copia en disco sirve ya y se revalida después
+                local = cargar_api(local=True)
+                nueva = local or cargar_api()
+            self.publicar(nueva)
+        if local is not None:
+            self.revalidar(fuente)
+        return nueva
+
+    def revalidar(self, fuente: str) -> bool:
+        """Lanza la revalidación en un hilo; False si ya hay una en curso."""
+        carga = self._cargas[fuente]
+        if not carga.acquire(blocking=False):
+            return False
+        hilo = threading.Thread(target=self._revalidar, args=(fuente, carga), daemon=True,
+                                name=f"mintic-revalidar-{fuente}")
+        hilo.start()
+        return True
+
+    def _revalidar(self, fuente: str, carga: threading.Lock) -> None:
+        try:
+            vigente = self._vigentes[fuente]
+            if fuente == "csv":
+                nueva = cargar_csv(self.path)
+            else:
+                # La sonda y la sincronización reutilizan las conexiones keep-alive del proceso
+                sesion = soda.obtener_sesion()
+                if soda.hay_cambios(sesion):
+                    nueva = cargar_api(sesion=sesion)
+                else:
+                    # 304 o mismo estado: se renueva el plazo sin tocar los datos
+                    nueva = dataclasses.replace(vigente, cargado=time.time())
+            self.revalidaciones += 1
+            self.errores.pop(fuente, None)
+            self.publicar(nueva)
+        except Exception as e:
+            # Se sigue sirviendo la versión vigente y se reintenta más tarde
+            log.warning("No se pudo revalidar %s: %s", fuente, e)
+            self.errores[fuente] = str(e)
+            self._proximo_intento[fuente] = time.time() + REINTENTO
+        finally:
+            carga.release()
+
+    def publicar(self, version: Version) -> None:
+        """Reemplaza la versión vigente con un único cambio de referencia."""
+        self._vigentes[version.fuente] = version
+        self.publicaciones += 1
+
+    def vista(self, fuente: str) -> pd.DataFrame:
+        return self.actual(fuente).vista()
+
+    def estadisticas(self) -> dict:
+        return {
+            fuente: {
+                "huella": v.huella,
+                "filas": v.tabla.num_rows,
+                "bytes_arrow": v.tabla.nbytes,
+                "edad_s": round(time.time() - v.cargado, 1) if v.cargado else None,
+                "error": self.errores.get(fuente),
+            }
+            for fuente, v in list(self._vigentes.items())
+        }
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_dataset() -> Dataset:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = Dataset()
+        return _INSTANCIA
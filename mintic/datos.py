@@ -0,0 +1,164 @@
+"""
+Carga compartida del inventario de activos.
+
+El CSV se convierte una sola vez a un archivo columnar Arrow (IPC) tipado
+según el plan de mintic.tipos (categorías, enteros, fechas UTC, booleanos),
+identificado por el hash y la fecha de modificación del archivo fuente.
+Las lecturas usan memoria mapeada y proyectan solo las columnas pedidas, de
+modo que cada página materializa únicamente lo que usa.
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from mintic import tipos
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+CSV_PATH = "Asset_Inventory_-_Public_20251119.csv"
+CACHE_DIR = os.getenv("MINTIC_CACHE_DIR", ".cache")
+MANIFIESTO = "manifiesto.json"
+
+
+# ======================================================
+# HUELLA DEL ARCHIVO FUENTE
+# ======================================================
+
+def _sha256(path: str, bloque: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def _leer_manifiesto() -> dict:
+    try:
+        with open(os.path.join(CACHE_DIR, MANIFIESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _escribir_manifiesto(manifiesto: dict) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    destino = os.path.join(CACHE_DIR, MANIFIESTO)
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2)
+    os.replace(tmp, destino)
+
+
+def huella_csv(path: str = CSV_PATH) -> str:
+    """
+    Devuelve la huella del CSV: hash del contenido + mtime.
+    El hash solo se recalcula si cambian el tamaño o la fecha de modificación.
+    """
+    info = os.stat(path)
+    clave = os.path.abspath(path)
+    manifiesto = _leer_manifiesto()
+    entrada = manifiesto.get(clave)
+
+    if not entrada or entrada["tamano"] != info.st_size or entrada["mtime_ns"] != info.st_mtime_ns:
+        entrada = {"tamano": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": _sha256(path)}
+        manifiesto[clave] = entrada
+        _escribir_manifiesto(manifiesto)
+
+    return f"{entrada['sha256'][:16]}-{entrada['mtime_ns']}"
+
+
+# ======================================================
+# CONVERSIÓN CSV → ARROW
+# ======================================================
+
+def _ruta_cache(path: str, huella: str) -> str:
+    base = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{base}-{huella}-t{tipos.VERSION_PLAN}.arrow")
+
+
+def leer_csv(path: str = CSV_PATH) -> pa.Table:
+    """Parsea el CSV con el lector multihilo de Arrow (tipos inferidos)."""
+    return pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(encoding="utf-8"),
+        convert_options=pacsv.ConvertOptions(strings_can_be_null=True),
+    )
+
+
+def escribir_arrow(tabla: pa.Table, destino: str) -> None:
+    """Escribe la tabla como Arrow IPC sin compresión (apto para mmap)."""
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+    os.replace(tmp, destino)
+
+
+def asegurar_cache(path: str = CSV_PATH) -> tuple[str, str]:
+    """
+    Garantiza que exista la versión columnar del CSV.
+    Devuelve (ruta_arrow, huella). Borra cachés viejas del mismo archivo.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    huella = huella_csv(path)
+    destino = _ruta_cache(path, huella)
+
+    if not os.path.exists(destino):
+        escribir_arrow(tipos.aplicar(leer_csv(path)), destino)
+        base = os.path.splitext(os.path.basename(path))[0]
+        for viejo in glob.glob(os.path.join(CACHE_DIR, f"{base}-*.arrow")):
+            if viejo != destino:
+                try:
+                    os.remove(viejo)
+                except OSError:
+                    pass
+
+    return destino, huella
+
+
+# ======================================================
+# LECTURA PROYECTADA
+# ======================================================
+
+def abrir_arrow(ruta: str, columnas=None) -> pa.Table:
+    """
+    Abre un archivo Arrow IPC con memoria mapeada (sin copiar buffers).
+    Si se indican columnas, solo esas se proyectan; las inexistentes se ignoran.
+    """
+    tabla = pa.ipc.open_file(pa.memory_map(ruta, "r")).read_all()
+    if columnas is not None:
+        tabla = tabla.select([c for c in columnas if c in tabla.column_names])
+    return tabla
+
+
+def cargar_tabla(columnas=None, path: str = CSV_PATH) -> pa.Table:
+    ruta, _ = asegurar_cache(path)
+    return abrir_arrow(ruta, columnas)
+
+
+def columnas_inventario(path: str = CSV_PATH) -> list:
+    """Nombres de columna del inventario leyendo solo el esquema."""
+    ruta, _ = asegurar_cache(path)
+    return pa.ipc.open_file(pa.memory_map(ruta, "r")).schema.names
+
+
+def cargar_inventario(columnas=None, path: str = CSV_PATH) -> pd.DataFrame:
+    """
+    Devuelve el inventario como DataFrame, materializando solo `columnas`.
+    La huella de la versión queda en df.attrs["huella"].
+    """
+    ruta, huella = asegurar_cache(path)
+    df = tipos.a_pandas(abrir_arrow(ruta, columnas))
+    df.attrs["huella"] = huella
+    return df
@@ -0,0 +1,348 @@
+"""
+Diagnóstico del inventario por línea de comandos (sin Streamlit ni notebook).
+
+Reproduce el análisis de analisisdata.ipynb como un flujo por bloques: el CSV
+(o las páginas de la API SODA) se lee de a trozos, cada trozo se resume en un
+proceso del pool y el proceso principal solo acumula contadores. La memoria
+máxima depende del tamaño de bloque y del número de trozos en vuelo, no del
+tamaño del inventario.
+
+Uso:
+    python -m mintic.diagnostico                      # CSV local
+    python -m mintic.diagnostico --csv otro.csv --salida ./diag
+    python -m mintic.diagnostico --soda --trabajadores 8
+
+Genera en la carpeta de salida: completitud_por_campo.csv,
+completitud_por_fila.csv, cobertura_tematica.csv, los PNG y
+informe_diagnostico.html.
+"""
+
+import argparse
+import csv
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from mintic.datos import CSV_PATH
+from mintic.fechas import parsear
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+SALIDA = "./diagnostico_output"
+# Bytes de CSV por trozo. El lector de Arrow adelanta varias decenas de
+# bloques, así que un bloque pequeño es lo que mantiene la memoria acotada.
+TAM_BLOQUE = 1 << 20
+TRABAJADORES = max(1, min(4, (os.cpu_count() or 1)))
+
+# Mismos candidatos que el notebook, más los nombres reales del inventario
+COLUMNAS_TEMA = ["theme", "category", "topic", "subject", "categoría"]
+COLUMNAS_ACTUALIZACION = [
+    "last_updated", "modified", "updated_at", "date_updated",
+    "fecha_de_última_actualización_de_datos_(utc)",
+]
+
+
+def normalizar_columna(nombre: str) -> str:
+    """Igual que el notebook: minúsculas y espacios → guion bajo."""
+    return nombre.strip().lower().replace(" ", "_")
+
+
+# ======================================================
+# RESUMEN POR TROZO
+# ======================================================
+
+@dataclass
+class Parcial:
+    filas: int = 0
+    presentes: Counter = field(default_factory=Counter)   # columna → valores no vacíos
+    temas: Counter = field(default_factory=Counter)
+    meses: Counter = field(default_factory=Counter)       # "AAAA-MM" → activos
+    por_cantidad: Counter = field(default_factory=Counter)  # campos presentes → activos
+    por_fila: np.ndarray | None = None                    # campos presentes de cada fila
+
+    def sumar(self, otro: "Parcial") -> None:
+        self.filas += otro.filas
+        self.presentes.update(otro.presentes)
+        self.temas.update(otro.temas)
+        self.meses.update(otro.meses)
+        self.por_cantidad.update(otro.por_cantidad)
+
+
+def _presentes(columna: pa.Array) -> pa.Array:
+    """Máscara de valores no nulos y no vacíos."""
+    if pa.types.is_string(columna.type) or pa.types.is_large_string(columna.type):
+        return pc.and_kleene(pc.is_valid(columna), pc.not_equal(columna, ""))
+    return pc.is_valid(columna)
+
+
+def resumir(lote: pa.RecordBatch, columna_tema: str | None, columna_fecha: str | None) -> Parcial:
+    """Resume un trozo. Se ejecuta en un proceso del pool."""
+    parcial = Parcial(filas=lote.num_rows)
+    por_fila = np.zeros(lote.num_rows, dtype=np.int32)
+    for nombre, columna in zip(lote.schema.names, lote.columns):
+        mascara = _presentes(columna).to_numpy(zero_copy_only=False)
+        parcial.presentes[nombre] = int(mascara.sum())
+        por_fila += mascara
+
+    parcial.por_fila = por_fila.astype(np.int16)
+    conteo = np.bincount(por_fila)
+    parcial.por_cantidad.update({i: int(n) for i, n in enumerate(conteo) if n})
+
+    if columna_tema:
+        temas = pc.fill_null(lote.column(columna_tema), "Sin tema")
+        conteo = pc.value_counts(temas)
+        parcial.temas.update(dict(zip(
+            conteo.field("values").to_pylist(), conteo.field("counts").to_pylist()
+        )))
+
+    if columna_fecha:
+        fechas, _ = parsear(lote.column(columna_fecha), columna_fecha)
+        meses = pc.strftime(pc.drop_null(fechas), format="%Y-%m")
+        conteo = pc.value_counts(meses)
+        parcial.meses.update(dict(zip(
+            conteo.field("values").to_pylist(), conteo.field("counts").to_pylist()
+        )))
+    return parcial
+
+
+# ======================================================
+# FUENTES POR TROZOS
+# ======================================================
+
+def lotes_csv(path: str, tam_bloque: int = TAM_BLOQUE):
+    """Lotes del CSV leídos en streaming; todas las columnas como texto."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        nombres = next(csv.reader(f))
+    lector = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=tam_bloque, encoding="utf-8", use_threads=False),
+        convert_options=pacsv.ConvertOptions(
+            column_types={n: pa.string() for n in nombres},
+            strings_can_be_null=True,
+        ),
+    )
+    for lote in lector:
+        yield lote.rename_columns([normalizar_columna(n) for n in lote.schema.names])
+
+
+def lotes_soda(tam_pagina: int | None = None):
+    """Páginas de la API SODA, una a la vez, sin los campos de sistema."""
+    from mintic import soda
+
+    tam_pagina = tam_pagina or soda.TAM_PAGINA
+    sesion = soda.crear_sesion()
+    total = soda.contar_filas(sesion)
+    for offset in range(0, total, tam_pagina):
+        pagina = soda.sin_campos_sistema(soda.descargar_pagina(sesion, offset, tam_pagina))
+        pagina = pagina.rename_columns([normalizar_columna(n) for n in pagina.column_names])
+        for lote in pagina.to_batches():
+            yield lote
+
+
+# ======================================================
+# EJECUCIÓN
+# ======================================================
+
+def _primera(columnas, candidatas):
+    return next((c for c in candidatas if c in columnas), None)
+
+
+def _columna_fecha(columnas):
+    # En la API los campos pierden tildes y paréntesis: se busca por fragmentos
+    return _primera(columnas, COLUMNAS_ACTUALIZACION) or next(
+        (c for c in columnas if "actualizaci" in c and "datos" in c and "utc" in c), None
+    )
+
+
+def diagnosticar(lotes, salida: str = SALIDA, trabajadores: int = TRABAJADORES) -> tuple:
+    """
+    Procesa los lotes en un pool de procesos con a lo sumo 2×trabajadores
+    trozos en vuelo. La completitud por fila se escribe en orden a medida
+    que llegan los resultados.
+    Devuelve (Parcial total, columnas, columna_tema, columna_fecha).
+    """
+    os.makedirs(salida, exist_ok=True)
+    total = Parcial()
+    columnas = None
+    columna_tema = columna_fecha = None
+    ruta_filas = os.path.join(salida, "completitud_por_fila.csv")
+
+    with ProcessPoolExecutor(trabajadores) as pool, \
+            open(ruta_filas, "w", encoding="utf-8", newline="") as archivo_filas:
+        archivo_filas.write(",__num_present_meta,__pct_present_meta\n")
+        pendientes = []
+        fila_inicial = 0
+
+        def escribir(parcial: Parcial) -> None:
+            nonlocal fila_inicial
+            n = len(parcial.por_fila)
+            bloque = pd.DataFrame(
+                {
+                    "__num_present_meta": parcial.por_fila,
+                    "__pct_present_meta": parcial.por_fila / len(columnas),
+                },
+                index=pd.RangeIndex(fila_inicial, fila_inicial + n),
+            )
+            bloque.to_csv(archivo_filas, header=False)
+            fila_inicial += n
+            parcial.por_fila = None
+            total.sumar(parcial)
+
+        for lote in lotes:
+            if columnas is None:
+                columnas = lote.schema.names
+                columna_tema = _primera(columnas, COLUMNAS_TEMA)
+                columna_fecha = _columna_fecha(columnas)
+            pendientes.append(pool.submit(resumir, lote, columna_tema, columna_fecha))
+            # Memoria acotada: se espera al trozo más antiguo antes de leer más
+            while len(pendientes) >= 2 * trabajadores:
+                escribir(pendientes.pop(0).result())
+        for futuro in pendientes:
+            escribir(futuro.result())
+
+    return total, columnas or [], columna_tema, columna_fecha
+
+
+# ======================================================
+# ARTEFACTOS
+# ======================================================
+
+def escribir_artefactos(total: Parcial, columnas: list, columna_tema, columna_fecha,
+                        salida: str = SALIDA, fuente: str = CSV_PATH) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    filas = total.filas
+    comp_df = pd.Series(
+        {c: total.presentes[c] / filas if filas else np.nan for c in columnas}
+    ).sort_values(ascending=False)
+    comp_df.to_csv(os.path.join(salida, "completitud_por_campo.csv"), header=["completitud"])
+
+    temas_count = None
+    if columna_tema:
+        temas_count = pd.Series(total.temas, name="count").sort_values(ascending=False)
+        temas_count.index.name = columna_tema
+        temas_count.to_csv(os.path.join(salida, "cobertura_tematica.csv"))
+
+    # ---------- Visualizaciones ----------
+    plt.figure(figsize=(10, 6))
+    comp_df.plot(kind="bar")
+    plt.title("Completitud por campo (porcentaje de valores presentes)")
+    plt.ylabel("Fracción presente (0-1)")
+    plt.tight_layout()
+    plt.savefig(os.path.join(salida, "completitud_por_campo.png"))
+    plt.close()
+
+    plt.figure(figsize=(10, 6))
+    comp_df.sort_values().head(20).plot(kind="barh")
+    plt.title("Top 20 campos más incompletos")
+    plt.xlabel("Fracción presente (0-1)")
+    plt.tight_layout()
+    plt.savefig(os.path.join(salida, "top20_incompletos.png"))
+    plt.close()
+
+    plt.figure(figsize=(8, 5))
+    # Histograma ponderado: equivale a graficar la fracción de cada fila
+    valores = np.array(sorted(total.por_cantidad))
+    plt.hist(valores / max(len(columnas), 1), bins=20,
+             weights=[total.por_cantidad[v] for v in valores])
+    plt.grid(True)
+    plt.title("Distribución de completitud por activo (porcentaje de campos presentes)")
+    plt.xlabel("Fracción de campos presentes")
+    plt.ylabel("Número de activos")
+    plt.tight_layout()
+    plt.savefig(os.path.join(salida, "hist_completitud_fila.png"))
+    plt.close()
+
+    if total.meses:
+        s = pd.Series(total.meses).sort_index()
+        s.index = pd.PeriodIndex(s.index, freq="M")
+        plt.figure(figsize=(10, 5))
+        s.plot()
+        plt.title("Número de activos por mes de última actualización")
+        plt.ylabel("Activos")
+        plt.xlabel("Mes (AAAA-MM)")
+        plt.tight_layout()
+        plt.savefig(os.path.join(salida, "actualizaciones_por_mes.png"))
+        plt.close()
+
+    if temas_count is not None:
+        plt.figure(figsize=(8, 6))
+        temas_count.head(10).plot(kind="bar")
+        plt.title("Top 10 temas por número de activos")
+        plt.ylabel("Activos")
+        plt.tight_layout()
+        plt.savefig(os.path.join(salida, "top10_temas.png"))
+        plt.close()
+
+    # ---------- Resumen ejecutivo ----------
+    html_parts = [
+        "<html><head><meta charset='utf-8'><title>Informe diagnóstico</title></head><body>",
+        "<h1>Informe diagnóstico de inventario</h1>",
+        f"<p>Archivo analizado: {fuente}</p>",
+        f"<p>Fecha de generación: {datetime.now().isoformat()}</p>",
+        f"<p>Activos: {filas} — Campos: {len(columnas)}</p>",
+        "<h2>Completitud por campo (top)</h2>",
+        "<img src='completitud_por_campo.png' style='max-width:100%;height:auto;'/>",
+        "<h2>Top 20 campos más incompletos</h2>",
+        "<img src='top20_incompletos.png' style='max-width:100%;height:auto;'/>",
+        "<h2>Distribución de completitud por activo</h2>",
+        "<img src='hist_completitud_fila.png' style='max-width:100%;height:auto;'/>",
+    ]
+    if total.meses:
+        html_parts.append("<h2>Actualizaciones por mes</h2>")
+        html_parts.append("<img src='actualizaciones_por_mes.png' style='max-width:100%;height:auto;'/>")
+    if temas_count is not None:
+        html_parts.append("<h2>Top temas</h2>")
+        html_parts.append("<img src='top10_temas.png' style='max-width:100%;height:auto;'/>")
+    html_parts.append("<h2>Tabla: completitud por campo (extracto)</h2>")
+    html_parts.append(comp_df.round(3).to_frame("completitud").head(20).to_html())
+    html_parts.append("</body></html>")
+    with open(os.path.join(salida, "informe_diagnostico.html"), "w", encoding="utf-8") as f:
+        f.write("\n".join(html_parts))
+
+
+# ======================================================
+# CLI
+# ======================================================
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Diagnóstico de completitud del inventario de activos.")
+    fuente = parser.add_mutually_exclusive_group()
+    fuente.add_argument("--csv", default=CSV_PATH, help="CSV del inventario (por defecto, el local)")
+    fuente.add_argument("--soda", action="store_true", help="Leer las páginas de la API SODA")
+    parser.add_argument("--salida", default=SALIDA, help="Carpeta de artefactos")
+    parser.add_argument("--trabajadores", type=int, default=TRABAJADORES, help="Procesos del pool")
+    parser.add_argument("--bloque-mb", type=int, default=TAM_BLOQUE >> 20, help="Tamaño de trozo del CSV (MB)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.soda:
+        from mintic.soda import url_recurso
+        lotes, nombre_fuente = lotes_soda(), url_recurso()
+    else:
+        lotes, nombre_fuente = lotes_csv(args.csv, args.bloque_mb << 20), args.csv
+
+    total, columnas, columna_tema, columna_fecha = diagnosticar(lotes, args.salida, args.trabajadores)
+    escribir_artefactos(total, columnas, columna_tema, columna_fecha, args.salida, nombre_fuente)
+
+    print(f"Filas procesadas: {total.filas} | columnas: {len(columnas)}")
+    print(f"Columna temática: {columna_tema} | columna de actualización: {columna_fecha}")
+    print(f"Salida generada en: {args.salida} ({time.perf_counter() - inicio:.1f} s)")
+    print("Archivos:", sorted(os.listdir(args.salida)))
+
+
+if __name__ == "__main__":
+    main()
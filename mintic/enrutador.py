@@ -0,0 +1,331 @@
+"""
+Enrutador local de intenciones: responde las preguntas frecuentes sin el LLM.
+
+Antes de llamar al modelo se prueban unos pocos patrones en español
+("cuántos activos por sector", "gráfico de torta por categoría", "muéstrame
+título y dueño", "filtra por departamento Antioquia") y se emparejan, con
+coincidencia aproximada, los nombres de columna y los valores contra el
+dataset real. Si la pregunta encaja con confianza se devuelve directamente la
+instrucción JSON (con nombres reales de columna) que habría producido el LLM;
+si no, None y la pregunta sigue su camino normal.
+
+El vocabulario (palabras de cada columna y valores de las categóricas) se
+compila una vez por versión del dataset.
+"""
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from difflib import SequenceMatcher, get_close_matches
+
+import pandas as pd
+
+from mintic.esquema import obtener_esquema
+from mintic.texto import normalizar, palabras
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+ACTIVO = os.getenv("MINTIC_ENRUTADOR", "1") != "0"
+UMBRAL_COLUMNA = 0.75
+UMBRAL_VALOR = 0.85
+# Columnas con más valores distintos no se usan para reconocer valores de filtro
+MAX_VALORES = 5000
+# Latencia supuesta del LLM hasta tener una medición real (segundos)
+LATENCIA_LLM_INICIAL = 2.0
+
+# Palabras que no identifican columnas ni valores
+_RELLENO = {
+    "de", "del", "la", "el", "los", "las", "y", "o", "en", "por", "a", "al", "un", "una",
+    "con", "que", "hay", "activos", "activo", "datos", "conjuntos", "conjunto", "registros",
+    "cada", "su", "sus", "segun", "utc", "cual", "cuales", "es", "son", "me", "mi", "lo",
+}
+
+_GRAFICO = re.compile(r"\b(grafic\w*|diagrama|torta|pastel|pie|barras?|lineas?|circular|histograma)\b")
+_TORTA = re.compile(r"\b(torta|pastel|pie|circular)\b")
+_LINEA = re.compile(r"\b(lineas?|tendencia|evolucion)\b")
+_CONTEO = re.compile(r"\b(cuant[oa]s|conteo|contar|cuenta|cantidad|numero|distribucion|suma|total)\b")
+_SUMA = re.compile(r"\b(?:suma|total|sumatoria)\s+de\s+(.+?)\s+por\s+(.+)$")
+_POR = re.compile(r"\bpor\s+(.+)$")
+# Verbos de pedido que no nombran la medida: "muéstrame el número de ... por ..."
+_PEDIDO = re.compile(
+    r"(?:muestr|mostr|ensen|dame|ver|haz|hazme|genera|crea|dibuj|quiero|necesito|puedes|podrias"
+    r"|cual|cuales|como|esta|estan|hay)\w*"
+)
+# Fin de la frase que nombra la columna: "por sector en un gráfico de barras"
+_CORTE = re.compile(r"\s+(?:en|con|como|usando|para|y)\s+|,")
+_TABLA = re.compile(
+    r"^(?:muestrame|muestra|mostrar|mostrame|ensename|dame|ver|lista|listar|tabla)\b"
+    r"(?:\s+(?:una|la)\s+tabla)?(?:\s+(?:con|de))?\s+(.+)$"
+)
+_FILTRO = re.compile(
+    r"\b(?:filtr\w*(?:\s+(?:por|donde))?|donde|cuyo|cuya)\s+(.+)$"
+)
+_DEL = re.compile(r"\b(?:del|de la|de los|de las)\s+(.+)$")
+# Preguntas con varias acciones ("filtra ... y grafica ...") van al LLM como plan
+_COMPUESTA = re.compile(
+    r"(?:\by|,|\bluego|\bdespues|\bademas|\btambien)\s+(?:\w+\s+)?"
+    r"(?:muestr|mostr|grafic|filtr|tabla|list|dame|busc|cuent|agrup)\w*"
+)
+_SEPARADOR_COLUMNAS = re.compile(r"\s*(?:,|\by\b)\s*")
+_IGUAL = re.compile(r"^(?:es|sea|igual a|=|:)\s+")
+
+
+@dataclass(frozen=True)
+class _Columna:
+    nombre: str
+    alias: str
+    tipo: str
+    completitud: float
+    palabras: tuple
+    compacto: str          # palabras significativas sin espacios (tolera 'due_o' de la API)
+    valores: dict          # valor normalizado → valor real (solo categóricas)
+
+
+class Vocabulario:
+    """Columnas y valores del dataset listos para emparejar."""
+
+    def __init__(self, df: pd.DataFrame):
+        esquema = obtener_esquema(df)
+        columnas = []
+        for col in esquema.columnas:
+            significativas = tuple(p for p in palabras(col.nombre) if len(p) > 1 and p not in _RELLENO)
+            valores = {}
+            if col.tipo in ("cat", "bool") or (col.tipo == "texto" and col.cardinalidad <= MAX_VALORES):
+                serie = df[col.nombre]
+                distintos = serie.cat.categories if isinstance(serie.dtype, pd.CategoricalDtype) else serie.dropna().unique()
+                if len(distintos) <= MAX_VALORES:
+                    valores = {normalizar(v): v for v in map(str, distintos)}
+            columnas.append(_Columna(
+                col.nombre, col.alias, col.tipo, col.completitud,
+                significativas, "".join(significativas), valores,
+            ))
+        self.columnas = tuple(columnas)
+
+    # --------------------- columnas ---------------------
+
+    @staticmethod
+    def _puntaje(frase: list, col: _Columna) -> float:
+        if not col.palabras:
+            return 0.0
+        unida = "".join(frase)
+        if unida == col.compacto or " ".join(frase) == normalizar(col.alias).replace("_", " "):
+            return 1.0
+        # Cada palabra de la frase debe parecerse a alguna palabra de la columna
+        iguales = sum(
+            1 for p in frase
+            if any(p == c or (len(p) > 3 and SequenceMatcher(None, p, c).ratio() >= 0.8) for c in col.palabras)
+        )
+        if iguales == len(frase):
+            return 0.7 + 0.3 * min(1.0, len(frase) / len(col.palabras))
+        return 0.7 * SequenceMatcher(None, unida, col.compacto).ratio()
+
+    def candidatas(self, frase: str, tipos: tuple | None = None) -> list:
+        """
+        Columnas empatadas con el mejor puntaje para `frase`, de la más a la
+        menos completa (p. ej. los dos 'Departamento' del inventario).
+        """
+        significativas = [p for p in palabras(frase) if p not in _RELLENO]
+        if not significativas or len(significativas) > 4:
+            return []
+        puntuadas = sorted(
+            ((self._puntaje(significativas, c), c.completitud, c)
+             for c in self.columnas if tipos is None or c.tipo in tipos),
+            key=lambda t: (-t[0], -t[1]),
+        )
+        if not puntuadas or puntuadas[0][0] < UMBRAL_COLUMNA:
+            return []
+        return [c for puntaje, _, c in puntuadas if puntaje == puntuadas[0][0]]
+
+    def columna(self, frase: str, tipos: tuple | None = None) -> _Columna | None:
+        """Columna que mejor nombra `frase`; ante un empate, la más completa."""
+        candidatas = self.candidatas(frase, tipos)
+        return candidatas[0] if candidatas else None
+
+    @staticmethod
+    def valor(col: _Columna, frase: str) -> str | None:
+        """Valor real de la columna categórica que coincide con `frase`."""
+        clave = normalizar(frase).strip(" .\"'")
+        if not clave or not col.valores:
+            return None
+        if clave in col.valores:
+            return col.valores[clave]
+        cercano = get_close_matches(clave, list(col.valores), n=1, cutoff=UMBRAL_VALOR)
+        return col.valores[cercano[0]] if cercano else None
+
+
+# ======================================================
+# INTENCIONES
+# ======================================================
+
+def _tipo_grafico(texto: str) -> str:
+    if _TORTA.search(texto):
+        return "pie"
+    if _LINEA.search(texto):
+        return "line"
+    return "bar"
+
+
+def _frase_columna(resto: str) -> str:
+    return _CORTE.split(resto, maxsplit=1)[0]
+
+
+def _medida(texto: str) -> str:
+    """
+    Lo que se mide, según las palabras antes de "por" sin las de conteo,
+    gráfico o pedido: '' en "cuántos activos hay por sector", 'vistas' en
+    "muestra el número de vistas por tipo".
+    """
+    return " ".join(
+        p for p in palabras(texto)
+        if p not in _RELLENO and not (_CONTEO.fullmatch(p) or _GRAFICO.fullmatch(p) or _PEDIDO.fullmatch(p))
+    )
+
+
+def _grafico(voc: Vocabulario, texto: str) -> dict | None:
+    if not (_GRAFICO.search(texto) or _CONTEO.search(texto)):
+        return None
+    suma = _SUMA.search(texto)
+    por = _POR.search(texto)
+    if suma:
+        medida, frase_x = suma.group(1), suma.group(2)
+    elif por:
+        medida, frase_x = _medida(texto[:por.start()]), por.group(1)
+    else:
+        return None
+    x = voc.columna(_frase_columna(frase_x), tipos=("cat", "bool", "texto"))
+    if x is None:
+        return None
+    if not medida:
+        return {"accion": "graficar", "tipo": _tipo_grafico(texto), "x": x.nombre, "y": "",
+                "agregacion": "count"}
+    # "número de vistas por tipo" o "número de filas por sector" suman esa columna;
+    # si la medida no es una columna numérica ("activos de Educación") decide el LLM
+    y = voc.columna(medida, tipos=("num",))
+    if y is None:
+        return None
+    return {"accion": "graficar", "tipo": _tipo_grafico(texto), "x": x.nombre, "y": y.nombre,
+            "agregacion": "sum"}
+
+
+def _condicion(voc: Vocabulario, resto: str) -> dict | None:
+    """'departamento Antioquia' / 'sector es Educación': columna + valor conocido."""
+    partes = resto.split()
+    # Se prueba primero la frase de columna más larga (hasta 3 palabras)
+    for n in range(min(3, len(partes) - 1), 0, -1):
+        buscado = _IGUAL.sub("", " ".join(partes[n:]))
+        # Entre columnas empatadas vale la primera que tenga ese valor
+        for col in voc.candidatas(" ".join(partes[:n])):
+            valor = voc.valor(col, buscado)
+            if valor is not None:
+                return {"accion": "filtrar", "columna": col.nombre, "valor": valor}
+    return None
+
+
+def _filtro(voc: Vocabulario, texto: str) -> dict | None:
+    for patron in (_FILTRO, _DEL):
+        m = patron.search(texto)
+        if m:
+            instr = _condicion(voc, m.group(1))
+            if instr is not None:
+                return instr
+    return None
+
+
+def _tabla(voc: Vocabulario, texto: str) -> dict | None:
+    m = _TABLA.search(texto)
+    if not m:
+        return None
+    # "el título y el sector de los activos" → ["el título", "el sector"]
+    cuerpo = re.sub(r"\s+de\s+(?:los|las)\s+(?:activos|datos|registros)$", "", m.group(1))
+    columnas = []
+    for frase in _SEPARADOR_COLUMNAS.split(cuerpo):
+        if not frase.strip():
+            continue
+        col = voc.columna(frase)
+        if col is None:
+            return None
+        columnas.append(col.nombre)
+    if not columnas:
+        return None
+    return {"accion": "tabla", "columnas": list(dict.fromkeys(columnas))}
+
+
+def clasificar(voc: Vocabulario, pregunta: str) -> dict | None:
+    """Instrucción JSON para la pregunta, o None si no hay una intención clara."""
+    texto = normalizar(pregunta).strip(" ¿?¡!.")
+    if not texto or len(texto.split()) > 14 or _COMPUESTA.search(texto):
+        return None
+    return _grafico(voc, texto) or _filtro(voc, texto) or _tabla(voc, texto)
+
+
+# ======================================================
+# ENRUTADOR CON ESTADÍSTICAS
+# ======================================================
+
+class Enrutador:
+    def __init__(self):
+        self.consultas = 0
+        self.aciertos = 0
+        self.segundos_enrutador = 0.0
+        self.latencia_llm = LATENCIA_LLM_INICIAL
+        self._llamadas_llm = 0
+        self._vocabularios: dict = {}
+        self._lock = threading.Lock()
+
+    def _vocabulario(self, df: pd.DataFrame) -> Vocabulario:
+        clave = (df.attrs.get("huella"), len(df), tuple(df.columns.astype(str)))
+        with self._lock:
+            voc = self._vocabularios.get(clave)
+        if voc is None:
+            voc = Vocabulario(df)
+            with self._lock:
+                if len(self._vocabularios) >= 4:
+                    self._vocabularios.pop(next(iter(self._vocabularios)))
+                self._vocabularios[clave] = voc
+        return voc
+
+    def enrutar(self, df: pd.DataFrame, pregunta: str) -> dict | None:
+        inicio = time.perf_counter()
+        instr = clasificar(self._vocabulario(df), pregunta)
+        segundos = time.perf_counter() - inicio
+        with self._lock:
+            self.consultas += 1
+            self.segundos_enrutador += segundos
+            if instr is not None:
+                self.aciertos += 1
+        return instr
+
+    def registrar_llm(self, segundos: float) -> None:
+        """Latencia observada de una respuesta del LLM (promedio móvil)."""
+        with self._lock:
+            self._llamadas_llm += 1
+            peso = 1 / min(self._llamadas_llm, 20)
+            self.latencia_llm += peso * (segundos - self.latencia_llm)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "consultas": self.consultas,
+                "aciertos": self.aciertos,
+                "tasa_aciertos": self.aciertos / self.consultas if self.consultas else 0.0,
+                "ms_promedio": 1000 * self.segundos_enrutador / self.consultas if self.consultas else 0.0,
+                "latencia_llm_s": self.latencia_llm,
+                "segundos_ahorrados": self.aciertos * self.latencia_llm,
+            }
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_enrutador() -> Enrutador:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = Enrutador()
+        return _INSTANCIA
@@ -0,0 +1,271 @@
+"""
+Compilador de esquema y presupuesto de tokens para el prompt del LLM.
+
+Cada columna recibe un alias corto y estable con una pista de tipo y
+cardinalidad. El prompt se divide en un prefijo fijo (reglas + diccionario
+de alias, idéntico entre preguntas para aprovechar el prompt caching) y un
+sufijo corto con las columnas relevantes para la pregunta. El LLM responde
+con alias que se traducen a nombres reales antes de ejecutar la instrucción.
+"""
+
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+from mintic.texto import palabras as _palabras
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+# Tokens máximos del diccionario en el prefijo; el resto de columnas solo
+# aparece en el sufijo cuando la pregunta las menciona.
+PRESUPUESTO_DICCIONARIO = 700
+MAX_RELEVANTES = 8
+MAX_CARDINALIDAD_CAT = 50
+
+_PREFIJOS = {
+    "informacion de la entidad": "ent",
+    "informacion de datos": "dat",
+    "common core": "cc",
+}
+_VACIAS = {"de", "la", "el", "los", "las", "del", "y", "o", "en", "por", "a", "al", "utc"}
+
+# Claves del JSON de instrucciones que contienen nombres de columna
+CLAVES_COLUMNA = ("x", "y", "columna", "columnas", "orden")
+
+
+def contar_tokens(texto: str) -> int:
+    """Estimación de tokens (≈ 4 caracteres por token en español)."""
+    return max(1, len(texto) // 4)
+
+
+# ======================================================
+# ALIAS Y PISTAS
+# ======================================================
+
+def alias_base(nombre: str) -> str:
+    """
+    Alias legible y determinista: prefijo del grupo + hasta 3 palabras
+    significativas (truncadas a 6 letras si hay más de una).
+    Ej.: 'Información de la Entidad: Sector' → 'ent_sector'.
+    """
+    prefijo = ""
+    resto = nombre
+    if ":" in nombre:
+        grupo, resto = nombre.split(":", 1)
+        prefijo = _PREFIJOS.get(" ".join(_palabras(grupo)), "")
+
+    palabras = [p for p in _palabras(resto) if p not in _VACIAS][:3]
+    if len(palabras) > 1:
+        palabras = [p[:6] for p in palabras]
+    partes = ([prefijo] if prefijo else []) + (palabras or ["col"])
+    return "_".join(partes)
+
+
+def _pista(serie: pd.Series, nombre: str) -> tuple:
+    """Devuelve (tipo, cardinalidad) de la columna."""
+    cardinalidad = int(serie.nunique(dropna=True))
+    if pd.api.types.is_bool_dtype(serie):
+        return "bool", cardinalidad
+    if pd.api.types.is_datetime64_any_dtype(serie) or "fecha" in nombre.lower():
+        return "fecha", cardinalidad
+    if pd.api.types.is_numeric_dtype(serie):
+        return "num", cardinalidad
+    if cardinalidad <= MAX_CARDINALIDAD_CAT or isinstance(serie.dtype, pd.CategoricalDtype):
+        return "cat", cardinalidad
+    return "texto", cardinalidad
+
+
+@dataclass(frozen=True)
+class Columna:
+    nombre: str
+    alias: str
+    tipo: str
+    cardinalidad: int
+    completitud: float
+    ejemplos: tuple
+
+    def linea(self) -> str:
+        return f"{self.alias}: {self.tipo}, {self.cardinalidad} val"
+
+
+@dataclass(frozen=True)
+class Esquema:
+    filas: int
+    columnas: tuple
+    prefijo: str                  # parte estable del prompt
+    por_alias: dict
+    por_nombre: dict
+
+    def a_nombre(self, valor):
+        """Traduce un alias (o nombre real) al nombre real de la columna."""
+        if valor in self.por_alias:
+            return self.por_alias[valor].nombre
+        return valor
+
+    def relevantes(self, pregunta: str, limite: int = MAX_RELEVANTES) -> list:
+        """Columnas cuyo nombre comparte más palabras con la pregunta."""
+        palabras = {p for p in _palabras(pregunta) if len(p) >= 3 and p not in _VACIAS}
+        if not palabras:
+            return []
+        puntuadas = []
+        for col in self.columnas:
+            nombre = set(_palabras(col.nombre))
+            puntos = sum(1 for p in palabras if any(n.startswith(p[:5]) for n in nombre))
+            if puntos:
+                puntuadas.append((puntos, col.completitud, col))
+        puntuadas.sort(key=lambda t: (-t[0], -t[1]))
+        return [col for _, _, col in puntuadas[:limite]]
+
+
+# ======================================================
+# COMPILACIÓN
+# ======================================================
+
+REGLAS = """Eres un asistente experto en análisis de datos.
+Tienes un dataset con {filas} filas y {total} columnas.
+Cada columna se identifica por un alias; usa SOLO alias del diccionario (o los
+nombres completos que se te indiquen más abajo).
+
+Diccionario (alias: tipo, valores distintos):
+{diccionario}
+
+Reglas:
+1) Si el usuario pide un GRÁFICO → responde SOLO JSON:
+{{"accion": "graficar", "tipo": "bar"|"line"|"pie", "x": "alias", "y": "alias_o_vacio", "agregacion": "count"|"sum"|"none"}}
+   - Para "count" puedes dejar "y" vacío, el backend contará registros.
+2) Si el usuario pide una TABLA → responde SOLO JSON:
+{{"accion": "tabla", "columnas": ["alias1", "alias2"]}}
+3) Si el usuario pide FILTROS → responde SOLO JSON:
+{{"accion": "filtrar", "columna": "alias", "valor": "valor_a_filtrar"}}
+   - Mayúsculas y tildes no importan. "operador" opcional: "=", "prefijo",
+     ">", ">=", "<", "<=" o "entre" (con "hasta"); los rangos aplican a números y fechas.
+     En fechas, "prefijo" toma "AAAA", "AAAA-MM" o "AAAA-MM-DD" (año, mes o día).
+   - Varias condiciones: {{"accion": "filtrar", "logica": "and"|"or",
+     "condiciones": [{{"columna": "alias", "operador": "=", "valor": "..."}}, ...]}}
+4) Si el usuario busca activos por tema o palabras clave → responde SOLO JSON:
+{{"accion": "buscar", "consulta": "palabras clave", "k": 10}}
+5) Si la pregunta combina varias acciones (p. ej. filtrar, graficar y mostrar
+   columnas) → responde UN plan JSON con un filtro común y los pasos en orden:
+{{"accion": "plan", "filtro": {{"columna": "alias", "valor": "..."}},
+  "pasos": [{{"accion": "graficar", ...}}, {{"accion": "tabla", "columnas": [...]}}]}}
+   - "filtro" es opcional y usa el mismo formato que "filtrar" (también
+     "condiciones"); se aplica a todos los pasos. Pasos: tabla, graficar,
+     buscar o filtrar.
+6) Si es una pregunta normal (explicación, descripción, etc.) → responde JSON
+   con el texto en lenguaje natural:
+{{"accion": "texto", "texto": "respuesta"}}
+7) Si se listan resultados previos y la pregunta los refina ("ahora solo...",
+   "ordénalo por...", "de esos..."), agrega "sobre": "previo" (o el id, p. ej.
+   "r2") a la instrucción: se ejecuta solo sobre esas filas. En "tabla" y
+   "filtrar" puedes ordenar con "orden": "alias" y "descendente": true|false;
+   "filtrar" sin condiciones devuelve las filas del resultado previo.
+Responde siempre con un único objeto JSON."""
+
+
+def compilar(df: pd.DataFrame, presupuesto: int = PRESUPUESTO_DICCIONARIO) -> Esquema:
+    filas = len(df)
+    columnas = []
+    usados = set()
+    for nombre in df.columns.astype(str):
+        base = alias_base(nombre)
+        alias, n = base, 2
+        while alias in usados:
+            alias, n = f"{base}{n}", n + 1
+        usados.add(alias)
+
+        serie = df[nombre]
+        tipo, cardinalidad = _pista(serie, nombre)
+        ejemplos = ()
+        if tipo == "cat":
+            ejemplos = tuple(map(str, serie.value_counts().head(3).index))
+        completitud = float(serie.notna().mean()) if filas else 0.0
+        columnas.append(Columna(nombre, alias, tipo, cardinalidad, completitud, ejemplos))
+
+    # El diccionario del prefijo prioriza las columnas más completas
+    lineas, usados_tokens = [], 0
+    for col in sorted(columnas, key=lambda c: -c.completitud):
+        coste = contar_tokens(col.linea()) + 1
+        if usados_tokens + coste > presupuesto:
+            break
+        lineas.append(col.linea())
+        usados_tokens += coste
+
+    prefijo = REGLAS.format(filas=filas, total=len(columnas), diccionario="\n".join(lineas))
+    return Esquema(
+        filas=filas,
+        columnas=tuple(columnas),
+        prefijo=prefijo,
+        por_alias={c.alias: c for c in columnas},
+        por_nombre={c.nombre: c for c in columnas},
+    )
+
+
+_CACHE: dict = {}
+_LOCK = threading.Lock()
+
+
+def obtener_esquema(df: pd.DataFrame) -> Esquema:
+    """Esquema compilado por versión del dataset (huella + columnas)."""
+    clave = (df.attrs.get("huella"), len(df), tuple(df.columns.astype(str)))
+    with _LOCK:
+        esquema = _CACHE.get(clave)
+    if esquema is None:
+        esquema = compilar(df)
+        with _LOCK:
+            # Pocas versiones vivas a la vez (p. ej. CSV y API)
+            if len(_CACHE) >= 4:
+                _CACHE.pop(next(iter(_CACHE)))
+            _CACHE[clave] = esquema
+    return esquema
+
+
+# ======================================================
+# PROMPT
+# ======================================================
+
+def construir_mensajes(esquema: Esquema, pregunta: str, previos: str = "") -> list:
+    """
+    Mensajes del chat: el system es el prefijo estable; el user lleva solo las
+    columnas relevantes (nombre completo y ejemplos), los resultados previos
+    de la sesión si la pregunta los refina, y la pregunta.
+    """
+    detalle = []
+    for col in esquema.relevantes(pregunta):
+        linea = f"- {col.alias} = {col.nombre} ({col.tipo})"
+        if col.ejemplos:
+            linea += f"; ej.: {', '.join(col.ejemplos)}"
+        detalle.append(linea)
+
+    sufijo = ""
+    if detalle:
+        sufijo = "Columnas relacionadas con la pregunta:\n" + "\n".join(detalle) + "\n\n"
+    if previos:
+        sufijo += "Resultados previos de la sesión:\n" + previos + "\n\n"
+    sufijo += f"Pregunta del usuario:\n{pregunta}"
+
+    return [
+        {"role": "system", "content": esquema.prefijo},
+        {"role": "user", "content": sufijo},
+    ]
+
+
+def resolver_alias(esquema: Esquema, obj):
+    """Devuelve una copia de la instrucción con los alias traducidos a nombres reales."""
+    if not isinstance(obj, dict):
+        return obj
+    resuelto = dict(obj)
+    for clave in ("condiciones", "pasos"):
+        if isinstance(resuelto.get(clave), list):
+            resuelto[clave] = [resolver_alias(esquema, c) for c in resuelto[clave]]
+    if isinstance(resuelto.get("filtro"), dict):
+        resuelto["filtro"] = resolver_alias(esquema, resuelto["filtro"])
+    for clave in CLAVES_COLUMNA:
+        valor = resuelto.get(clave)
+        if isinstance(valor, list):
+            resuelto[clave] = [esquema.a_nombre(v) for v in valor]
+        elif isinstance(valor, str):
+            resuelto[clave] = esquema.a_nombre(valor)
+    return resuelto
@@ -0,0 +1,276 @@
+"""
+Normalización vectorizada de fechas.
+
+En vez de probar varios `strptime` fila por fila, se detectan en una muestra
+los formatos dominantes de cada columna y luego se parsea la columna completa
+con Arrow, un formato a la vez, quedándose con el primer resultado válido.
+Cubre la exportación del portal ("06/02/2024 05:13:36 PM"), los timestamps de
+la API SODA y las columnas de emisión mezcladas (AAAA_MM_DD vs DD/MM/AAAA).
+
+Cada conversión deja un reporte (cuántos valores cayeron en cada formato y
+cuántos no se pudieron leer) que viaja en los metadatos de la tabla Arrow, así
+que queda guardado con la versión del dataset junto a la caché columnar.
+"""
+
+import json
+import threading
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+FORMATOS = [
+    "%m/%d/%Y %I:%M:%S %p",     # exportación CSV del portal
+    "%Y-%m-%dT%H:%M:%S",        # API SODA (floating timestamp)
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%Y_%m_%d",                 # emisión (AAAA_MM_DD)
+    "%d/%m/%Y",                 # emisión (DD/MM/AAAA)
+    "%Y/%m/%d",
+    "%d-%m-%Y",
+    "%m/%d/%Y",
+]
+
+# Pistas en el nombre de la columna: esos formatos se prueban primero, lo que
+# resuelve fechas ambiguas como 05/06/2020.
+PISTAS = {
+    "aaaa_mm_dd": ["%Y_%m_%d", "%Y-%m-%d"],
+    "dd/mm/aaaa": ["%d/%m/%Y", "%d-%m-%Y"],
+}
+
+MUESTRA = 20000
+# Un formato entra al plan si cubre al menos esta fracción de la muestra
+MIN_PROPORCION = 0.001
+# Si la muestra tiene pocos valores distintos se parsea el diccionario, no la columna
+MAX_PROPORCION_UNICOS = 0.5
+CLAVE_METADATOS = b"mintic.fechas"
+
+_FRACCION = r"\.\d+$"
+
+
+@dataclass(frozen=True)
+class Reporte:
+    columna: str
+    total: int
+    nulos: int
+    por_formato: dict            # formato → valores parseados con él
+    no_parseables: int
+    ejemplos_no_parseables: tuple
+
+    @property
+    def parseadas(self) -> int:
+        return sum(self.por_formato.values())
+
+
+# ======================================================
+# DETECCIÓN
+# ======================================================
+
+def _texto(columna) -> pa.Array:
+    if isinstance(columna, pa.ChunkedArray):
+        columna = columna.combine_chunks()
+    texto = pc.utf8_trim_whitespace(columna.cast(pa.string()))
+    return pc.if_else(pc.equal(texto, ""), None, texto)
+
+
+def _muestra(arr: pa.Array, n: int = MUESTRA) -> pa.Array:
+    """Muestra repartida a lo largo de la columna (no solo las primeras filas)."""
+    validos = pc.drop_null(arr)
+    if len(validos) <= n:
+        return validos
+    return validos.take(np.linspace(0, len(validos) - 1, n).astype(np.int64))
+
+
+def _tiene_fraccion(muestra: pa.Array) -> bool:
+    return bool(pc.any(pc.match_substring_regex(muestra, _FRACCION)).as_py())
+
+
+def _sin_fraccion(arr: pa.Array) -> pa.Array:
+    # SODA agrega milisegundos ('...T10:00:00.000') que strptime no acepta;
+    # cortar en el primer punto es mucho más barato que un reemplazo por regex
+    return pc.list_element(pc.split_pattern(arr, ".", max_splits=1), 0)
+
+
+def _parsear(arr: pa.Array, formato: str) -> pa.Array:
+    return pc.strptime(arr, format=formato, unit="s", error_is_null=True)
+
+
+def candidatos(nombre: str = "") -> list:
+    nombre = nombre.lower()
+    preferidos = [f for pista, formatos in PISTAS.items() if pista in nombre for f in formatos]
+    return preferidos + [f for f in FORMATOS if f not in preferidos]
+
+
+def detectar_formatos(columna, nombre: str = "") -> list:
+    """
+    Formatos dominantes de la columna, en orden de aplicación.
+    Selección voraz sobre la muestra: el formato que más valores pendientes
+    parsea entra primero; se repite con lo que quede sin parsear.
+    """
+    return _detectar(_muestra(_texto(columna)), nombre)
+
+
+def _detectar(muestra: pa.Array, nombre: str) -> list:
+    if _tiene_fraccion(muestra):
+        muestra = _sin_fraccion(muestra)
+    total = len(muestra)
+    elegidos = []
+    restantes = candidatos(nombre)
+    while len(muestra) and restantes:
+        parseos = {f: _parsear(muestra, f) for f in restantes}
+        # max() conserva el primero en caso de empate, respetando las pistas
+        mejor = max(restantes, key=lambda f: len(muestra) - parseos[f].null_count)
+        aciertos = len(muestra) - parseos[mejor].null_count
+        if not aciertos or aciertos < MIN_PROPORCION * total:
+            break
+        elegidos.append(mejor)
+        restantes.remove(mejor)
+        muestra = muestra.filter(pc.is_null(parseos[mejor]))
+    return elegidos
+
+
+# ======================================================
+# PARSEO
+# ======================================================
+
+def _aplicar_formatos(valores: pa.Array, formatos: list) -> tuple:
+    """(timestamps, índice del formato que parseó cada valor; -1 si ninguno)."""
+    resultado = None
+    usado = np.full(len(valores), -1, dtype=np.int8)
+    for i, formato in enumerate(formatos):
+        parseado = _parsear(valores, formato)
+        if resultado is None:
+            nuevos = pc.is_valid(parseado)
+            resultado = parseado
+        else:
+            nuevos = pc.and_(pc.is_null(resultado), pc.is_valid(parseado))
+            resultado = pc.coalesce(resultado, parseado)
+        usado[nuevos.to_numpy(zero_copy_only=False)] = i
+    if resultado is None:
+        resultado = pa.nulls(len(valores), pa.timestamp("s"))
+    return resultado, usado
+
+
+def parsear(columna, nombre: str = "", formatos: list | None = None) -> tuple:
+    """
+    Parsea la columna completa formato por formato.
+    Devuelve (timestamps UTC en ns como arreglo Arrow, Reporte).
+    """
+    arr = _texto(columna)
+    muestra = _muestra(arr)
+    if formatos is None:
+        formatos = _detectar(muestra, nombre)
+    # Las decisiones se toman sobre la muestra para no recorrer la columna de más
+    if _tiene_fraccion(muestra):
+        arr = _sin_fraccion(arr)
+
+    validos = pc.is_valid(arr).to_numpy(zero_copy_only=False)
+    if len(muestra) and len(pc.unique(muestra)) <= MAX_PROPORCION_UNICOS * len(muestra):
+        # Muchos valores repetidos (fechas sin hora): se parsea cada valor distinto una vez
+        codificado = pc.dictionary_encode(arr)
+        distintos, usado_distintos = _aplicar_formatos(codificado.dictionary, formatos)
+        resultado = distintos.take(codificado.indices)
+        indices = pc.fill_null(codificado.indices, 0).to_numpy(zero_copy_only=False)
+        usado = np.where(validos, usado_distintos[indices], -1)
+    else:
+        resultado, usado = _aplicar_formatos(arr, formatos)
+
+    conteos = np.bincount(usado[usado >= 0], minlength=len(formatos))
+    fallidos = validos & (usado < 0)
+    ejemplos = pc.unique(arr.filter(pa.array(fallidos))).slice(0, 5).to_pylist()
+    reporte = Reporte(
+        columna=nombre,
+        total=len(arr),
+        nulos=arr.null_count,
+        por_formato={f: int(n) for f, n in zip(formatos, conteos)},
+        no_parseables=int(fallidos.sum()),
+        ejemplos_no_parseables=tuple(ejemplos),
+    )
+    # Cast directo: Arrow interpreta los valores sin zona como UTC (más barato que assume_timezone)
+    fechas = resultado.cast(pa.timestamp("ns", tz="UTC"))
+    return fechas, reporte
+
+
+# ======================================================
+# REPORTES EN METADATOS
+# ======================================================
+
+def con_reportes(tabla: pa.Table, reportes: list) -> pa.Table:
+    """Adjunta los reportes a los metadatos del esquema de la tabla."""
+    if not reportes:
+        return tabla
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[CLAVE_METADATOS] = json.dumps([asdict(r) for r in reportes]).encode("utf-8")
+    return tabla.replace_schema_metadata(metadatos)
+
+
+def leer_reportes(tabla_o_esquema) -> list:
+    esquema = getattr(tabla_o_esquema, "schema", tabla_o_esquema)
+    crudo = (esquema.metadata or {}).get(CLAVE_METADATOS)
+    if not crudo:
+        return []
+    return [
+        Reporte(**{**r, "ejemplos_no_parseables": tuple(r["ejemplos_no_parseables"])})
+        for r in json.loads(crudo)
+    ]
+
+
+def tabla_reportes(reportes: list) -> pd.DataFrame:
+    """Una fila por columna y formato, más las de no parseables y vacíos."""
+    filas = []
+    for r in reportes:
+        for formato, n in r.por_formato.items():
+            filas.append({"columna": r.columna, "formato": formato, "valores": n})
+        filas.append({"columna": r.columna, "formato": "(no parseable)", "valores": r.no_parseables})
+        filas.append({"columna": r.columna, "formato": "(vacío)", "valores": r.nulos})
+    return pd.DataFrame(filas, columns=["columna", "formato", "valores"])
+
+
+# ======================================================
+# TIMESTAMPS ENTEROS POR VERSIÓN
+# ======================================================
+
+_CACHE: dict = {}
+_LOCK = threading.Lock()
+NAT = np.iinfo(np.int64).min
+
+
+def enteros(df: pd.DataFrame, columna: str) -> np.ndarray:
+    """
+    Timestamps UTC de la columna como int64 (ns; NaT = mínimo de int64),
+    calculados una vez por versión del dataset (df.attrs["huella"]).
+    """
+    version = df.attrs.get("huella") or id(df)
+    clave = (version, columna)
+    with _LOCK:
+        valores = _CACHE.get(clave)
+    if valores is not None:
+        return valores
+
+    serie = df[columna]
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        fechas, _ = parsear(pa.array(serie.astype("string"), type=pa.string()), columna)
+        serie = fechas.to_pandas()
+    elif getattr(serie.dt, "tz", None) is not None:
+        serie = serie.dt.tz_convert("UTC").dt.tz_localize(None)
+    valores = serie.to_numpy(dtype="datetime64[ns]", na_value=np.datetime64("NaT")).view("int64")
+
+    with _LOCK:
+        for vieja in [k for k in _CACHE if k[0] != version]:
+            del _CACHE[vieja]
+        _CACHE[clave] = valores
+    return valores
+
+
+if __name__ == "__main__":
+    from mintic.datos import CSV_PATH, asegurar_cache
+
+    ruta, _ = asegurar_cache(CSV_PATH)
+    esquema = pa.ipc.open_file(pa.memory_map(ruta, "r")).schema
+    print(tabla_reportes(leer_reportes(esquema)).to_string(index=False))
@@ -0,0 +1,184 @@
+"""
+Capa de reducción de gráficos entre la agregación y Plotly.
+
+Antes de construir la figura:
+- barras y tortas: solo las N categorías más grandes; el resto se suma en "Otros".
+- líneas: si hay demasiados puntos se reducen con LTTB (Largest-Triangle-
+  Three-Buckets), que conserva la forma visual de la serie.
+- sobre cierto número de puntos las líneas usan trazas WebGL (scattergl).
+- el JSON de la figura tiene un tope de bytes; si se supera, se reduce más.
+  El tamaño se estima a partir de los puntos (sin serializar la figura):
+  la única serialización es la de la caché de figuras.
+
+Cada figura queda como etapa "grafico" de la traza en curso (mintic.trazas)
+con los puntos de entrada y salida, los bytes estimados del payload y el
+tiempo de construcción; el envío al navegador se mide en la etapa "render".
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from mintic import trazas
+
+log = logging.getLogger(__name__)
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+TOP_N = 20
+ETIQUETA_OTROS = "Otros"
+MAX_PUNTOS_LINEA = 2000
+UMBRAL_WEBGL = 1000
+MAX_BYTES = 1_000_000
+MAX_REDUCCIONES = 4
+# Estimación (por exceso) del JSON: plantilla y trazas vacías, y bytes por
+# valor según el tipo (Plotly manda los números en base64 y las fechas en ISO)
+BYTES_BASE = 8_000
+BYTES_NUMERO = 11
+BYTES_FECHA = 24
+
+
+# ======================================================
+# REDUCCIONES
+# ======================================================
+
+def agrupar_cola(datos: pd.DataFrame, x: str, y: str, n: int = TOP_N) -> pd.DataFrame:
+    """
+    Suma y por categoría y conserva las n mayores; el resto va a "Otros".
+    Sumar las repetidas equivale a lo que Plotly dibuja al apilar barras.
+    """
+    if x == y:
+        conteo = datos[x].value_counts()
+        suma = pd.DataFrame({x: conteo.index, "valor": conteo.to_numpy()})
+        y = "valor"
+    else:
+        suma = datos.groupby(x, observed=True, sort=False)[y].sum().reset_index()
+    if len(suma) <= n:
+        return suma
+    suma = suma.sort_values(y, ascending=False, kind="stable")
+    cabeza, cola = suma.iloc[:n], suma.iloc[n:]
+    otros = pd.DataFrame({x: [ETIQUETA_OTROS], y: [cola[y].sum()]})
+    cabeza = cabeza.astype({x: object})
+    return pd.concat([cabeza, otros], ignore_index=True)
+
+
+def _numerico(serie: pd.Series) -> np.ndarray | None:
+    """Eje x como float para LTTB; None si no es numérico ni fecha."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        valores = serie.to_numpy(dtype="datetime64[ns]", na_value=np.datetime64("NaT")).view("int64")
+        return valores.astype("float64")
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.to_numpy(dtype="float64", na_value=np.nan)
+    return None
+
+
+def lttb(x: np.ndarray, y: np.ndarray, umbral: int) -> np.ndarray:
+    """
+    Índices de los puntos que conserva Largest-Triangle-Three-Buckets.
+    `x` debe estar ordenado. Siempre incluye el primero y el último.
+    """
+    n = len(x)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+
+    indices = np.empty(umbral, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    # Límites de los umbral-2 baldes interiores
+    bordes = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+    anterior = 0
+    for i in range(umbral - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # Promedio del balde siguiente (o el último punto)
+        sig_inicio, sig_fin = fin, bordes[i + 2] if i + 2 < len(bordes) else n
+        mx = x[sig_inicio:sig_fin].mean()
+        my = y[sig_inicio:sig_fin].mean()
+        ax, ay = x[anterior], y[anterior]
+        bx, by = x[inicio:fin], y[inicio:fin]
+        areas = np.abs((ax - mx) * (by - ay) - (ax - bx) * (my - ay))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def reducir_linea(datos: pd.DataFrame, x: str, y: str, max_puntos: int = MAX_PUNTOS_LINEA) -> pd.DataFrame:
+    if len(datos) <= max_puntos or x == y:
+        return datos
+    valores_y = pd.to_numeric(datos[y], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    valores_x = _numerico(datos[x])
+    validos = ~np.isnan(valores_y)
+    if valores_x is not None:
+        validos &= ~np.isnan(valores_x)
+    datos = datos[validos]
+    valores_y = valores_y[validos]
+    if valores_x is None:
+        # Eje categórico: se respeta el orden recibido
+        valores_x = np.arange(len(datos), dtype="float64")
+    else:
+        valores_x = valores_x[validos]
+        orden = np.argsort(valores_x, kind="stable")
+        datos, valores_x, valores_y = datos.iloc[orden], valores_x[orden], valores_y[orden]
+    return datos.iloc[lttb(valores_x, valores_y, max_puntos)]
+
+
+# ======================================================
+# FIGURAS
+# ======================================================
+
+def estimar_bytes(datos: pd.DataFrame, columnas) -> int:
+    """Tamaño aproximado del JSON de una figura con estas columnas de `datos`."""
+    total = BYTES_BASE
+    for columna in dict.fromkeys(columnas):
+        serie = datos[columna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            total += BYTES_FECHA * len(serie)
+        elif pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            total += BYTES_NUMERO * len(serie)
+        else:
+            # Texto entre comillas y separado por comas
+            total += int(serie.astype(str).str.len().sum()) + 3 * len(serie)
+    return total
+
+
+def _construir(tipo: str, datos: pd.DataFrame, x: str, y: str, etiquetas: bool, **opciones):
+    if tipo == "bar":
+        fig = px.bar(datos, x=x, y=y, **opciones)
+        if etiquetas:
+            # Plantilla en vez de una columna 'text': no duplica los valores en el JSON
+            fig.update_traces(texttemplate="%{y:.4~g}", textposition="auto")
+        return fig
+    if tipo == "line":
+        modo = "webgl" if len(datos) > UMBRAL_WEBGL else "svg"
+        return px.line(datos, x=x, y=y, render_mode=modo, **opciones)
+    return px.pie(datos, names=x, values=y, **opciones)
+
+
+def figura(tipo: str, datos: pd.DataFrame, x: str, y: str, etiquetas: bool = False,
+           top_n: int = TOP_N, max_puntos: int = MAX_PUNTOS_LINEA, max_bytes: int = MAX_BYTES,
+           nombre: str = "", **opciones):
+    """
+    Figura Plotly reducida. `opciones` se pasa tal cual a plotly.express
+    (title, labels, height, markers...).
+    """
+    nombre = nombre or tipo
+    with trazas.etapa("grafico", figura=nombre, puntos_entrada=len(datos)) as etapa:
+        for _ in range(MAX_REDUCCIONES):
+            if tipo == "line":
+                reducidos = reducir_linea(datos, x, y, max_puntos)
+            else:
+                reducidos = agrupar_cola(datos, x, y, top_n)
+            y_fig = "valor" if x == y and tipo != "line" else y
+            tamano = estimar_bytes(reducidos, (x, y_fig))
+            if tamano <= max_bytes:
+                break
+            # Payload demasiado grande: se reduce a la mitad y se reintenta
+            max_puntos, top_n = max(max_puntos // 2, 3), max(top_n // 2, 1)
+        else:
+            log.warning("grafico %s: supera el tope de %d bytes (≈%d)", nombre, max_bytes, tamano)
+        fig = _construir(tipo, reducidos, x, y_fig, etiquetas, **opciones)
+        etapa.anotar(puntos=len(reducidos), bytes=tamano)
+    trazas.sumar(bytes_graficos=tamano)
+    return fig
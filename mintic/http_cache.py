@@ -0,0 +1,193 @@
+"""
+Caché HTTP persistente con revalidación condicional.
+
+Cada respuesta cacheable se guarda en disco tal como llegó (ya descomprimida)
+junto con su ETag y Last-Modified. La siguiente petición a la misma URL envía
+If-None-Match / If-Modified-Since: si el servidor contesta 304 el cuerpo se
+lee del disco y la revalidación cuesta solo unas cabeceras. Los cuerpos se
+escriben en streaming, así que una página grande no se mantiene entera en
+memoria. La carpeta se acota por bytes expulsando las entradas más viejas.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+import requests
+
+from mintic.datos import CACHE_DIR
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+RUTA = os.path.join(CACHE_DIR, "http")
+MAX_BYTES = 512 << 20
+TIMEOUT = 30
+TAM_BLOQUE = 1 << 20
+
+
+@dataclass(frozen=True)
+class Respuesta:
+    url: str
+    estado: int                 # estado del origen: 200 (descargada) o 304 (revalidada)
+    ruta: str                   # cuerpo en disco
+    etag: str | None
+    modificado: str | None
+
+    @property
+    def revalidada(self) -> bool:
+        return self.estado == 304
+
+    def abrir(self):
+        return open(self.ruta, "rb")
+
+    def leer(self) -> bytes:
+        with self.abrir() as f:
+            return f.read()
+
+    def json(self):
+        return json.loads(self.leer().decode("utf-8"))
+
+
+def clave(url: str, params: dict | None = None) -> str:
+    """Hash de la URL con los parámetros ordenados."""
+    consulta = urlencode(sorted((params or {}).items()))
+    return hashlib.sha256(f"{url}?{consulta}".encode("utf-8")).hexdigest()
+
+
+# ======================================================
+# CACHÉ
+# ======================================================
+
+class CacheHTTP:
+    def __init__(self, ruta: str = RUTA, max_bytes: int = MAX_BYTES):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.revalidadas = 0
+        self.descargas = 0
+        self.bytes_descargados = 0
+        self._lock = threading.Lock()
+        os.makedirs(ruta, exist_ok=True)
+
+    def _rutas(self, k: str) -> tuple[str, str]:
+        base = os.path.join(self.ruta, k)
+        return f"{base}.cuerpo", f"{base}.json"
+
+    def _meta(self, k: str) -> dict | None:
+        cuerpo, meta = self._rutas(k)
+        try:
+            with open(meta, encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return datos if os.path.exists(cuerpo) else None
+
+    def get(self, sesion: requests.Session, url: str, params: dict | None = None,
+            timeout: float = TIMEOUT) -> Respuesta:
+        """
+        GET condicional. Devuelve la respuesta guardada si el servidor responde
+        304, o descarga y guarda el cuerpo nuevo en otro caso.
+        """
+        k = clave(url, params)
+        ruta_cuerpo, ruta_meta = self._rutas(k)
+        meta = self._meta(k)
+
+        encabezados = {}
+        if meta:
+            if meta.get("etag"):
+                encabezados["If-None-Match"] = meta["etag"]
+            if meta.get("modificado"):
+                encabezados["If-Modified-Since"] = meta["modificado"]
+
+        with sesion.get(url, params=params, headers=encabezados, timeout=timeout, stream=True) as r:
+            if r.status_code == 304 and meta:
+                # Se marca como usada para que la expulsión por antigüedad la respete
+                os.utime(ruta_cuerpo)
+                with self._lock:
+                    self.revalidadas += 1
+                return Respuesta(url, 304, ruta_cuerpo, meta.get("etag"), meta.get("modificado"))
+
+            r.raise_for_status()
+            tmp = f"{ruta_cuerpo}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tamano = 0
+            with open(tmp, "wb") as f:
+                # iter_content ya descomprime gzip/deflate
+                for trozo in r.iter_content(TAM_BLOQUE):
+                    f.write(trozo)
+                    tamano += len(trozo)
+            os.replace(tmp, ruta_cuerpo)
+            meta = {
+                "url": r.url,
+                "etag": r.headers.get("ETag"),
+                "modificado": r.headers.get("Last-Modified"),
+                "guardado": time.time(),
+            }
+            tmp = f"{ruta_meta}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp, ruta_meta)
+
+        with self._lock:
+            self.descargas += 1
+            self.bytes_descargados += tamano
+        self._expulsar()
+        return Respuesta(url, 200, ruta_cuerpo, meta["etag"], meta["modificado"])
+
+    def _expulsar(self) -> None:
+        """Borra las entradas usadas hace más tiempo hasta volver al tope de bytes."""
+        entradas = []
+        total = 0
+        for nombre in os.listdir(self.ruta):
+            if not nombre.endswith(".cuerpo"):
+                continue
+            try:
+                info = os.stat(os.path.join(self.ruta, nombre))
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, nombre[:-len(".cuerpo")]))
+            total += info.st_size
+        if total <= self.max_bytes:
+            return
+        for _, tamano, k in sorted(entradas):
+            for ruta in self._rutas(k):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            total -= tamano
+            if total <= self.max_bytes:
+                break
+
+    def limpiar(self) -> None:
+        for nombre in os.listdir(self.ruta):
+            try:
+                os.remove(os.path.join(self.ruta, nombre))
+            except OSError:
+                pass
+
+    def estadisticas(self) -> dict:
+        consultas = self.revalidadas + self.descargas
+        return {
+            "revalidadas": self.revalidadas,
+            "descargas": self.descargas,
+            "tasa_304": self.revalidadas / consultas if consultas else 0.0,
+            "bytes_descargados": self.bytes_descargados,
+        }
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_cache_http() -> CacheHTTP:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = CacheHTTP()
+        return _INSTANCIA
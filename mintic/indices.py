@@ -0,0 +1,321 @@
+"""
+Índices por columna para la acción 'filtrar'.
+
+- Índice hash: valor normalizado (sin tildes, minúsculas, espacios colapsados)
+  → arreglo ordenado de ids de fila. Admite igualdad y prefijo.
+- Índice ordenado: para columnas numéricas y de fecha (Vistas, Descargas,
+  fechas UTC); admite igualdad y rangos con búsqueda binaria. En fechas, un
+  prefijo ("2021", "2021-03", "2021-03-05") es el rango [inicio, siguiente).
+
+Los índices se construyen de forma perezosa la primera vez que se filtra por
+una columna y se guardan por versión del dataset (huella); se conservan unas
+pocas versiones a la vez, porque las fuentes CSV y API conviven. Las
+condiciones múltiples se resuelven intersectando o uniendo ids de fila.
+"""
+
+import bisect
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from mintic.fechas import NAT, enteros
+from mintic.texto import normalizar
+
+OPERADORES_RANGO = (">", ">=", "<", "<=", "entre")
+MAX_VERSIONES = 4        # versiones del dataset con códigos e índices en memoria
+VACIO = np.empty(0, dtype=np.int64)
+
+# Año, año-mes o año-mes-día (con "-" o "/")
+_PREFIJO_FECHA = re.compile(r"(\d{4})(?:[-/](\d{1,2})(?:[-/](\d{1,2}))?)?")
+
+
+# ======================================================
+# CÓDIGOS CATEGÓRICOS EN CACHÉ
+# ======================================================
+
+_CODIGOS: dict = {}
+_LOCK = threading.Lock()
+
+
+def _version(df: pd.DataFrame):
+    return df.attrs.get("huella") or id(df)
+
+
+def _guardar(cache: dict, version, columna: str, valor) -> None:
+    """Guarda por versión y columna; con el lock tomado."""
+    por_columna = cache.get(version)
+    if por_columna is None:
+        # Pocas versiones vivas a la vez (p. ej. CSV y API): se expulsa la más vieja
+        if len(cache) >= MAX_VERSIONES:
+            cache.pop(next(iter(cache)))
+        por_columna = cache[version] = {}
+    por_columna[columna] = valor
+
+
+def codificar(df: pd.DataFrame, columna: str) -> tuple:
+    """
+    Devuelve (códigos, categorías) de la columna; -1 marca nulos.
+    Se calcula una vez por versión del dataset y columna.
+    """
+    version = _version(df)
+    with _LOCK:
+        cacheado = _CODIGOS.get(version, {}).get(columna)
+    if cacheado is not None:
+        return cacheado
+
+    serie = df[columna]
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        categorias = serie.cat.categories
+    else:
+        codigos, categorias = pd.factorize(serie, sort=True, use_na_sentinel=True)
+
+    with _LOCK:
+        _guardar(_CODIGOS, version, columna, (codigos, categorias))
+    return codigos, categorias
+
+
+# ======================================================
+# ÍNDICE HASH (TEXTO / CATEGORÍAS)
+# ======================================================
+
+class IndiceHash:
+    def __init__(self, df: pd.DataFrame, columna: str):
+        codigos, categorias = codificar(df, columna)
+        # Filas agrupadas por código, conservando el orden original
+        orden = np.argsort(codigos, kind="stable")
+        cortes = np.searchsorted(codigos[orden], np.arange(len(categorias) + 1))
+        self._orden = orden
+        self._cortes = cortes
+
+        self._por_clave = {}
+        for codigo, categoria in enumerate(categorias):
+            self._por_clave.setdefault(normalizar(categoria), []).append(codigo)
+        self._claves = sorted(self._por_clave)
+
+    def _filas(self, codigos: list) -> np.ndarray:
+        partes = [self._orden[self._cortes[c]:self._cortes[c + 1]] for c in codigos]
+        if not partes:
+            return VACIO
+        filas = np.concatenate(partes)
+        return np.sort(filas) if len(partes) > 1 else filas
+
+    def igual(self, valor) -> np.ndarray:
+        return self._filas(self._por_clave.get(normalizar(valor), []))
+
+    def prefijo(self, valor) -> np.ndarray:
+        p = normalizar(valor)
+        inicio = bisect.bisect_left(self._claves, p)
+        fin = bisect.bisect_left(self._claves, p + "\U0010ffff")
+        codigos = [c for clave in self._claves[inicio:fin] for c in self._por_clave[clave]]
+        return self._filas(codigos)
+
+
+# ======================================================
+# ÍNDICE ORDENADO (NÚMEROS / FECHAS)
+# ======================================================
+
+class IndiceOrdenado:
+    def __init__(self, df: pd.DataFrame, columna: str):
+        serie = df[columna]
+        self.es_fecha = pd.api.types.is_datetime64_any_dtype(serie)
+        self._tz = getattr(serie.dt, "tz", None) if self.es_fecha else None
+        if self.es_fecha:
+            valores = enteros(df, columna)
+            validos = valores != NAT
+        else:
+            valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+            validos = ~np.isnan(valores)
+
+        filas = np.flatnonzero(validos)
+        orden = np.argsort(valores[filas], kind="stable")
+        self._filas = filas[orden]
+        self._valores = valores[filas][orden]
+
+    def _convertir(self, valor):
+        if self.es_fecha:
+            ts = pd.Timestamp(valor)
+            if self._tz is not None:
+                ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+            elif ts.tzinfo is not None:
+                ts = ts.tz_convert("UTC").tz_localize(None)
+            return ts.value
+        return float(valor)
+
+    def rango(self, desde=None, hasta=None, incluir_desde=True, incluir_hasta=True) -> np.ndarray:
+        i, j = 0, len(self._valores)
+        if desde is not None:
+            lado = "left" if incluir_desde else "right"
+            i = np.searchsorted(self._valores, self._convertir(desde), side=lado)
+        if hasta is not None:
+            lado = "right" if incluir_hasta else "left"
+            j = np.searchsorted(self._valores, self._convertir(hasta), side=lado)
+        return np.sort(self._filas[i:j]) if j > i else VACIO
+
+    def igual(self, valor) -> np.ndarray:
+        return self.rango(valor, valor)
+
+    def prefijo(self, valor) -> np.ndarray:
+        """Fechas del año, mes o día indicado: rango semiabierto [inicio, siguiente)."""
+        partes = _PREFIJO_FECHA.fullmatch(str(valor).strip()) if self.es_fecha else None
+        if partes is None:
+            raise ValueError(f"'prefijo' en columnas de fecha espera AAAA, AAAA-MM o AAAA-MM-DD: {valor}")
+        anio, mes, dia = (int(p) if p else None for p in partes.groups())
+        inicio = pd.Timestamp(anio, mes or 1, dia or 1)
+        if dia is not None:
+            siguiente = inicio + pd.DateOffset(days=1)
+        elif mes is not None:
+            siguiente = inicio + pd.DateOffset(months=1)
+        else:
+            siguiente = inicio + pd.DateOffset(years=1)
+        return self.rango(inicio, siguiente, incluir_hasta=False)
+
+    def ordenados(self) -> np.ndarray:
+        """Ids de fila no nulos ordenados por valor ascendente."""
+        return self._filas
+
+
+def es_ordenable(serie: pd.Series) -> bool:
+    return (
+        pd.api.types.is_datetime64_any_dtype(serie)
+        or (pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie))
+    )
+
+
+# ======================================================
+# CACHÉ DE ÍNDICES POR VERSIÓN
+# ======================================================
+
+_INDICES: dict = {}
+
+
+def obtener_indice(df: pd.DataFrame, columna: str):
+    version = _version(df)
+    with _LOCK:
+        indice = _INDICES.get(version, {}).get(columna)
+    if indice is not None:
+        return indice
+
+    clase = IndiceOrdenado if es_ordenable(df[columna]) else IndiceHash
+    indice = clase(df, columna)
+    with _LOCK:
+        _guardar(_INDICES, version, columna, indice)
+    return indice
+
+
+# ======================================================
+# RESOLUCIÓN DE CONDICIONES
+# ======================================================
+
+def resolver_condicion(df: pd.DataFrame, cond: dict) -> np.ndarray:
+    """
+    Ids de fila (ordenados) que cumplen una condición:
+    {"columna": c, "operador": "="|"prefijo"|">"|">="|"<"|"<="|"entre", "valor": v, "hasta": v2}
+    """
+    col = cond.get("columna")
+    if col not in df.columns:
+        raise KeyError(col)
+    operador = cond.get("operador", "=")
+    valor = cond.get("valor")
+    indice = obtener_indice(df, col)
+
+    if operador in ("=", "==", "igual"):
+        return indice.igual(valor)
+    if operador == "prefijo":
+        if isinstance(indice, IndiceOrdenado) and not indice.es_fecha:
+            raise ValueError(f"'prefijo' no aplica a la columna numérica '{col}'.")
+        return indice.prefijo(valor)
+    if operador in OPERADORES_RANGO:
+        if not isinstance(indice, IndiceOrdenado):
+            raise ValueError(f"El operador '{operador}' solo aplica a columnas numéricas o de fecha.")
+        if operador == "entre":
+            return indice.rango(valor, cond.get("hasta"))
+        if operador in (">", ">="):
+            return indice.rango(desde=valor, incluir_desde=operador == ">=")
+        return indice.rango(hasta=valor, incluir_hasta=operador == "<=")
+    raise ValueError(f"Operador desconocido: {operador}")
+
+
+def condiciones_de(obj: dict) -> list:
+    """
+    Condiciones de un filtro simple o con "condiciones": [...]. Lanza
+    ValueError si la lista no es de objetos (respuesta malformada del LLM).
+    """
+    condiciones = obj.get("condiciones") or [obj]
+    if not isinstance(condiciones, list) or not all(isinstance(c, dict) for c in condiciones):
+        raise ValueError("cada condición debe ser un objeto con columna, operador y valor.")
+    return condiciones
+
+
+def resolver_filtro(df: pd.DataFrame, obj: dict) -> np.ndarray:
+    """
+    Resuelve una instrucción 'filtrar' simple o con varias condiciones
+    ("condiciones": [...], "logica": "and"|"or") combinando ids de fila.
+    """
+    condiciones = condiciones_de(obj)
+    logica = str(obj.get("logica", "and")).lower()
+
+    resultado = None
+    for cond in condiciones:
+        filas = resolver_condicion(df, cond)
+        if resultado is None:
+            resultado = filas
+        elif logica == "or":
+            resultado = np.union1d(resultado, filas)
+        else:
+            resultado = np.intersect1d(resultado, filas, assume_unique=True)
+            if not len(resultado):
+                break
+    return resultado if resultado is not None else VACIO
+
+
+def ordenar(df: pd.DataFrame, columna: str, filas: np.ndarray | None = None,
+            descendente: bool = False) -> np.ndarray:
+    """
+    Ids de fila (todas o solo `filas`) ordenados por `columna`, con los nulos
+    al final. Reutiliza el índice ordenado (números y fechas) o los códigos
+    categóricos, ordenando solo las categorías.
+    """
+    if filas is not None and not len(filas):
+        return VACIO
+    if es_ordenable(df[columna]):
+        validos = obtener_indice(df, columna).ordenados()
+        orden = validos
+        if filas is not None:
+            incluidas = np.zeros(len(df), dtype=bool)
+            incluidas[filas] = True
+            orden = orden[incluidas[orden]]
+        if descendente:
+            orden = orden[::-1]
+        base = np.arange(len(df)) if filas is None else np.asarray(filas)
+        no_nulo = np.zeros(len(df), dtype=bool)
+        no_nulo[validos] = True
+        return np.concatenate([orden, base[~no_nulo[base]]])
+
+    codigos, categorias = codificar(df, columna)
+    # Las categorías de Arrow siguen el orden de aparición: se ordenan aparte (son pocas)
+    rangos = np.empty(len(categorias), dtype=np.int64)
+    rangos[np.argsort(np.asarray(categorias, dtype=str), kind="stable")] = np.arange(len(categorias))
+    base = np.arange(len(df)) if filas is None else np.asarray(filas)
+    codigos = codigos[base]
+    claves = rangos[codigos]
+    if descendente:
+        claves = -claves
+    # Nulos (-1) al final en ambos sentidos
+    claves[codigos < 0] = np.iinfo(np.int64).max
+    return base[np.argsort(claves, kind="stable")]
+
+
+def describir_filtro(obj: dict) -> str:
+    condiciones = obj.get("condiciones") or [obj]
+    partes = []
+    for c in condiciones:
+        operador = c.get("operador", "=")
+        if operador == "entre":
+            partes.append(f"{c.get('columna')} entre {c.get('valor')} y {c.get('hasta')}")
+        else:
+            partes.append(f"{c.get('columna')} {operador} {c.get('valor')}")
+    union = " O " if str(obj.get("logica", "and")).lower() == "or" else " Y "
+    return union.join(partes)
@@ -0,0 +1,167 @@
+"""
+Métricas precalculadas del inventario (completitud, actualización, cobertura).
+
+Se calculan una sola vez por versión del dataset (huella) y se comparten entre
+todas las páginas y sesiones del proceso. La completitud sale de los conteos de
+nulos de Arrow, así que solo se materializan las columnas de fecha y de tema.
+"""
+
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+import pyarrow as pa
+
+from mintic import tipos
+from mintic.datos import CSV_PATH, abrir_arrow, asegurar_cache
+
+# ======================================================
+# COLUMNAS DE INTERÉS
+# ======================================================
+
+COLUMNAS_ACTUALIZACION = [
+    "Fecha de última actualización de datos (UTC)",
+    "Fecha de última actualización de metadatos (UTC)",
+    "Common Core: Last Update",
+    "Fecha de creación (UTC)",
+]
+
+COLUMNAS_TEMA = ["sector", "tema", "category", "Categoría", "subject", "topic"]
+
+COLUMNA_SECTOR = "Información de la Entidad: Sector"
+
+
+@dataclass(frozen=True)
+class Metricas:
+    huella: str
+    filas: int
+    columnas: list
+    completitud: pd.Series                # fracción no nula por columna (desc)
+    nulos_por_fila: float                 # promedio de valores nulos por fila
+    columna_actualizacion: str | None
+    resumen_fechas: pd.Series | None      # describe() de la fecha de actualización
+    fecha_min: pd.Timestamp | None
+    fecha_max: pd.Timestamp | None
+    actualizaciones_mensuales: pd.Series  # activos por mes (PeriodIndex ordenado)
+    columna_tema: str | None
+    conteo_temas: pd.Series
+    columna_sector: str | None
+    conteo_sector: pd.Series
+
+
+# ======================================================
+# CÁLCULO
+# ======================================================
+
+def _detectar_sector(columnas: list) -> str | None:
+    if COLUMNA_SECTOR in columnas:
+        return COLUMNA_SECTOR
+    return next((c for c in columnas if "sector" in c.lower()), None)
+
+
+def _columna(datos, nombre: str) -> pd.Series:
+    if isinstance(datos, pa.Table):
+        return datos.column(nombre).to_pandas()
+    return datos[nombre]
+
+
+def _conteo(serie: pd.Series, etiqueta_nulos: str) -> pd.Series:
+    """value_counts con los nulos bajo una etiqueta; admite columnas categóricas."""
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.fillna(etiqueta_nulos).value_counts()
+    # Se cuenta sobre los códigos, sin materializar las cadenas
+    conteo = serie.value_counts()
+    conteo = conteo[conteo > 0].set_axis(conteo.index[conteo > 0].astype(object))
+    nulos = int(serie.isna().sum())
+    if nulos:
+        conteo = pd.concat([conteo, pd.Series({etiqueta_nulos: nulos})]).sort_values(ascending=False)
+    return conteo.rename("count")
+
+
+def calcular_metricas(datos, huella: str) -> Metricas:
+    """
+    Calcula todas las métricas en una pasada.
+    `datos` puede ser una tabla Arrow (preferido) o un DataFrame.
+    """
+    if isinstance(datos, pa.Table):
+        columnas = datos.column_names
+        filas = datos.num_rows
+        # Con los nulos del CSV: un valor inválido que el tipado volvió nulo sigue contando
+        originales = tipos.nulos_originales(datos)
+        nulos = pd.Series(
+            {c: originales.get(c, datos.column(c).null_count) for c in columnas}, dtype="int64"
+        )
+    else:
+        columnas = list(datos.columns)
+        filas = len(datos)
+        nulos = datos.isna().sum()
+
+    completitud = (1 - nulos / filas if filas else nulos * 0.0).sort_values(ascending=False)
+    # El promedio de nulos por fila es el total de nulos entre el número de filas
+    nulos_por_fila = float(nulos.sum() / filas) if filas else 0.0
+
+    # ---------- Frecuencia de actualización ----------
+    columna_actualizacion = next((c for c in COLUMNAS_ACTUALIZACION if c in columnas), None)
+    resumen_fechas = fecha_min = fecha_max = None
+    mensuales = pd.Series(dtype="int64")
+    if columna_actualizacion:
+        fechas = pd.to_datetime(_columna(datos, columna_actualizacion), errors="coerce")
+        # En texto: count y fechas mezclados no se serializan bien a Arrow
+        resumen_fechas = fechas.describe().astype(str)
+        fecha_min, fecha_max = fechas.min(), fechas.max()
+        validas = fechas.dropna()
+        if getattr(validas.dt, "tz", None) is not None:
+            validas = validas.dt.tz_localize(None)
+        mensuales = validas.dt.to_period("M").value_counts().sort_index()
+
+    # ---------- Cobertura temática ----------
+    columna_tema = next((c for c in COLUMNAS_TEMA if c in columnas), None)
+    conteo_temas = pd.Series(dtype="int64")
+    if columna_tema:
+        conteo_temas = _conteo(_columna(datos, columna_tema), "Sin Tema")
+
+    columna_sector = _detectar_sector(columnas)
+    conteo_sector = pd.Series(dtype="int64")
+    if columna_sector:
+        conteo_sector = _conteo(_columna(datos, columna_sector), "Sin sector")
+
+    return Metricas(
+        huella=huella,
+        filas=filas,
+        columnas=list(columnas),
+        completitud=completitud,
+        nulos_por_fila=nulos_por_fila,
+        columna_actualizacion=columna_actualizacion,
+        resumen_fechas=resumen_fechas,
+        fecha_min=fecha_min,
+        fecha_max=fecha_max,
+        actualizaciones_mensuales=mensuales,
+        columna_tema=columna_tema,
+        conteo_temas=conteo_temas,
+        columna_sector=columna_sector,
+        conteo_sector=conteo_sector,
+    )
+
+
+# ======================================================
+# CACHÉ POR VERSIÓN
+# ======================================================
+
+_CACHE: dict = {}
+_LOCK = threading.Lock()
+
+
+def obtener_metricas(path: str = CSV_PATH) -> Metricas:
+    """
+    Devuelve las métricas de la versión actual del inventario.
+    Solo se recalculan cuando cambia la huella del archivo.
+    """
+    ruta, huella = asegurar_cache(path)
+    with _LOCK:
+        metricas = _CACHE.get(huella)
+        if metricas is None:
+            metricas = calcular_metricas(abrir_arrow(ruta), huella)
+            # Solo se conserva la versión vigente
+            _CACHE.clear()
+            _CACHE[huella] = metricas
+    return metricas
@@ -0,0 +1,269 @@
+"""
+Motor de ejecución de las instrucciones JSON del chatbot.
+
+La instrucción se valida y se convierte en un plan que solo toca las
+columnas referenciadas, sin copiar el DataFrame:
+- tabla: corta las primeras N filas antes de seleccionar columnas.
+- filtrar: resuelve las condiciones con índices por columna (mintic.indices)
+  y solo materializa las N filas visibles.
+- buscar: consulta el índice BM25 (mintic.busqueda) y devuelve los k mejores.
+- graficar: agrupa sobre códigos enteros precalculados (np.bincount) en vez
+  de hacer hashing de cadenas en cada petición.
+- plan: varios pasos (tabla, graficar, buscar, filtrar) con un filtro común.
+  Las filas del filtro se resuelven una sola vez y cada paso trabaja sobre
+  esos mismos ids de fila.
+- texto: respuesta en lenguaje natural (modo JSON del LLM).
+Cada resultado conserva los ids de fila que lo produjeron; con `sobre` la
+instrucción siguiente trabaja solo sobre esos ids (resultado previo de la
+sesión, ver mintic.sesion). "orden" ordena tablas y filtros con el índice
+ordenado o los códigos categóricos (mintic.indices.ordenar).
+La presentación (Streamlit/Plotly) queda en app.py.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from mintic import busqueda
+from mintic.indices import codificar, condiciones_de, describir_filtro, ordenar, resolver_filtro
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+FILAS_VISIBLES = 5
+TIPOS_GRAFICO = ("bar", "line", "pie")
+ACCIONES_PASO = ("tabla", "graficar", "buscar", "filtrar")
+MAX_PASOS = 6
+# Hasta cuántas filas se materializan uniendo cortes en vez de con take
+MAX_CORTES = 50
+
+
+@dataclass(frozen=True)
+class Resultado:
+    clase: str                          # "tabla" | "grafico" | "texto" | "plan" | "aviso" | "crudo"
+    datos: pd.DataFrame | None = None
+    mensaje: str = ""
+    tipo: str | None = None             # tipo de gráfico
+    x: str | None = None
+    y: str | None = None
+    crudo: object = None                # instrucción original, si hay que mostrarla
+    partes: tuple = ()                  # resultados de cada paso de un plan
+    filas: np.ndarray | None = None     # ids de fila del resultado (None = todo el dataset)
+
+
+def aviso(mensaje: str, crudo=None) -> Resultado:
+    return Resultado("aviso", mensaje=mensaje, crudo=crudo)
+
+
+# ======================================================
+# AGREGACIONES SOBRE CÓDIGOS
+# ======================================================
+
+def contar_por(df: pd.DataFrame, x: str, filas: np.ndarray | None = None) -> pd.DataFrame:
+    codigos, categorias = codificar(df, x)
+    if filas is not None:
+        codigos = codigos[filas]
+    conteos = np.bincount(codigos[codigos >= 0], minlength=len(categorias))
+    presentes = conteos > 0
+    return pd.DataFrame({x: categorias[presentes], "valor": conteos[presentes]})
+
+
+def sumar_por(df: pd.DataFrame, x: str, y: str, filas: np.ndarray | None = None) -> pd.DataFrame:
+    codigos, categorias = codificar(df, x)
+    serie = df[y] if filas is None else df[y].iloc[filas]
+    valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if filas is not None:
+        codigos = codigos[filas]
+    validos = (codigos >= 0) & ~np.isnan(valores)
+    sumas = np.bincount(codigos[validos], weights=valores[validos], minlength=len(categorias))
+    presentes = np.bincount(codigos[codigos >= 0], minlength=len(categorias)) > 0
+    return pd.DataFrame({x: categorias[presentes], y: sumas[presentes]})
+
+
+# ======================================================
+# EJECUCIÓN
+# ======================================================
+
+def _filas(df: pd.DataFrame, filtro: dict) -> np.ndarray | Resultado:
+    """Ids de fila del filtro, o un aviso si no se puede aplicar."""
+    try:
+        condiciones = condiciones_de(filtro)
+    except ValueError as e:
+        return aviso(f"No se pudo aplicar el filtro: {e}", crudo=filtro)
+    for cond in condiciones:
+        if cond.get("columna") not in df.columns:
+            return aviso(f"La columna '{cond.get('columna')}' no existe en el dataset.")
+    try:
+        return resolver_filtro(df, filtro)
+    except (TypeError, ValueError) as e:
+        return aviso(f"No se pudo aplicar el filtro: {e}")
+
+
+def tomar(df: pd.DataFrame, ids: np.ndarray) -> pd.DataFrame:
+    """
+    Filas por posición. Las columnas de texto Arrow vienen en cientos de
+    trozos y `take` los recorre todos; para las pocas filas visibles es más
+    barato unir cortes de una fila.
+    """
+    if 0 < len(ids) <= MAX_CORTES:
+        return pd.concat([df.iloc[i:i + 1] for i in ids])
+    return df.iloc[ids]
+
+
+def _subconjunto(df: pd.DataFrame, filas: np.ndarray | None, n: int | None = None) -> pd.DataFrame:
+    if filas is None:
+        return df if n is None else df.iloc[:n]
+    return tomar(df, filas) if n is None else tomar(df, filas[:n])
+
+
+def _visibles(df: pd.DataFrame, obj: dict, filas: np.ndarray | None, n: int) -> np.ndarray | None:
+    """Ids de las N filas a mostrar, en el orden pedido con "orden"/"descendente"."""
+    orden = obj.get("orden")
+    if orden in df.columns:
+        return ordenar(df, orden, filas, bool(obj.get("descendente")))[:n]
+    return None if filas is None else filas[:n]
+
+
+def _accion(df: pd.DataFrame, obj: dict, n_filas: int, filas: np.ndarray | None = None,
+            contexto: str = "") -> Resultado:
+    """
+    Una acción sobre todo el dataset o, si se pasan `filas`, solo sobre esos
+    ids (`contexto` describe de dónde salen: filtro del plan o resultado previo).
+    """
+    accion = obj.get("accion")
+
+    # ----------------- TABLA -----------------
+    if accion == "tabla":
+        columnas = obj.get("columnas", [])
+        columnas_validas = [c for c in columnas if c in df.columns]
+        if not columnas_validas:
+            return aviso("Las columnas indicadas no existen o están vacías.")
+        visibles = _visibles(df, obj, filas, n_filas)
+        datos = df[columnas_validas]
+        datos = datos.iloc[:n_filas] if visibles is None else tomar(datos, visibles)
+        return Resultado("tabla", datos=datos, filas=filas,
+                         mensaje=f"{len(filas)} filas {contexto}." if filas is not None and contexto else "")
+
+    # ----------------- FILTRO -----------------
+    if accion == "filtrar":
+        propio = obj if (obj.get("condiciones") or obj.get("columna")) else None
+        if propio is not None:
+            nuevas = _filas(df, propio)
+            if isinstance(nuevas, Resultado):
+                return nuevas
+            # Se conserva el orden del resultado previo (relevancia, "orden"...)
+            filas = nuevas if filas is None else filas[np.isin(filas, nuevas)]
+        if filas is None:
+            return aviso("El filtro no tiene condiciones.")
+        descripcion = " y ".join(p for p in (contexto, f"donde {describir_filtro(propio)}" if propio else "") if p)
+        return Resultado(
+            "tabla",
+            datos=tomar(df, _visibles(df, obj, filas, n_filas)),
+            mensaje=(
+                f"{len(filas)} filas {descripcion} "
+                f"(mostrando primeras {n_filas})."
+            ),
+            filas=filas,
+        )
+
+    # ----------------- BÚSQUEDA -----------------
+    if accion == "buscar":
+        consulta = str(obj.get("consulta") or "").strip()
+        if not consulta:
+            return aviso("La búsqueda no tiene texto de consulta.")
+        if not busqueda.columnas_resultado(df):
+            return aviso("El dataset no tiene columnas de título, descripción o etiqueta para buscar.")
+        try:
+            k = int(obj.get("k") or busqueda.TOP_K)
+        except (TypeError, ValueError):
+            return aviso(f"Número de resultados inválido: {obj.get('k')!r}.", crudo=obj)
+        k = max(1, min(k, busqueda.TOP_K_MAX))
+        encontrados = busqueda.buscar(df, consulta, k, filas)
+        return Resultado(
+            "tabla",
+            datos=encontrados,
+            mensaje=f"{len(encontrados)} activos más relevantes para «{consulta}».",
+            filas=df.index.get_indexer(encontrados.index),
+        )
+
+    # ----------------- GRAFICO -----------------
+    if accion == "graficar":
+        tipo = obj.get("tipo")
+        x = obj.get("x")
+        y = obj.get("y")
+        agg = obj.get("agregacion", "count")
+
+        if x not in df.columns:
+            return aviso(f"La columna de eje X '{x}' no existe en el dataset.")
+        if tipo not in TIPOS_GRAFICO:
+            return aviso(f"Tipo de gráfico desconocido: {tipo}", crudo=obj)
+
+        # Manejo robusto para 'count' aunque 'y' no exista o venga vacío
+        if agg == "count":
+            return Resultado("grafico", datos=contar_por(df, x, filas), tipo=tipo, x=x, y="valor",
+                             filas=filas)
+        if agg == "sum":
+            if y not in df.columns:
+                return aviso(f"La columna '{y}' no existe para agregación 'sum'.")
+            return Resultado("grafico", datos=sumar_por(df, x, y, filas), tipo=tipo, x=x, y=y,
+                             filas=filas)
+        # none
+        if y not in df.columns:
+            return aviso(f"La columna '{y}' no existe.")
+        base = _subconjunto(df, filas)
+        datos = pd.DataFrame({x: base[x], y: base[y]}) if x != y else base[[x]]
+        return Resultado("grafico", datos=datos, tipo=tipo, x=x, y=y, filas=filas)
+
+    # Si no coincide con nada, se muestra el JSON crudo
+    return Resultado("crudo", crudo=obj)
+
+
+def ejecutar_plan(df: pd.DataFrame, obj: dict, n_filas: int = FILAS_VISIBLES,
+                  sobre: np.ndarray | None = None, contexto: str = "") -> Resultado:
+    """
+    Plan de varios pasos: {"accion": "plan", "filtro": {...}, "pasos": [...]}.
+    El filtro (opcional, mismo formato que 'filtrar') se resuelve una vez y
+    todos los pasos reutilizan sus ids de fila.
+    """
+    pasos = obj.get("pasos")
+    if not isinstance(pasos, list) or not pasos:
+        return aviso("El plan no tiene pasos.", crudo=obj)
+
+    filtro = obj.get("filtro") if isinstance(obj.get("filtro"), dict) else None
+    filas = sobre
+    if filtro:
+        filas = _filas(df, filtro)
+        if isinstance(filas, Resultado):
+            return filas
+        if sobre is not None:
+            filas = sobre[np.isin(sobre, filas)]
+        contexto = " ".join(p for p in (contexto, f"donde {describir_filtro(filtro)}") if p)
+    mensaje = f"{len(filas)} filas {contexto}." if filas is not None and contexto else ""
+
+    partes = []
+    for paso in pasos[:MAX_PASOS]:
+        if not isinstance(paso, dict) or paso.get("accion") not in ACCIONES_PASO:
+            partes.append(aviso("Paso del plan no reconocido.", crudo=paso))
+            continue
+        # El mensaje del plan ya describe las filas; solo 'filtrar' lo repite con su condición
+        partes.append(_accion(df, paso, n_filas, filas, contexto if paso["accion"] == "filtrar" else ""))
+    return Resultado("plan", mensaje=mensaje, partes=tuple(partes), filas=filas)
+
+
+def ejecutar(df: pd.DataFrame, obj: dict, n_filas: int = FILAS_VISIBLES,
+             sobre: np.ndarray | None = None, contexto: str = "") -> Resultado:
+    """
+    Ejecuta una instrucción ya parseada (con nombres reales de columna).
+    Con `sobre` (ids de un resultado previo) solo se consideran esas filas;
+    `contexto` lo describe en los mensajes.
+    """
+    if not isinstance(obj, dict):
+        return Resultado("crudo", crudo=obj)
+    accion = obj.get("accion")
+    if accion == "plan":
+        return ejecutar_plan(df, obj, n_filas, sobre, contexto)
+    if accion == "texto":
+        return Resultado("texto", mensaje=str(obj.get("texto") or ""))
+    return _accion(df, obj, n_filas, sobre, contexto)
@@ -0,0 +1,78 @@
+"""
+Lectura incremental de las respuestas JSON del LLM.
+
+En modo JSON incluso las respuestas en lenguaje natural llegan como
+{"accion": "texto", "texto": "..."}. Para seguir mostrándolas (y
+sintetizando la voz) a medida que se generan, `ExtractorTexto` localiza el
+campo "texto" en el JSON a medio llegar y decodifica su contenido por
+trozos, reteniendo las secuencias de escape que aún estén incompletas.
+"""
+
+import json
+import re
+
+_CAMPO_TEXTO = re.compile(r'"texto"\s*:\s*"')
+
+
+class ExtractorTexto:
+    """Acumula fragmentos JSON y entrega el texto nuevo del campo "texto"."""
+
+    def __init__(self):
+        self.texto = ""
+        self.terminado = False
+        self._buffer = ""
+        self._inicio = None           # posición del primer carácter del valor
+        self._leido = 0               # caracteres crudos del valor ya decodificados
+
+    @property
+    def encontrado(self) -> bool:
+        return self._inicio is not None
+
+    def agregar(self, fragmento: str) -> str:
+        """Texto decodificado que aportó `fragmento` ('' si no hay nada nuevo)."""
+        if self.terminado:
+            return ""
+        self._buffer += fragmento
+        if self._inicio is None:
+            m = _CAMPO_TEXTO.search(self._buffer)
+            if m is None:
+                return ""
+            self._inicio = m.end()
+
+        crudo = self._buffer[self._inicio + self._leido:]
+        corte, self.terminado = _corte(crudo)
+        crudo = crudo[:corte]
+        if not crudo:
+            return ""
+
+        nuevo = json.loads(f'"{crudo}"')
+        self._leido += len(crudo)
+        self.texto += nuevo
+        return nuevo
+
+
+def _corte(crudo: str) -> tuple[int, bool]:
+    """
+    (n, cerrada): cuántos caracteres de `crudo` se pueden decodificar ya y si
+    la cadena JSON terminó. Se corta antes de un escape incompleto ('\\',
+    '\\u00') o de la primera mitad de un par sustituto (emoji) sin la segunda.
+    """
+    i = 0
+    while i < len(crudo):
+        c = crudo[i]
+        if c == '"':
+            return i, True
+        if c != "\\":
+            i += 1
+            continue
+        if i + 1 >= len(crudo):
+            return i, False
+        if crudo[i + 1] != "u":
+            i += 2
+            continue
+        if i + 6 > len(crudo):
+            return i, False
+        if crudo[i + 2] in "dD" and crudo[i + 3] in "89abAB" and i + 12 > len(crudo):
+            return i, False
+        i += 6
+    return i, False
@@ -0,0 +1,167 @@
+"""
+Resultados de la sesión para preguntas de seguimiento.
+
+Cada respuesta que produce filas (tabla, filtro, búsqueda, gráfico o plan)
+se guarda como un manejador "r1", "r2"... con los ids de fila que la
+produjeron, la instrucción y, para los gráficos, la agregación. Una
+pregunta como "ahora solo los de Antioquia" o "ordénalo por descargas"
+llega al LLM con un resumen de los últimos resultados y este responde con
+"sobre": "previo" (o "r2"): el motor trabaja solo sobre esos ids, así que
+cada refinamiento recorre el subconjunto ya reducido y no la tabla entera.
+
+Los manejadores viven en `st.session_state` (uno por sesión), se expulsan
+por LRU con un tope de entradas y de bytes, y dejan de valer cuando cambia
+la versión del dataset (los ids de fila ya no corresponden).
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from mintic.indices import describir_filtro, resolver_filtro
+from mintic.texto import normalizar
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+MAX_ENTRADAS = 8
+MAX_BYTES = 32 << 20
+# Resultados que se describen al LLM en una pregunta de seguimiento
+EN_CONTEXTO = 3
+REFERENCIAS_PREVIO = ("previo", "anterior", "ultimo")
+
+# "ahora solo...", "de esos", "ordénalo", "grafícalos", "del resultado anterior"
+_SEGUIMIENTO = re.compile(
+    r"^(?:ahora|y\s|solo|solamente|ademas|tambien|pero)\b"
+    r"|\b(?:es[oa]s?|est[oa]s?|ell[oa]s|anterior|previo|ultimo resultado|mismos?|mismas?)\b"
+    r"|\b(?:ordena|filtra|grafica|muestra|mostra|agrupa|cuenta|busca|lista|resume|compara"
+    r"|dibuja|ensena|separa|divide|limita|dame)(?:me)?(?:lo|la|los|las)\b"
+)
+
+
+def es_seguimiento(pregunta: str) -> bool:
+    """La pregunta parece referirse al resultado anterior."""
+    return bool(_SEGUIMIENTO.search(normalizar(pregunta).strip(" ¿?¡!.")))
+
+
+@dataclass
+class Manejador:
+    id: str
+    huella: str | None
+    instruccion: dict
+    filas: np.ndarray | None       # ids de fila; None si aún no se resolvieron
+    datos: pd.DataFrame | None     # agregación de un gráfico
+    descripcion: str
+
+    @property
+    def nbytes(self) -> int:
+        total = self.filas.nbytes if self.filas is not None else 0
+        if self.datos is not None:
+            total += int(self.datos.memory_usage(deep=True).sum())
+        return total
+
+    def ids(self, df: pd.DataFrame) -> np.ndarray | None:
+        """
+        Ids de fila del resultado; None significa todo el dataset. Los filtros
+        resueltos en el servidor (SoQL) no traen ids: se resuelven aquí con los
+        índices locales la primera vez que se usan.
+        """
+        if self.filas is None and self.instruccion.get("accion") == "filtrar":
+            self.filas = _compactar(resolver_filtro(df, self.instruccion), len(df))
+        return self.filas
+
+
+def _compactar(filas: np.ndarray | None, n_filas: int) -> np.ndarray | None:
+    """int32 basta para cualquier inventario realista y ocupa la mitad."""
+    if filas is None:
+        return None
+    return filas.astype(np.int32, copy=False) if n_filas < 2**31 else filas
+
+
+def describir(obj: dict, filas: int | None) -> str:
+    accion = obj.get("accion")
+    if accion == "filtrar":
+        texto = f"filtrar {describir_filtro(obj)}"
+    elif accion == "plan" and isinstance(obj.get("filtro"), dict):
+        texto = f"plan con filtro {describir_filtro(obj['filtro'])}"
+    elif accion == "tabla":
+        texto = "tabla de " + ", ".join(map(str, obj.get("columnas", [])))
+    elif accion == "graficar":
+        texto = f"gráfico {obj.get('agregacion', 'count')} por {obj.get('x')}"
+    elif accion == "buscar":
+        texto = f"búsqueda «{obj.get('consulta')}»"
+    else:
+        texto = str(accion)
+    return f"{texto} → {filas if filas is not None else 'todas las'} filas"
+
+
+# ======================================================
+# RESULTADOS DE UNA SESIÓN
+# ======================================================
+
+class ResultadosSesion:
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, max_bytes: int = MAX_BYTES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.reutilizados = 0
+        self._manejadores: OrderedDict = OrderedDict()
+        self._contador = 0
+        self._ultimo: str | None = None
+
+    def guardar(self, huella: str | None, instruccion: dict, filas: np.ndarray | None,
+                n_filas: int, datos: pd.DataFrame | None = None) -> Manejador:
+        self._contador += 1
+        filas = _compactar(filas, n_filas)
+        manejador = Manejador(
+            f"r{self._contador}", huella, instruccion, filas, datos,
+            describir(instruccion, len(filas) if filas is not None else None),
+        )
+        self._manejadores[manejador.id] = manejador
+        self._ultimo = manejador.id
+        self._expulsar()
+        return manejador
+
+    def _expulsar(self) -> None:
+        """LRU por cantidad y por bytes; el último resultado nunca se expulsa."""
+        total = sum(m.nbytes for m in self._manejadores.values())
+        while len(self._manejadores) > 1 and (
+            len(self._manejadores) > self.max_entradas or total > self.max_bytes
+        ):
+            clave = next(k for k in self._manejadores if k != self._ultimo)
+            total -= self._manejadores.pop(clave).nbytes
+
+    def obtener(self, referencia, huella: str | None) -> Manejador | None:
+        """Manejador por id ("r2") o el más reciente ("previo"); None si no sirve."""
+        ref = normalizar(str(referencia or "")).strip()
+        clave = self._ultimo if ref in REFERENCIAS_PREVIO or ref in ("true", "1") else ref
+        manejador = self._manejadores.get(clave)
+        if manejador is None or manejador.huella != huella:
+            return None
+        self._manejadores.move_to_end(clave)
+        self.reutilizados += 1
+        return manejador
+
+    def contexto(self, huella: str | None, limite: int = EN_CONTEXTO) -> str:
+        """Resumen de los últimos resultados vigentes para el prompt del LLM."""
+        recientes = [m for m in self._manejadores.values() if m.huella == huella]
+        recientes.sort(key=lambda m: int(m.id[1:]), reverse=True)
+        lineas = []
+        for m in recientes[:limite]:
+            marca = " (previo)" if m.id == self._ultimo else ""
+            lineas.append(f"- {m.id}{marca}: {m.descripcion}")
+        return "\n".join(lineas)
+
+    def limpiar(self) -> None:
+        self._manejadores.clear()
+        self._ultimo = None
+
+    def estadisticas(self) -> dict:
+        return {
+            "entradas": len(self._manejadores),
+            "bytes": sum(m.nbytes for m in self._manejadores.values()),
+            "reutilizados": self.reutilizados,
+        }
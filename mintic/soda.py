@@ -0,0 +1,275 @@
+"""
+Ingesta paginada, concurrente e incremental del recurso SODA uzcf-b9dh.
+
+Cada página se pide en CSV ordenada por :id y se parsea en streaming con el
+lector de Arrow, de modo que nunca se mantiene el cuerpo JSON completo en
+memoria. La sincronización incremental solo descarga las filas actualizadas
+desde la última marca y las fusiona por `uid` con la copia local.
+Las páginas de la descarga completa y la sonda de cambios pasan por la caché
+HTTP condicional (mintic.http_cache): si el recurso no cambió, el servidor
+responde 304 y el cuerpo se lee del disco.
+"""
+
+import csv
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from mintic.datos import CACHE_DIR, escribir_arrow
+from mintic.http_cache import obtener_cache_http
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+SODA_DOMINIO = os.getenv("SODA_DOMINIO", "https://www.datos.gov.co")
+RECURSO = "uzcf-b9dh"
+TAM_PAGINA = 10000
+TRABAJADORES = 4
+TIMEOUT = 30
+
+CAMPO_ID = "uid"
+# Campo de sistema de SODA con la fecha de última modificación de la fila
+CAMPO_ACTUALIZACION = ":updated_at"
+
+SNAPSHOT = os.path.join(CACHE_DIR, f"soda-{RECURSO}.arrow")
+ESTADO = os.path.join(CACHE_DIR, f"soda-{RECURSO}.json")
+
+
+def url_recurso(formato: str = "csv") -> str:
+    return f"{SODA_DOMINIO}/resource/{RECURSO}.{formato}"
+
+
+# ======================================================
+# SESIÓN HTTP
+# ======================================================
+
+def crear_sesion(trabajadores: int = TRABAJADORES) -> requests.Session:
+    """Sesión con pool de conexiones keep-alive y reintentos con backoff."""
+    sesion = requests.Session()
+    reintentos = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=trabajadores, max_retries=reintentos)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    sesion.headers["Accept-Encoding"] = "gzip, deflate"
+
+    token = os.getenv("SODA_APP_TOKEN")
+    if token:
+        sesion.headers["X-App-Token"] = token
+    return sesion
+
+
+_SESION = None
+_LOCK_SESION = threading.Lock()
+
+
+def obtener_sesion() -> requests.Session:
+    """
+    Sesión única por proceso para las sondas y sincronizaciones: las
+    revalidaciones en segundo plano reutilizan sus conexiones keep-alive.
+    """
+    global _SESION
+    with _LOCK_SESION:
+        if _SESION is None:
+            _SESION = crear_sesion()
+        return _SESION
+
+
+# ======================================================
+# DESCARGA POR PÁGINAS
+# ======================================================
+
+def contar_filas(sesion: requests.Session, where: str | None = None) -> int:
+    params = {"$select": "count(*) AS n"}
+    if where:
+        params["$where"] = where
+    r = sesion.get(url_recurso("json"), params=params, timeout=TIMEOUT)
+    r.raise_for_status()
+    datos = r.json()
+    return int(datos[0]["n"]) if datos else 0
+
+
+def _leer_pagina_csv(flujo) -> pa.Table:
+    """
+    Parsea un cuerpo CSV en streaming. Todas las columnas se leen como texto
+    para que las páginas tengan el mismo esquema y se puedan concatenar.
+    """
+    cabecera = flujo.readline().decode("utf-8-sig")
+    if not cabecera.strip():
+        return pa.table({})
+    nombres = next(csv.reader([cabecera]))
+    lector = pacsv.open_csv(
+        flujo,
+        read_options=pacsv.ReadOptions(column_names=nombres, block_size=1 << 20),
+        convert_options=pacsv.ConvertOptions(
+            column_types={n: pa.string() for n in nombres},
+            strings_can_be_null=True,
+        ),
+    )
+    return pa.Table.from_batches(list(lector), schema=lector.schema)
+
+
+def descargar_pagina(sesion: requests.Session, offset: int, limite: int = TAM_PAGINA,
+                     where: str | None = None) -> pa.Table:
+    params = {
+        "$select": ":*, *",
+        "$order": ":id",
+        "$limit": limite,
+        "$offset": offset,
+    }
+    if where:
+        params["$where"] = where
+        # Las consultas incrementales no se repiten: van directo sin caché
+        with sesion.get(url_recurso("csv"), params=params, timeout=TIMEOUT, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            return _leer_pagina_csv(r.raw)
+
+    respuesta = obtener_cache_http().get(sesion, url_recurso("csv"), params, timeout=TIMEOUT)
+    with respuesta.abrir() as f:
+        return _leer_pagina_csv(f)
+
+
+def descargar(sesion: requests.Session | None = None, where: str | None = None,
+              trabajadores: int = TRABAJADORES, tam_pagina: int = TAM_PAGINA) -> pa.Table:
+    """
+    Descarga todas las filas (o las que cumplan `where`) pidiendo las páginas
+    en paralelo con un máximo de `trabajadores` conexiones simultáneas.
+    """
+    sesion = sesion or crear_sesion(trabajadores)
+    total = contar_filas(sesion, where)
+    if total == 0:
+        return pa.table({})
+
+    offsets = range(0, total, tam_pagina)
+    with ThreadPoolExecutor(max_workers=trabajadores) as pool:
+        paginas = list(pool.map(lambda off: descargar_pagina(sesion, off, tam_pagina, where), offsets))
+
+    paginas = [p for p in paginas if p.num_columns]
+    return pa.concat_tables(paginas, promote_options="default")
+
+
+# ======================================================
+# SONDA DE CAMBIOS
+# ======================================================
+
+def estado_remoto(sesion: requests.Session | None = None) -> dict:
+    """Filas y marca máxima de actualización del recurso (GET condicional)."""
+    sesion = sesion or obtener_sesion()
+    params = {"$select": f"count(*) AS n, max({CAMPO_ACTUALIZACION}) AS marca"}
+    datos = obtener_cache_http().get(sesion, url_recurso("json"), params, timeout=TIMEOUT).json()
+    fila = datos[0] if datos else {}
+    return {"filas": int(fila.get("n") or 0), "marca": fila.get("marca")}
+
+
+def hay_cambios(sesion: requests.Session | None = None) -> bool:
+    """
+    Compara el estado remoto con la última sincronización. Si el recurso no
+    cambió, la sonda se resuelve con un 304 y no se descarga nada más.
+    """
+    estado = _leer_estado()
+    if not estado or not os.path.exists(SNAPSHOT):
+        return True
+    remoto = estado_remoto(sesion)
+    return remoto["filas"] != estado.get("filas") or remoto["marca"] != estado.get("ultima_sync")
+
+
+def leer_snapshot() -> pa.Table | None:
+    """Última copia sincronizada en disco (None si no hay)."""
+    if not os.path.exists(SNAPSHOT):
+        return None
+    with pa.OSFile(SNAPSHOT, "rb") as f:
+        return pa.ipc.open_file(f).read_all()
+
+
+# ======================================================
+# SINCRONIZACIÓN INCREMENTAL
+# ======================================================
+
+def fusionar(previa: pa.Table, delta: pa.Table, campo_id: str = CAMPO_ID) -> pa.Table:
+    """Reemplaza en `previa` las filas cuyo id aparece en `delta` y añade las nuevas."""
+    if delta.num_rows == 0:
+        return previa
+    reemplazadas = pc.is_in(previa[campo_id], value_set=delta[campo_id])
+    conservadas = previa.filter(pc.invert(reemplazadas))
+    return pa.concat_tables([conservadas, delta], promote_options="default")
+
+
+def _marca_maxima(tabla: pa.Table) -> str | None:
+    if CAMPO_ACTUALIZACION not in tabla.column_names:
+        return None
+    # Las marcas ISO 8601 ordenan igual como texto que como fecha
+    return pc.max(tabla[CAMPO_ACTUALIZACION]).as_py()
+
+
+def _leer_estado() -> dict:
+    try:
+        with open(ESTADO, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar(tabla: pa.Table, marca: str | None) -> None:
+    escribir_arrow(tabla, SNAPSHOT)
+    # Atómico, como el snapshot: otro proceso nunca lee un estado a medio escribir
+    tmp = f"{ESTADO}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"ultima_sync": marca, "filas": tabla.num_rows}, f)
+    os.replace(tmp, ESTADO)
+
+
+def sincronizar(sesion: requests.Session | None = None, completo: bool = False) -> pa.Table:
+    """
+    Actualiza la copia local del inventario y la devuelve.
+
+    Sin copia previa (o con `completo=True`) hace una descarga completa; en otro
+    caso solo pide las filas con CAMPO_ACTUALIZACION posterior a la última
+    sincronización y las fusiona por `uid`. La fusión solo agrega o reemplaza
+    filas: si después quedan más filas que en el origen es que allí se
+    borraron algunas, y se hace una descarga completa.
+    """
+    sesion = sesion or obtener_sesion()
+    estado = _leer_estado()
+    marca = estado.get("ultima_sync")
+
+    if completo or not marca or not os.path.exists(SNAPSHOT):
+        tabla = descargar(sesion)
+    else:
+        # Se lee a memoria (no mmap) para poder reemplazar el archivo después
+        previa = leer_snapshot()
+        if CAMPO_ID not in previa.column_names:
+            tabla = descargar(sesion)
+        else:
+            remotas = contar_filas(sesion)
+            literal = marca.rstrip("Z").replace("'", "''")
+            delta = descargar(sesion, where=f"{CAMPO_ACTUALIZACION} > '{literal}'")
+            tabla = fusionar(previa, delta)
+            if tabla.num_rows > remotas:
+                tabla = descargar(sesion)
+
+    _guardar(tabla, _marca_maxima(tabla) or marca)
+    return tabla
+
+
+def huella_snapshot(tabla: pa.Table) -> str:
+    """Huella de una copia sincronizada: marca máxima + número de filas."""
+    return f"soda-{_marca_maxima(tabla)}-{tabla.num_rows}"
+
+
+def sin_campos_sistema(tabla: pa.Table) -> pa.Table:
+    """Quita las columnas de sistema de SODA (:id, :updated_at, ...)."""
+    return tabla.select([c for c in tabla.column_names if not c.startswith(":")])
@@ -0,0 +1,326 @@
+"""
+Ejecución en el servidor (SoQL) de las instrucciones del chatbot en modo API.
+
+Las acciones tabla, filtrar y graficar (count/sum) se traducen a una consulta
+SoQL ($select, $where, $group, $order, $limit) sobre el recurso uzcf-b9dh, de
+modo que solo viaja el resultado agregado o las N filas visibles. Los tipos
+de cada columna se toman de la copia local (misma fuente, mismos nombres de
+campo). Los resultados se guardan por consulta en memoria durante unos
+minutos y en disco con revalidación condicional (mintic.http_cache).
+
+Si la instrucción no se puede traducir (buscar, graficar sin agregación,
+operadores sin equivalente) o el servidor falla, `ejecutar` devuelve None y
+la instrucción se resuelve con el motor local (mintic.motor).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from mintic import soda, trazas
+from mintic.fechas import parsear
+from mintic.http_cache import obtener_cache_http
+from mintic.indices import OPERADORES_RANGO, describir_filtro, es_ordenable
+from mintic.motor import FILAS_VISIBLES, TIPOS_GRAFICO, Resultado
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+ACTIVO = os.getenv("MINTIC_SOQL", "1") != "0"
+TTL = 300                # segundos que un resultado se sirve sin preguntar al servidor
+MAX_ENTRADAS = 256
+TIMEOUT = 15
+# Límite de grupos en una agregación (SODA devuelve 1000 por defecto)
+MAX_GRUPOS = 50_000
+
+log = logging.getLogger(__name__)
+
+
+class NoTraducible(ValueError):
+    """La instrucción no tiene equivalente SoQL; se ejecuta en local."""
+
+
+# ======================================================
+# TRADUCCIÓN A SOQL
+# ======================================================
+
+def identificador(columna: str) -> str:
+    return f"`{columna}`"
+
+
+def literal(valor, serie: pd.Series) -> str:
+    """Literal SoQL del valor según el tipo de la columna local."""
+    if pd.api.types.is_bool_dtype(serie):
+        return "true" if str(valor).strip().lower() in ("true", "1", "si", "sí") else "false"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        # En el recurso las fechas son texto (MM/DD/YYYY ...): compararlas en el
+        # servidor daría un orden alfabético, así que se resuelven en local
+        raise NoTraducible("condición sobre fecha")
+    if pd.api.types.is_numeric_dtype(serie):
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError) as e:
+            raise NoTraducible(f"número inválido: {valor}") from e
+        return str(int(numero)) if numero.is_integer() else repr(numero)
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def condicion(df: pd.DataFrame, cond: dict) -> str:
+    """Una condición de 'filtrar' (mismos operadores que mintic.indices) como SoQL."""
+    if not isinstance(cond, dict):
+        raise NoTraducible("condición no es un objeto")
+    col = cond.get("columna")
+    if col not in df.columns:
+        raise NoTraducible(f"columna inexistente: {col}")
+    serie = df[col]
+    campo = identificador(col)
+    operador = cond.get("operador", "=")
+    valor = cond.get("valor")
+    ordenable = es_ordenable(serie)
+
+    if operador in ("=", "==", "igual"):
+        if ordenable or pd.api.types.is_bool_dtype(serie):
+            return f"{campo} = {literal(valor, serie)}"
+        # Igualdad sin distinguir mayúsculas, como el índice local
+        return f"upper({campo}) = upper({literal(valor, serie)})"
+    if operador == "prefijo" and not ordenable:
+        return f"starts_with(upper({campo}), upper({literal(valor, serie)}))"
+    if operador in OPERADORES_RANGO and ordenable:
+        if operador == "entre":
+            return f"{campo} between {literal(valor, serie)} and {literal(cond.get('hasta'), serie)}"
+        return f"{campo} {operador} {literal(valor, serie)}"
+    raise NoTraducible(f"operador '{operador}' sobre '{col}'")
+
+
+def where(df: pd.DataFrame, obj: dict) -> str:
+    condiciones = obj.get("condiciones") or [obj]
+    if not isinstance(condiciones, list):
+        raise NoTraducible("condiciones no es una lista")
+    union = " OR " if str(obj.get("logica", "and")).lower() == "or" else " AND "
+    return union.join(f"({condicion(df, c)})" for c in condiciones)
+
+
+def es_numerica(serie: pd.Series) -> bool:
+    """Números de verdad: ni fechas (ordenables, pero no sumables) ni booleanos."""
+    return (
+        pd.api.types.is_numeric_dtype(serie)
+        and not pd.api.types.is_bool_dtype(serie)
+        and not pd.api.types.is_datetime64_any_dtype(serie)
+    )
+
+
+def orden(df: pd.DataFrame, obj: dict) -> str:
+    """
+    $order de una tabla o filtro. Sin "orden" válido se usa el orden del
+    portal (:id), que es el de la copia local. Solo se ordena en el servidor
+    por columnas numéricas: el texto y las fechas (texto en el recurso) se
+    comparan distinto que en local, y en orden descendente los nulos quedarían
+    primero (y al revés según el motor), así que una columna con nulos se
+    ordena en local.
+    """
+    columna = obj.get("orden")
+    if columna not in df.columns:
+        return ":id"
+    serie = df[columna]
+    if not es_numerica(serie) or serie.hasnans:
+        raise NoTraducible(f"orden por '{columna}'")
+    if not obj.get("descendente"):
+        return f"{identificador(columna)} ASC, :id"
+    # Mismo desempate que el índice local recorrido al revés
+    return f"{identificador(columna)} DESC, :id DESC"
+
+
+def traducir(df: pd.DataFrame, obj: dict, n_filas: int = FILAS_VISIBLES) -> dict:
+    """
+    Consultas SoQL de la instrucción: {"datos": params} y, para filtrar,
+    también {"total": params} con el conteo. Lanza NoTraducible si no aplica.
+    """
+    if not isinstance(obj, dict):
+        raise NoTraducible("instrucción no es un objeto")
+    accion = obj.get("accion")
+
+    if accion == "tabla":
+        columnas = [c for c in obj.get("columnas", []) if c in df.columns]
+        if not columnas:
+            raise NoTraducible("sin columnas válidas")
+        return {"datos": {
+            "$select": ", ".join(identificador(c) for c in columnas),
+            "$order": orden(df, obj),
+            "$limit": n_filas,
+        }}
+
+    if accion == "filtrar":
+        filtro = where(df, obj)
+        return {
+            "datos": {"$where": filtro, "$order": orden(df, obj), "$limit": n_filas},
+            "total": {"$select": "count(*) AS n", "$where": filtro},
+        }
+
+    if accion == "graficar":
+        x, y = obj.get("x"), obj.get("y")
+        agg = obj.get("agregacion", "count")
+        if x not in df.columns or obj.get("tipo") not in TIPOS_GRAFICO:
+            raise NoTraducible("gráfico inválido")
+        campo = identificador(x)
+        base = {"$group": campo, "$where": f"{campo} IS NOT NULL", "$order": campo, "$limit": MAX_GRUPOS}
+        if agg == "count":
+            return {"datos": {"$select": f"{campo}, count(*) AS valor", **base}}
+        if agg == "sum" and y in df.columns and es_numerica(df[y]):
+            return {"datos": {"$select": f"{campo}, sum({identificador(y)}) AS suma", **base}}
+        raise NoTraducible(f"agregación '{agg}'")
+
+    raise NoTraducible(f"acción '{accion}'")
+
+
+def con_tipos(datos: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columnas del resultado con los dtypes de la copia local: en JSON, SODA
+    entrega números, fechas y booleanos como texto.
+    """
+    tipadas = {}
+    for col in datos.columns:
+        destino = df[col].dtype
+        serie = datos[col]
+        if pd.api.types.is_bool_dtype(destino):
+            serie = serie.map({"true": True, "false": False}, na_action="ignore")
+        elif pd.api.types.is_datetime64_any_dtype(destino):
+            fechas, _ = parsear(pa.array(serie.astype("string"), type=pa.string()), col)
+            serie = pd.Series(fechas.to_pandas(), index=serie.index)
+        elif pd.api.types.is_numeric_dtype(destino):
+            serie = pd.to_numeric(serie, errors="coerce")
+        tipadas[col] = serie.astype(destino)
+    return pd.DataFrame(tipadas, index=datos.index)
+
+
+# ======================================================
+# CONSULTA CON CACHÉ
+# ======================================================
+
+class ClienteSoql:
+    def __init__(self, ttl: float = TTL, max_entradas: int = MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.consultas = 0
+        self.respaldos = 0
+        self._sesion = None
+        self._resultados: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _obtener_sesion(self) -> requests.Session:
+        with self._lock:
+            if self._sesion is None:
+                self._sesion = soda.crear_sesion(2)
+            return self._sesion
+
+    def consultar(self, params: dict) -> list:
+        """Filas JSON de la consulta; reutiliza el resultado durante `ttl` segundos."""
+        clave = tuple(sorted((k, str(v)) for k, v in params.items()))
+        ahora = time.time()
+        with self._lock:
+            guardado = self._resultados.get(clave)
+            if guardado is not None and guardado[0] > ahora:
+                self._resultados.move_to_end(clave)
+                self.aciertos += 1
+                trazas.sumar(cache_soql_aciertos=1)
+                return guardado[1]
+
+        # Pasado el TTL se revalida con un GET condicional (304 si no cambió)
+        respuesta = obtener_cache_http().get(
+            self._obtener_sesion(), soda.url_recurso("json"), params, timeout=TIMEOUT
+        )
+        filas = respuesta.json()
+        trazas.sumar(cache_soql_fallos=1, bytes_soql=os.path.getsize(respuesta.ruta))
+        with self._lock:
+            self.consultas += 1
+            self._resultados[clave] = (ahora + self.ttl, filas)
+            self._resultados.move_to_end(clave)
+            while len(self._resultados) > self.max_entradas:
+                self._resultados.popitem(last=False)
+        return filas
+
+    def ejecutar(self, df: pd.DataFrame, obj: dict, n_filas: int = FILAS_VISIBLES) -> Resultado | None:
+        """
+        Ejecuta la instrucción en el servidor. Devuelve None si hay que
+        resolverla en local (no traducible, error del servidor o filtro sin
+        filas, que en local no distingue tildes).
+        """
+        try:
+            consultas = traducir(df, obj, n_filas)
+        except NoTraducible as e:
+            log.debug("soql: se ejecuta en local (%s)", e)
+            return None
+
+        try:
+            with trazas.etapa("soql", accion=obj.get("accion")):
+                filas = self.consultar(consultas["datos"])
+                total = None
+                if "total" in consultas:
+                    conteo = self.consultar(consultas["total"])
+                    total = int(conteo[0]["n"]) if conteo else 0
+        except (requests.RequestException, ValueError, KeyError) as e:
+            log.warning("soql: falló la consulta, se ejecuta en local: %s", e)
+            with self._lock:
+                self.respaldos += 1
+            return None
+
+        accion = obj["accion"]
+        if accion == "tabla":
+            columnas = [c for c in obj["columnas"] if c in df.columns]
+            return Resultado("tabla", datos=con_tipos(pd.DataFrame(filas, columns=columnas), df))
+
+        if accion == "filtrar":
+            if not total:
+                with self._lock:
+                    self.respaldos += 1
+                return None
+            return Resultado(
+                "tabla",
+                # SODA omite los campos nulos en JSON: se completan las columnas
+                datos=con_tipos(pd.DataFrame(filas).reindex(columns=df.columns), df),
+                mensaje=(
+                    f"{total} filas donde {describir_filtro(obj)} "
+                    f"(mostrando primeras {n_filas})."
+                ),
+            )
+
+        x, y = obj["x"], obj.get("y")
+        datos = pd.DataFrame(filas).reindex(columns=[x, "valor", "suma"])
+        ejes = con_tipos(datos[[x]], df)[x]
+        if isinstance(ejes.dtype, pd.CategoricalDtype):
+            # Como motor.contar_por: los valores de las categorías, no el Categorical
+            ejes = ejes.astype(ejes.cat.categories.dtype)
+        if obj.get("agregacion", "count") == "count":
+            datos = pd.DataFrame({x: ejes, "valor": pd.to_numeric(datos["valor"]).astype("int64")})
+            return Resultado("grafico", datos=datos, tipo=obj["tipo"], x=x, y="valor")
+        datos = pd.DataFrame({x: ejes, y: pd.to_numeric(datos["suma"]).astype("float64")})
+        return Resultado("grafico", datos=datos, tipo=obj["tipo"], x=x, y=y)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "consultas": self.consultas,
+                "respaldos_locales": self.respaldos,
+                "entradas": len(self._resultados),
+            }
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_cliente_soql() -> ClienteSoql:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = ClienteSoql()
+        return _INSTANCIA
@@ -0,0 +1,24 @@
+"""
+Normalización de texto compartida (tildes, mayúsculas y espacios).
+"""
+
+import re
+import unicodedata
+
+
+def sin_tildes(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def colapsar_espacios(texto: str) -> str:
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def normalizar(texto: str) -> str:
+    """Sin tildes, en minúsculas (casefold) y con espacios colapsados."""
+    return colapsar_espacios(sin_tildes(str(texto)).casefold())
+
+
+def palabras(texto: str) -> list:
+    """Palabras alfanuméricas normalizadas."""
+    return re.findall(r"[a-z0-9]+", normalizar(texto))
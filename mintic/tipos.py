@@ -0,0 +1,256 @@
+"""
+Plan de tipos del inventario para reducir memoria por sesión.
+
+Cada columna recibe un tipo según su nombre y su contenido:
+- categoria: columnas repetitivas (Dueño, Dominio, Tipo, Licencia, Sector...)
+  como diccionario Arrow → pd.Categorical.
+- entero: conteos (Vistas, Descargas, Número de Filas...) como Int64 nullable.
+- fecha: las columnas "(UTC)" y demás fechas ya parseadas a datetime UTC
+  (formatos detectados por mintic.fechas).
+- booleano: banderas true/false (Público...) como boolean nullable.
+- texto: el resto se deja como está.
+
+El plan se aplica sobre la tabla Arrow antes de escribir la caché columnar,
+así que el costo se paga una vez por versión del dataset.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from mintic import fechas as _fechas
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+# Subir al cambiar el plan invalida las cachés Arrow ya escritas
+VERSION_PLAN = "3"
+
+# Nulos por columna del texto original: la completitud se mide antes de tipar
+CLAVE_NULOS = b"mintic.nulos_originales"
+
+COLUMNAS_CATEGORIA = [
+    "Dueño", "Dominio", "Tipo", "Categoría", "Licencia", "Origen",
+    "Etapa de publicación", "Estado de aprobación",
+    "Información de la Entidad: Sector",
+    "Información de la Entidad: Departamento",
+    "Información de la Entidad: Municipio",
+    "Información de la Entidad: Orden",
+    "Información de datos: Idioma",
+    "Información de datos: Frecuencia de actualización",
+]
+COLUMNAS_ENTERO = ["Vistas", "Descargas", "Número de Filas", "Número de Columnas"]
+COLUMNAS_BOOLEANO = ["Público", "Recurso derivado"]
+COLUMNAS_FECHA = ["Common Core: Last Update", "Common Core: Issued"]
+
+# Fracción máxima de valores distintos para tratar una columna de texto como categoría
+MAX_PROPORCION_CATEGORIA = 0.05
+MUESTRA = 10000
+HILOS = min(4, os.cpu_count() or 1)
+# Fracción mínima de la muestra que deben cubrir los formatos detectados
+MIN_COBERTURA_FECHA = 0.5
+
+VALORES_BOOLEANOS = {"true", "false"}
+
+
+def _clave(nombre: str) -> str:
+    """Nombre comparable entre CSV y API ('Número de Filas' ≈ 'número_de_filas')."""
+    return nombre.strip().lower().replace(" ", "_")
+
+
+_CATEGORIA = {_clave(c) for c in COLUMNAS_CATEGORIA}
+_ENTERO = {_clave(c) for c in COLUMNAS_ENTERO}
+_BOOLEANO = {_clave(c) for c in COLUMNAS_BOOLEANO}
+_FECHA = {_clave(c) for c in COLUMNAS_FECHA}
+
+
+# ======================================================
+# PLAN
+# ======================================================
+
+def es_columna_fecha(nombre: str) -> bool:
+    # CSV: 'Fecha de creación (UTC)'; API: 'fecha_de_creaci_n_utc'
+    minusculas = nombre.lower()
+    return (
+        "(utc)" in minusculas or minusculas.endswith("_utc")
+        or "fecha" in minusculas or _clave(nombre) in _FECHA
+    )
+
+
+def _muestra(columna: pa.ChunkedArray) -> pa.Array:
+    return pc.drop_null(columna.slice(0, MUESTRA)).combine_chunks()
+
+
+def _parece_fecha(nombre: str, columna: pa.ChunkedArray) -> bool:
+    muestra = _muestra(columna)
+    if not len(muestra):
+        return False
+    _, reporte = _fechas.parsear(muestra, nombre)
+    return reporte.parseadas >= MIN_COBERTURA_FECHA * (reporte.total - reporte.nulos)
+
+
+def tipo_columna(nombre: str, columna: pa.ChunkedArray) -> str:
+    """Tipo destino de una columna: categoria | entero | fecha | booleano | texto."""
+    tipo = columna.type
+    clave = _clave(nombre)
+
+    if pa.types.is_boolean(tipo):
+        return "booleano"
+    if pa.types.is_timestamp(tipo):
+        return "fecha"
+    if pa.types.is_integer(tipo) or clave in _ENTERO:
+        return "entero"
+    if pa.types.is_dictionary(tipo):
+        return "categoria"
+    if not (pa.types.is_string(tipo) or pa.types.is_large_string(tipo)):
+        return "texto"
+
+    if es_columna_fecha(nombre) and _parece_fecha(nombre, columna):
+        return "fecha"
+    if clave in _BOOLEANO:
+        return "booleano"
+    if clave in _CATEGORIA:
+        return "categoria"
+
+    muestra = _muestra(columna)
+    if not len(muestra):
+        return "texto"
+    distintos = pc.unique(muestra)
+    if len(distintos) <= 2 and {v.lower() for v in distintos.to_pylist()} <= VALORES_BOOLEANOS:
+        return "booleano"
+    if len(distintos) <= max(2, MAX_PROPORCION_CATEGORIA * len(muestra)):
+        return "categoria"
+    return "texto"
+
+
+def planear(tabla: pa.Table) -> dict:
+    """Devuelve {columna: tipo} para toda la tabla."""
+    return {nombre: tipo_columna(nombre, tabla.column(nombre)) for nombre in tabla.column_names}
+
+
+# ======================================================
+# APLICACIÓN
+# ======================================================
+
+def _convertir(columna: pa.ChunkedArray, tipo: str, nombre: str = ""):
+    """Columna convertida; las fechas de texto devuelven además su reporte de parseo."""
+    if tipo == "categoria":
+        return columna if pa.types.is_dictionary(columna.type) else pc.dictionary_encode(columna)
+
+    if tipo == "entero":
+        if pa.types.is_integer(columna.type):
+            return columna.cast(pa.int64())
+        if pa.types.is_floating(columna.type):
+            return columna.cast(pa.int64(), safe=False)
+        # Texto: se limpian separadores de miles; lo no numérico queda nulo
+        limpio = pc.replace_substring(pc.utf8_trim_whitespace(columna), ",", "")
+        numerico = pc.match_substring_regex(limpio, r"^-?\d+$")
+        return pc.if_else(numerico, limpio, None).cast(pa.int64())
+
+    if tipo == "booleano":
+        if pa.types.is_boolean(columna.type):
+            return columna
+        minusculas = pc.utf8_lower(pc.utf8_trim_whitespace(columna))
+        return pc.if_else(
+            pc.is_in(minusculas, value_set=pa.array(sorted(VALORES_BOOLEANOS))),
+            pc.equal(minusculas, "true"),
+            None,
+        )
+
+    if tipo == "fecha":
+        if not pa.types.is_timestamp(columna.type):
+            return _fechas.parsear(columna, nombre)
+        # Sin zona se asume UTC (el cast conserva los valores)
+        return columna.cast(pa.timestamp("ns", tz=columna.type.tz or "UTC"))
+
+    return columna
+
+
+def aplicar(tabla: pa.Table, plan: dict | None = None) -> pa.Table:
+    """Convierte la tabla según el plan (por defecto, el que sugiere `planear`)."""
+    plan = plan or planear(tabla)
+
+    def convertir(nombre):
+        columna = tabla.column(nombre)
+        try:
+            return _convertir(columna, plan.get(nombre, "texto"), nombre)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, TypeError):
+            return columna  # si algo no convierte, la columna se conserva tal cual
+
+    # Los kernels de Arrow liberan el GIL: las columnas se convierten en paralelo
+    with ThreadPoolExecutor(HILOS) as ex:
+        convertidas = list(ex.map(convertir, tabla.column_names))
+    reportes = [c[1] for c in convertidas if isinstance(c, tuple)]
+    columnas = [c[0] if isinstance(c, tuple) else c for c in convertidas]
+
+    # Los valores que no convierten (fechas o enteros inválidos) quedan nulos;
+    # se guardan los nulos del texto para que la completitud no cambie al tipar
+    nulos = {c: tabla.column(c).null_count for c in tabla.column_names}
+
+    # Un solo diccionario por columna: el formato IPC no admite reemplazarlos entre lotes
+    tabla = pa.table(columnas, names=tabla.column_names).unify_dictionaries()
+    tabla = tabla.replace_schema_metadata({CLAVE_NULOS: json.dumps(nulos).encode("utf-8")})
+    # Los reportes de fechas quedan en los metadatos, junto a la caché versionada
+    return _fechas.con_reportes(tabla, reportes)
+
+
+def nulos_originales(tabla_o_esquema) -> dict:
+    """Nulos por columna antes de aplicar el plan ({} si la tabla no los trae)."""
+    esquema = getattr(tabla_o_esquema, "schema", tabla_o_esquema)
+    crudo = (esquema.metadata or {}).get(CLAVE_NULOS)
+    return json.loads(crudo) if crudo else {}
+
+
+def _tipo_pandas(tipo: pa.DataType):
+    if pa.types.is_integer(tipo):
+        return pd.Int64Dtype()
+    if pa.types.is_boolean(tipo):
+        return pd.BooleanDtype()
+    return None
+
+
+def a_pandas(tabla: pa.Table) -> pd.DataFrame:
+    """DataFrame con enteros y booleanos nullable; los diccionarios salen como Categorical."""
+    return tabla.to_pandas(types_mapper=_tipo_pandas)
+
+
+# ======================================================
+# REPORTE DE MEMORIA
+# ======================================================
+
+def reporte_memoria(antes: pd.DataFrame, despues: pd.DataFrame) -> pd.DataFrame:
+    """Memoria por columna antes y después del plan (bytes, incluidos los objetos)."""
+    bytes_antes = antes.memory_usage(index=False, deep=True)
+    bytes_despues = despues.memory_usage(index=False, deep=True)
+    reporte = pd.DataFrame({
+        "tipo_antes": antes.dtypes.astype(str),
+        "tipo_despues": despues.dtypes.reindex(antes.columns).astype(str),
+        "bytes_antes": bytes_antes,
+        "bytes_despues": bytes_despues.reindex(antes.columns),
+    })
+    reporte["reduccion"] = (reporte["bytes_antes"] / reporte["bytes_despues"]).round(2)
+    total = pd.DataFrame(
+        {
+            "tipo_antes": [""],
+            "tipo_despues": [""],
+            "bytes_antes": [bytes_antes.sum()],
+            "bytes_despues": [bytes_despues.sum()],
+            "reduccion": [round(bytes_antes.sum() / bytes_despues.sum(), 2)],
+        },
+        index=["TOTAL"],
+    )
+    return pd.concat([reporte.sort_values("bytes_antes", ascending=False), total])
+
+
+if __name__ == "__main__":
+    from mintic.datos import CSV_PATH, cargar_inventario, leer_csv
+
+    crudo = leer_csv(CSV_PATH).to_pandas()
+    optimizado = cargar_inventario()
+    pd.set_option("display.width", 160)
+    print(reporte_memoria(crudo, optimizado).to_string())
@@ -0,0 +1,378 @@
+"""
+Trazas por petición: tiempo de cada etapa, tokens, tamaños y aciertos de caché.
+
+Cada pregunta (texto o voz) abre una traza y las etapas que recorre (carga de
+datos, LLM, parseo del JSON, motor, render, Whisper, TTS) se cronometran con
+`etapa(...)`. Al cerrarse, la traza se agrega a un registro del proceso que
+alimenta el panel de rendimiento, se exporta como una línea JSON y se expone
+en formato de texto de Prometheus. Desactivadas (MINTIC_TRAZAS=0), `traza` y
+`etapa` devuelven objetos vacíos y el costo es una consulta a una ContextVar.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+ACTIVO = os.getenv("MINTIC_TRAZAS", "1") != "0"
+# Archivo JSON lines donde se agrega cada traza cerrada (vacío = no se exporta)
+ARCHIVO = os.getenv("MINTIC_TRAZAS_ARCHIVO", "")
+# Puerto del endpoint /metrics en formato Prometheus (vacío = no se levanta)
+PUERTO_METRICAS = os.getenv("MINTIC_METRICAS_PUERTO", "")
+
+MAX_RECIENTES = 200
+# Límites (segundos) de los histogramas por etapa
+CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ACTUAL: ContextVar = ContextVar("mintic_traza", default=None)
+
+
+# ======================================================
+# TRAZA Y ETAPAS
+# ======================================================
+
+class _Etapa:
+    """Cronometra un bloque y lo agrega a la traza al salir."""
+
+    __slots__ = ("traza", "nombre", "atributos", "inicio")
+
+    def __init__(self, traza, nombre: str, atributos: dict):
+        self.traza = traza
+        self.nombre = nombre
+        self.atributos = atributos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        fin = time.perf_counter()
+        if tipo is not None:
+            self.atributos["error"] = tipo.__name__
+        self.traza.agregar_etapa(self.nombre, self.inicio, fin - self.inicio, self.atributos)
+        return False
+
+    def anotar(self, **atributos) -> None:
+        self.atributos.update(atributos)
+
+
+class Traza:
+    """Una petición: etapas cronometradas, atributos y contadores."""
+
+    def __init__(self, tipo: str, registro=None, **atributos):
+        self.id = uuid.uuid4().hex[:12]
+        self.tipo = tipo
+        self.registro = registro
+        self.atributos = atributos
+        self.contadores: dict = {}
+        self.etapas: list = []
+        self.marca = time.time()
+        self.inicio = time.perf_counter()
+        self.duracion = None
+        self._lock = threading.Lock()
+        self._token = None
+
+    # --- uso como contexto: la traza queda como actual del hilo ---
+    def __enter__(self):
+        self._token = _ACTUAL.set(self)
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        _ACTUAL.reset(self._token)
+        if tipo is not None:
+            self.atributos["error"] = tipo.__name__
+        self.cerrar()
+        return False
+
+    def etapa(self, nombre: str, **atributos) -> _Etapa:
+        return _Etapa(self, nombre, atributos)
+
+    def agregar_etapa(self, nombre: str, inicio: float, segundos: float, atributos: dict) -> None:
+        # Las etapas de TTS llegan desde hilos del pipeline de voz
+        with self._lock:
+            self.etapas.append({
+                "etapa": nombre,
+                "desde_ms": round((inicio - self.inicio) * 1000, 2),
+                "ms": round(segundos * 1000, 2),
+                **atributos,
+            })
+
+    def anotar(self, **atributos) -> None:
+        self.atributos.update(atributos)
+
+    def sumar(self, **contadores) -> None:
+        with self._lock:
+            for nombre, valor in contadores.items():
+                self.contadores[nombre] = self.contadores.get(nombre, 0) + (valor or 0)
+
+    def cerrar(self) -> None:
+        if self.duracion is not None:
+            return
+        self.duracion = time.perf_counter() - self.inicio
+        if self.registro is not None:
+            self.registro.registrar(self)
+
+    def a_dict(self) -> dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "tipo": self.tipo,
+                "marca": round(self.marca, 3),
+                "ms": round((self.duracion or 0) * 1000, 2),
+                **self.atributos,
+                "contadores": dict(self.contadores),
+                "etapas": list(self.etapas),
+            }
+
+
+class _TrazaNula:
+    """Sustituto sin costo cuando las trazas están desactivadas o no hay traza actual."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        return False
+
+    def etapa(self, nombre: str, **atributos):
+        return self
+
+    def anotar(self, **atributos) -> None:
+        pass
+
+    def sumar(self, **contadores) -> None:
+        pass
+
+
+_NULA = _TrazaNula()
+
+
+# ======================================================
+# REGISTRO DEL PROCESO
+# ======================================================
+
+class Registro:
+    """
+    Acumula las trazas cerradas: las últimas N para el panel, histogramas por
+    etapa y contadores totales para Prometheus, y opcionalmente un archivo JSONL.
+    """
+
+    def __init__(self, max_recientes: int = MAX_RECIENTES, archivo: str = ARCHIVO):
+        self.archivo = archivo
+        self.recientes: deque = deque(maxlen=max_recientes)
+        self.trazas_por_tipo: dict = {}
+        self.cubetas: dict = {}           # etapa → conteos por cubeta (+Inf al final)
+        self.suma_etapas: dict = {}
+        self.conteo_etapas: dict = {}
+        self.contadores: dict = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, traza: Traza) -> None:
+        datos = traza.a_dict()
+        with self._lock:
+            self.recientes.append(datos)
+            self.trazas_por_tipo[traza.tipo] = self.trazas_por_tipo.get(traza.tipo, 0) + 1
+            for e in datos["etapas"]:
+                self._observar(e["etapa"], e["ms"] / 1000)
+            self._observar("total_" + traza.tipo, traza.duracion)
+            for nombre, valor in datos["contadores"].items():
+                self.contadores[nombre] = self.contadores.get(nombre, 0) + valor
+            if self.archivo:
+                self._exportar(datos)
+
+    def _observar(self, etapa: str, segundos: float) -> None:
+        cubetas = self.cubetas.setdefault(etapa, [0] * (len(CUBETAS) + 1))
+        for i, limite in enumerate(CUBETAS):
+            if segundos <= limite:
+                cubetas[i] += 1
+                break
+        else:
+            cubetas[-1] += 1
+        self.suma_etapas[etapa] = self.suma_etapas.get(etapa, 0.0) + segundos
+        self.conteo_etapas[etapa] = self.conteo_etapas.get(etapa, 0) + 1
+
+    def _exportar(self, datos: dict) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.archivo) or ".", exist_ok=True)
+            with open(self.archivo, "a", encoding="utf-8") as f:
+                f.write(json.dumps(datos, ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            pass
+
+    # --------------------- consultas ---------------------
+
+    def ultimas(self, n: int = 20) -> list:
+        with self._lock:
+            return list(self.recientes)[-n:][::-1]
+
+    def jsonl(self) -> str:
+        """Las trazas recientes como JSON lines (para descargar desde el panel)."""
+        with self._lock:
+            return "".join(
+                json.dumps(d, ensure_ascii=False, default=str) + "\n" for d in self.recientes
+            )
+
+    def resumen_etapas(self) -> list:
+        """p50/p95/máximo por etapa sobre las trazas recientes."""
+        with self._lock:
+            por_etapa: dict = {}
+            for d in self.recientes:
+                for e in d["etapas"]:
+                    por_etapa.setdefault(e["etapa"], []).append(e["ms"])
+                por_etapa.setdefault("total_" + d["tipo"], []).append(d["ms"])
+
+        filas = []
+        for etapa, valores in sorted(por_etapa.items()):
+            valores.sort()
+            filas.append({
+                "etapa": etapa,
+                "n": len(valores),
+                "p50_ms": _percentil(valores, 0.50),
+                "p95_ms": _percentil(valores, 0.95),
+                "max_ms": valores[-1],
+            })
+        return filas
+
+    def prometheus(self, extra: dict | None = None) -> str:
+        """
+        Estado del registro en formato de texto de Prometheus.
+        `extra` agrega gauges sueltos (nombre → valor), p. ej. tamaños de caché.
+        """
+        lineas = []
+        with self._lock:
+            lineas.append("# HELP mintic_trazas_total Peticiones trazadas por tipo.")
+            lineas.append("# TYPE mintic_trazas_total counter")
+            for tipo, n in sorted(self.trazas_por_tipo.items()):
+                lineas.append(f'mintic_trazas_total{{tipo="{tipo}"}} {n}')
+
+            lineas.append("# HELP mintic_etapa_segundos Duración de cada etapa de una petición.")
+            lineas.append("# TYPE mintic_etapa_segundos histogram")
+            for etapa in sorted(self.cubetas):
+                acumulado = 0
+                for limite, n in zip(CUBETAS + ("+Inf",), self.cubetas[etapa]):
+                    acumulado += n
+                    lineas.append(f'mintic_etapa_segundos_bucket{{etapa="{etapa}",le="{limite}"}} {acumulado}')
+                lineas.append(f'mintic_etapa_segundos_sum{{etapa="{etapa}"}} {self.suma_etapas[etapa]:.6f}')
+                lineas.append(f'mintic_etapa_segundos_count{{etapa="{etapa}"}} {self.conteo_etapas[etapa]}')
+
+            for nombre, valor in sorted(self.contadores.items()):
+                lineas.append(f"# TYPE mintic_{nombre}_total counter")
+                lineas.append(f"mintic_{nombre}_total {valor}")
+
+        for nombre, valor in sorted((extra or {}).items()):
+            lineas.append(f"# TYPE mintic_{nombre} gauge")
+            lineas.append(f"mintic_{nombre} {valor}")
+        return "\n".join(lineas) + "\n"
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self.recientes.clear()
+            self.trazas_por_tipo.clear()
+            self.cubetas.clear()
+            self.suma_etapas.clear()
+            self.conteo_etapas.clear()
+            self.contadores.clear()
+
+
+def _percentil(ordenados: list, q: float) -> float:
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+_INSTANCIA = None
+_LOCK_INSTANCIA = threading.Lock()
+
+
+def obtener_registro() -> Registro:
+    """Instancia única por proceso, compartida por todas las sesiones."""
+    global _INSTANCIA
+    with _LOCK_INSTANCIA:
+        if _INSTANCIA is None:
+            _INSTANCIA = Registro()
+        return _INSTANCIA
+
+
+# ======================================================
+# API DE INSTRUMENTACIÓN
+# ======================================================
+
+def traza(tipo: str, **atributos):
+    """Abre una traza nueva; usar con `with` para que quede como la actual."""
+    if not ACTIVO:
+        return _NULA
+    return Traza(tipo, obtener_registro(), **atributos)
+
+
+def actual():
+    """Traza en curso del hilo (o el sustituto nulo)."""
+    return _ACTUAL.get() or _NULA
+
+
+def etapa(nombre: str, **atributos):
+    """Cronometra un bloque dentro de la traza en curso (no hace nada si no la hay)."""
+    t = _ACTUAL.get()
+    if t is None:
+        return _NULA
+    return t.etapa(nombre, **atributos)
+
+
+def anotar(**atributos) -> None:
+    t = _ACTUAL.get()
+    if t is not None:
+        t.anotar(**atributos)
+
+
+def sumar(**contadores) -> None:
+    t = _ACTUAL.get()
+    if t is not None:
+        t.sumar(**contadores)
+
+
+# ======================================================
+# ENDPOINT PROMETHEUS
+# ======================================================
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    extra = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        cuerpo = obtener_registro().prometheus(self.extra() if self.extra else None).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+_SERVIDOR = None
+
+
+def servir_metricas(puerto: int, extra=None) -> ThreadingHTTPServer | None:
+    """
+    Levanta (una sola vez por proceso) un hilo con GET /metrics.
+    `extra` es una función sin argumentos que devuelve gauges adicionales.
+    """
+    global _SERVIDOR
+    with _LOCK_INSTANCIA:
+        if _SERVIDOR is None:
+            manejador = type("Manejador", (_ManejadorMetricas,), {"extra": staticmethod(extra) if extra else None})
+            try:
+                _SERVIDOR = ThreadingHTTPServer(("0.0.0.0", int(puerto)), manejador)
+            except OSError:
+                # Otro proceso ya tiene el puerto; las métricas siguen en el panel
+                return None
+            threading.Thread(target=_SERVIDOR.serve_forever, daemon=True, name="mintic-metricas").start()
+        return _SERVIDOR
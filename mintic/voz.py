@@ -0,0 +1,275 @@
+"""
+Ruta de voz en memoria: Whisper → LLM en streaming → TTS por oraciones.
+
+El audio grabado se envía a Whisper desde un buffer y cada oración completa
+de la respuesta se sintetiza en paralelo mientras el LLM sigue generando, de
+modo que el primer audio suena antes de que termine la respuesta.
+
+Las instrucciones JSON no se leen en voz alta: se habla un resumen corto del
+resultado ya ejecutado ("Hay 12 valores de sector; Educación lidera con
+3.200 activos."). Cada oración sintetizada queda en una caché en disco
+(mintic.cache_tts), así que una respuesta repetida suena al instante.
+"""
+
+import math
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from mintic import cache_tts, trazas
+from mintic.busqueda import COLUMNAS_TITULO
+from mintic.cache_tts import obtener_cache_tts
+from mintic.motor import Resultado
+
+# ======================================================
+# CONFIGURACIÓN
+# ======================================================
+
+MODELO_STT = "whisper-1"
+MODELO_TTS = "gpt-4o-mini-tts"
+VOZ = "alloy"
+
+# Oraciones más cortas se agrupan con la siguiente para no pedir audios diminutos
+MIN_CARACTERES = 40
+
+_FIN_ORACION = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# Resumen hablado: pasos de un plan que se leen, columnas que se nombran y
+# largo máximo de un título citado
+MAX_PARTES_HABLADAS = 3
+MAX_COLUMNAS_HABLADAS = 3
+MAX_TITULO = 80
+# "909 filas donde ..." (mensaje del motor y de SoQL): total sin ids de fila
+_TOTAL_MENSAJE = re.compile(r"^(\d+) filas\b")
+
+
+# ======================================================
+# TRANSCRIPCIÓN Y SÍNTESIS
+# ======================================================
+
+def transcribir(client, audio_bytes: bytes, nombre: str = "pregunta.wav") -> str:
+    """Envía el audio a Whisper directamente desde memoria."""
+    transcripcion = client.audio.transcriptions.create(
+        model=MODELO_STT,
+        file=(nombre, audio_bytes),
+    )
+    return transcripcion.text
+
+
+def sintetizar(client, texto: str) -> bytes:
+    """Devuelve el MP3 de `texto` como bytes."""
+    resp = client.audio.speech.create(model=MODELO_TTS, voice=VOZ, input=texto)
+    # En SDK nuevo la respuesta expone .read(); en otros casos ya son bytes
+    return resp.read() if hasattr(resp, "read") else resp
+
+
+# ======================================================
+# RESUMEN HABLADO DE UN RESULTADO
+# ======================================================
+
+def _numero(valor) -> str:
+    """Con punto de miles y coma decimal, como se lee en español."""
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+    if math.isnan(numero):
+        return "sin dato"
+    if numero.is_integer():
+        return f"{int(numero):,}".replace(",", ".")
+    texto = f"{numero:,.2f}".rstrip("0").rstrip(".")
+    return texto.replace(",", " ").replace(".", ",").replace(" ", ".")
+
+
+def _cantidad(n: int, singular: str) -> str:
+    return f"{_numero(n)} {singular}{'' if n == 1 else 's'}"
+
+
+def _nombre(columna) -> str:
+    """'Información de la Entidad: Sector' → 'sector'."""
+    return str(columna).rsplit(":", 1)[-1].strip().lower()
+
+
+def _lista(nombres: list) -> str:
+    if len(nombres) == 1:
+        return nombres[0]
+    return ", ".join(nombres[:-1]) + " y " + nombres[-1]
+
+
+def _total(res: Resultado) -> int | None:
+    """Filas del resultado: por sus ids o, si se resolvió en el servidor, por el mensaje."""
+    if res.filas is not None:
+        return len(res.filas)
+    m = _TOTAL_MENSAJE.match(res.mensaje or "")
+    return int(m.group(1)) if m else None
+
+
+def _titulo(datos: pd.DataFrame | None) -> str | None:
+    if datos is None or datos.empty:
+        return None
+    columna = next((c for c in COLUMNAS_TITULO if c in datos.columns), None)
+    if columna is None or pd.isna(datos[columna].iloc[0]):
+        return None
+    titulo = " ".join(str(datos[columna].iloc[0]).split())
+    if len(titulo) > MAX_TITULO:
+        titulo = titulo[:MAX_TITULO].rsplit(" ", 1)[0] + "…"
+    return titulo
+
+
+def _hablar_tabla(res: Resultado, con_total: bool) -> str:
+    total = _total(res) if con_total else None
+    if total == 0 or res.datos is None or res.datos.empty:
+        return "No encontré activos con esas condiciones."
+    titulo = _titulo(res.datos)
+    if "relevancia" in res.datos.columns:
+        texto = f"Encontré {_cantidad(len(res.datos), 'activo')} relacionados"
+        return texto + (f"; el más relevante es «{titulo}»." if titulo else ".")
+    if total is not None:
+        texto = f"Encontré {_cantidad(total, 'activo')}"
+        return texto + (f"; el primero es «{titulo}»." if titulo else ".")
+    columnas = [_nombre(c) for c in res.datos.columns]
+    if len(columnas) > MAX_COLUMNAS_HABLADAS:
+        # Filas completas (un filtro dentro de un plan): basta con citar la primera
+        return f"El primero es «{titulo}»." if titulo else ""
+    return f"Te muestro {_lista(columnas)} de los primeros {_cantidad(len(res.datos), 'activo')}."
+
+
+def _hablar_grafico(res: Resultado) -> str:
+    datos = res.datos
+    if datos is None or datos.empty:
+        return "No hay datos para graficar."
+    x, y = res.x, res.y
+    if not datos[x].is_unique:
+        # Sin agregación: una fila por punto
+        return f"El gráfico muestra {_cantidad(len(datos), 'punto')} de {_nombre(x)} frente a {_nombre(y)}."
+
+    valores = pd.to_numeric(datos[y], errors="coerce")
+    if valores.isna().all():
+        return f"El gráfico muestra {_cantidad(len(datos), 'valor')} de {_nombre(x)}."
+    orden = valores.sort_values(ascending=False, na_position="last").index
+    lider = datos.at[orden[0], x]
+    # "valor" es el conteo de activos; con 'sum' se nombra la columna sumada
+    medida = valores[orden[0]]
+    medida = _cantidad(int(medida), "activo") if y == "valor" else f"{_numero(medida)} de {_nombre(y)}"
+    if len(datos) == 1:
+        return f"Solo hay un valor de {_nombre(x)}: {lider}, con {medida}."
+    texto = f"Hay {_numero(len(datos))} valores de {_nombre(x)}; {lider} lidera con {medida}"
+    segundo = orden[1]
+    if pd.notna(valores[segundo]):
+        texto += f", seguido de {datos.at[segundo, x]} con {_numero(valores[segundo])}"
+    return texto + "."
+
+
+def resumen_hablado(res: Resultado | None, con_total: bool = True) -> str:
+    """
+    Una o dos oraciones que describen el resultado ejecutado, para sintetizar
+    en lugar de la instrucción JSON. Cadena vacía si no hay nada que decir.
+    """
+    if res is None:
+        return ""
+    if res.clase in ("texto", "aviso"):
+        return res.mensaje
+    if res.clase == "tabla":
+        return _hablar_tabla(res, con_total)
+    if res.clase == "grafico":
+        return _hablar_grafico(res)
+    if res.clase == "plan":
+        total = _total(res)
+        oraciones = [f"Encontré {_cantidad(total, 'activo')}."] if total is not None else []
+        # Los pasos comparten las filas del plan: no se repite el total en cada uno
+        oraciones += [resumen_hablado(p, con_total=False) for p in res.partes[:MAX_PARTES_HABLADAS]]
+        restantes = len(res.partes) - MAX_PARTES_HABLADAS
+        if restantes > 0:
+            oraciones.append(f"Hay {_cantidad(restantes, 'resultado')} más en pantalla.")
+        return " ".join(o for o in oraciones if o)
+    return ""
+
+
+# ======================================================
+# SEPARACIÓN INCREMENTAL EN ORACIONES
+# ======================================================
+
+class SeparadorOraciones:
+    """Acumula fragmentos del LLM y entrega las oraciones a medida que se completan."""
+
+    def __init__(self, min_caracteres: int = MIN_CARACTERES):
+        self.min_caracteres = min_caracteres
+        self._buffer = ""
+
+    def agregar(self, fragmento: str) -> list:
+        self._buffer += fragmento
+        partes = _FIN_ORACION.split(self._buffer)
+        # La última parte puede ser una oración todavía incompleta
+        self._buffer = partes.pop()
+
+        listas, actual = [], ""
+        for parte in partes:
+            actual = f"{actual} {parte}".strip() if actual else parte.strip()
+            if len(actual) >= self.min_caracteres:
+                listas.append(actual)
+                actual = ""
+        if actual:
+            # Se conserva el espacio para no pegarla al siguiente fragmento
+            self._buffer = f"{actual} {self._buffer}"
+        return listas
+
+    def cerrar(self) -> str:
+        resto, self._buffer = self._buffer.strip(), ""
+        return resto
+
+
+# ======================================================
+# PIPELINE DE SÍNTESIS
+# ======================================================
+
+class PipelineVoz:
+    """
+    Sintetiza oraciones en paralelo y conserva su orden.
+    La primera oración se reproduce apenas está lista; el resto se entrega
+    concatenado en un solo clip (los frames MP3 se pueden encadenar). Las
+    oraciones que ya están en la caché de TTS no pasan por la API.
+    """
+
+    def __init__(self, client, trabajadores: int = 3):
+        self.client = client
+        self._pool = ThreadPoolExecutor(max_workers=trabajadores)
+        self._futuros = []
+        self._cache = obtener_cache_tts() if cache_tts.ACTIVO else None
+        # Los hilos del pool no heredan la traza actual; se guarda al crear el pipeline
+        self._traza = trazas.actual()
+
+    def _sintetizar(self, texto: str) -> bytes:
+        with self._traza.etapa("tts", caracteres=len(texto)):
+            audio = sintetizar(self.client, texto)
+        self._traza.sumar(bytes_tts=len(audio))
+        if self._cache is not None:
+            self._cache.guardar(texto, VOZ, MODELO_TTS, audio)
+        return audio
+
+    def agregar(self, texto: str) -> None:
+        if not texto or not texto.strip():
+            return
+        if self._cache is not None:
+            audio = self._cache.obtener(texto, VOZ, MODELO_TTS)
+            if audio is not None:
+                # Ya sintetizada: queda lista de inmediato, sin esperar al pool
+                self._traza.sumar(cache_tts_aciertos=1, bytes_tts_cache=len(audio))
+                futuro = Future()
+                futuro.set_result(audio)
+                self._futuros.append(futuro)
+                return
+            self._traza.sumar(cache_tts_fallos=1)
+        self._futuros.append(self._pool.submit(self._sintetizar, texto))
+
+    def primero_listo(self) -> bool:
+        return bool(self._futuros) and self._futuros[0].done()
+
+    def primero(self) -> bytes | None:
+        return self._futuros[0].result() if self._futuros else None
+
+    def resto(self) -> bytes:
+        return b"".join(f.result() for f in self._futuros[1:])
+
+    def cerrar(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,14 +1,13 @@
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
 
-CSV_PATH = "Asset_Inventory_-_Public_20251119.csv"
+from mintic.cache_figuras import obtener_cache_figuras
+from mintic.metricas import obtener_metricas
 
-@st.cache_data
-def load_data():
-    return pd.read_csv(CSV_PATH, encoding="utf-8")
-
-df = load_data()
+# Métricas precalculadas y compartidas (se recalculan solo si cambia el CSV)
+m = obtener_metricas()
+# PNG ya rasterizados por versión del dataset: un rerun no vuelve a dibujar
+figuras = obtener_cache_figuras()
 
 # ==========================================
 # PÁGINA – OBJETIVO 1: DIAGNÓSTICO GENERAL
@@ -18,10 +17,10 @@ st.title("📊 Diagnóstico de Coherencia y Cobertura")
 st.write("Objetivo 1: Diagnosticar la coherencia y la cobertura del inventario de activos de datos abiertos.")
 
 st.header("1️⃣ Información General del Dataset")
-st.write(f"- **Filas:** {df.shape[0]}")
-st.write(f"- **Columnas:** {df.shape[1]}")
+st.write(f"- **Filas:** {m.filas}")
+st.write(f"- **Columnas:** {len(m.columnas)}")
 st.write("### Lista de columnas:")
-st.write(list(df.columns))
+st.write(m.columnas)
 
 # ------------------------------------------
 # 2) COMPLETITUD POR COLUMNA
@@ -29,14 +28,17 @@ st.write(list(df.columns))
 
 st.header("2️⃣ Completitud por Columna")
 
-completitud = df.notna().mean().sort_values(ascending=False)
+completitud = m.completitud
 st.write(completitud.to_frame("Completitud (%)") * 100)
 
-fig, ax = plt.subplots(figsize=(10,5))
-(completitud * 100).plot(kind="bar", ax=ax)
-ax.set_title("Porcentaje de Completitud por Columna")
-ax.set_ylabel("Completitud (%)")
-st.pyplot(fig)
+def dibujar_completitud():
+    fig, ax = plt.subplots(figsize=(10,5))
+    (completitud * 100).plot(kind="bar", ax=ax)
+    ax.set_title("Porcentaje de Completitud por Columna")
+    ax.set_ylabel("Completitud (%)")
+    return fig
+
+st.image(figuras.png((m.huella, "p1-completitud", (10, 5)), dibujar_completitud), width="stretch")
 
 # ------------------------------------------
 # 3) COLUMNAS MÁS INCOMPLETAS
@@ -47,11 +49,14 @@ st.header("3️⃣ Columnas con Mayor Falta de Datos")
 faltantes_top = (1 - completitud).sort_values(ascending=False).head(10)
 st.write(faltantes_top.to_frame("Porcentaje de Faltantes") * 100)
 
-fig2, ax2 = plt.subplots(figsize=(10,5))
-(faltantes_top * 100).plot(kind="bar", ax=ax2, color="red")
-ax2.set_title("Top 10 Columnas Más Incompletas")
-ax2.set_ylabel("Faltantes (%)")
-st.pyplot(fig2)
+def dibujar_faltantes():
+    fig2, ax2 = plt.subplots(figsize=(10,5))
+    (faltantes_top * 100).plot(kind="bar", ax=ax2, color="red")
+    ax2.set_title("Top 10 Columnas Más Incompletas")
+    ax2.set_ylabel("Faltantes (%)")
+    return fig2
+
+st.image(figuras.png((m.huella, "p1-faltantes", 10, (10, 5)), dibujar_faltantes), width="stretch")
 
 # ------------------------------------------
 # 4) COBERTURA TEMÁTICA (si existe columna tema)
@@ -59,24 +64,24 @@ st.pyplot(fig2)
 
 st.header("4️⃣ Cobertura Temática")
 
-possible_theme_columns = ["sector", "tema", "category", "Categoría", "subject", "topic"]
-
-theme_col = next((col for col in possible_theme_columns if col in df.columns), None)
+theme_col = m.columna_tema
 
 if theme_col:
     st.success(f"Se detectó columna temática: **{theme_col}**")
 
-    temas = df[theme_col].fillna("Sin Tema")
-    conteo_temas = temas.value_counts()
+    conteo_temas = m.conteo_temas
 
     st.write("### Distribución por tema:")
     st.write(conteo_temas)
 
-    fig3, ax3 = plt.subplots(figsize=(10,5))
-    conteo_temas.head(10).plot(kind="bar", ax=ax3)
-    ax3.set_title("Top 10 Temas Más Frecuentes")
-    ax3.set_ylabel("Número de Activos")
-    st.pyplot(fig3)
+    def dibujar_temas():
+        fig3, ax3 = plt.subplots(figsize=(10,5))
+        conteo_temas.head(10).plot(kind="bar", ax=ax3)
+        ax3.set_title("Top 10 Temas Más Frecuentes")
+        ax3.set_ylabel("Número de Activos")
+        return fig3
+
+    st.image(figuras.png((m.huella, "p1-temas", theme_col, 10, (10, 5)), dibujar_temas), width="stretch")
 
 else:
     st.warning("⚠ No se encontró una columna de temas en el inventario.")
@@ -88,12 +93,12 @@ else:
 st.header("5️⃣ Recomendaciones del Diagnóstico")
 
 col_incompletas = list(faltantes_top.index)
-nulas_por_fila = df.isna().sum(axis=1).mean()
+nulas_por_fila = m.nulos_por_fila
 
 st.write("### 📝 Principales conclusiones automáticas:")
 
 st.markdown(f"""
-- El dataset tiene **{df.shape[1]} columnas** y **{df.shape[0]} registros**.  
+- El dataset tiene **{len(m.columnas)} columnas** y **{m.filas} registros**.  
 - Las columnas con más faltantes son:  
   **{', '.join(col_incompletas)}**  
 - Promedio de valores nulos por fila: **{round(nulas_por_fila,2)}**  
@@ -1,14 +1,13 @@
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
 
-CSV_PATH = "Asset_Inventory_-_Public_20251119.csv"
+from mintic.cache_figuras import obtener_cache_figuras
+from mintic.metricas import obtener_metricas
 
-@st.cache_data
-def load_data():
-    return pd.read_csv(CSV_PATH, encoding="utf-8")
-
-df = load_data()
+# Métricas precalculadas y compartidas (se recalculan solo si cambia el CSV)
+m = obtener_metricas()
+# PNG ya rasterizados por versión del dataset: un rerun no vuelve a dibujar
+figuras = obtener_cache_figuras()
 
 # ==========================================
 # PÁGINA – OBJETIVO 2: MÉTRICAS
@@ -24,17 +23,20 @@ st.write("En esta sección calculamos métricas esenciales para evaluar la calid
 
 st.header("1️⃣ Completitud de Metadatos")
 
-completitud = df.notna().mean().sort_values(ascending=False)
+completitud = m.completitud
 tabla_completitud = (completitud * 100).round(2)
 
 st.write("### Porcentaje de completitud por columna:")
 st.dataframe(tabla_completitud.to_frame("Completitud (%)"))
 
-fig1, ax1 = plt.subplots(figsize=(12,5))
-tabla_completitud.plot(kind="bar", ax=ax1)
-ax1.set_title("Completitud por columna (%)")
-ax1.set_ylabel("Completitud (%)")
-st.pyplot(fig1)
+def dibujar_completitud():
+    fig1, ax1 = plt.subplots(figsize=(12,5))
+    tabla_completitud.plot(kind="bar", ax=ax1)
+    ax1.set_title("Completitud por columna (%)")
+    ax1.set_ylabel("Completitud (%)")
+    return fig1
+
+st.image(figuras.png((m.huella, "p2-completitud", (12, 5)), dibujar_completitud), width="stretch")
 
 
 # ==========================================
@@ -43,35 +45,27 @@ st.pyplot(fig1)
 
 st.header("2️⃣ Frecuencia de Actualización")
 
-# Detectar columna correcta
-possible_update_cols = [
-    "Fecha de última actualización de datos (UTC)",
-    "Fecha de última actualización de metadatos (UTC)",
-    "Common Core: Last Update",
-    "Fecha de creación (UTC)"
-]
-
-update_col = next((c for c in possible_update_cols if c in df.columns), None)
+update_col = m.columna_actualizacion
 
 if update_col:
     st.success(f"Columna de actualización detectada: **{update_col}**")
 
-    # Convertir fechas
-    df["fecha_upd"] = pd.to_datetime(df[update_col], errors="coerce")
-
     # Mostrar estadísticas básicas
     st.write("### Estadísticas generales:")
-    st.write(df["fecha_upd"].describe())
+    st.write(m.resumen_fechas)
 
     # Gráfico de historial
-    fechas = df["fecha_upd"].dt.to_period("M").value_counts().sort_index()
+    fechas = m.actualizaciones_mensuales
 
-    fig2, ax2 = plt.subplots(figsize=(12,5))
-    fechas.plot(kind="line", marker="o", ax=ax2)
-    ax2.set_title("Cantidad de activos actualizados por mes")
-    ax2.set_ylabel("Número de activos")
-    ax2.set_xlabel("Mes")
-    st.pyplot(fig2)
+    def dibujar_historial():
+        fig2, ax2 = plt.subplots(figsize=(12,5))
+        fechas.plot(kind="line", marker="o", ax=ax2)
+        ax2.set_title("Cantidad de activos actualizados por mes")
+        ax2.set_ylabel("Número de activos")
+        ax2.set_xlabel("Mes")
+        return fig2
+
+    st.image(figuras.png((m.huella, "p2-historial", update_col, (12, 5)), dibujar_historial), width="stretch")
 
 else:
     st.warning("⚠ No se encontró columna de fecha de actualización.")
@@ -83,25 +77,30 @@ else:
 
 st.header("3️⃣ Cobertura Temática por Sector")
 
-if "Información de la Entidad: Sector" in df.columns:
-    sectores = df["Información de la Entidad: Sector"].fillna("Sin sector")
-    conteo = sectores.value_counts()
+if m.columna_sector:
+    conteo = m.conteo_sector
 
     st.write("### Cantidad de activos por sector:")
     st.dataframe(conteo.to_frame("Activos"))
 
-    fig3, ax3 = plt.subplots(figsize=(12,5))
-    conteo.plot(kind="bar", ax=ax3)
-    ax3.set_title("Distribución de activos por sector")
-    ax3.set_ylabel("Número de activos")
-    st.pyplot(fig3)
+    def dibujar_sectores():
+        fig3, ax3 = plt.subplots(figsize=(12,5))
+        conteo.plot(kind="bar", ax=ax3)
+        ax3.set_title("Distribución de activos por sector")
+        ax3.set_ylabel("Número de activos")
+        return fig3
+
+    st.image(figuras.png((m.huella, "p2-sectores", m.columna_sector, (12, 5)), dibujar_sectores), width="stretch")
 
     # Gráfico PIE (solo top 10)
-    fig4, ax4 = plt.subplots(figsize=(7,7))
-    conteo.head(10).plot(kind="pie", ax=ax4, autopct="%1.1f%%")
-    ax4.set_ylabel("")
-    ax4.set_title("Top 10 Sectores")
-    st.pyplot(fig4)
+    def dibujar_torta():
+        fig4, ax4 = plt.subplots(figsize=(7,7))
+        conteo.head(10).plot(kind="pie", ax=ax4, autopct="%1.1f%%")
+        ax4.set_ylabel("")
+        ax4.set_title("Top 10 Sectores")
+        return fig4
+
+    st.image(figuras.png((m.huella, "p2-torta", m.columna_sector, 10, (7, 7)), dibujar_torta), width="stretch")
 
 else:
     st.warning("⚠ La columna 'Sector' no existe en el inventario.")
@@ -116,7 +115,7 @@ st.header("📝 Conclusiones automáticas del Objetivo 2")
 st.markdown(f"""
 - Completitud media del dataset: **{round(completitud.mean() * 100, 2)}%**
 - Columnas con peor completitud: **{', '.join(list(completitud.tail(5).index))}**
-- Sector más frecuente: **{conteo.index[0] if 'Sector' in df.columns else 'N/A'}**
-- Fecha más antigua detectada: **{df['fecha_upd'].min() if update_col else 'N/A'}**
-- Fecha más reciente detectada: **{df['fecha_upd'].max() if update_col else 'N/A'}**
+- Sector más frecuente: **{m.conteo_sector.index[0] if len(m.conteo_sector) else 'N/A'}**
+- Fecha más antigua detectada: **{m.fecha_min if update_col else 'N/A'}**
+- Fecha más reciente detectada: **{m.fecha_max if update_col else 'N/A'}**
 """)
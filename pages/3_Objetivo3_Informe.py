@@ -1,15 +1,15 @@
-import streamlit as st
 import pandas as pd
-import plotly.express as px
+import streamlit as st
 import plotly.graph_objects as go
 
-CSV_PATH = "Asset_Inventory_-_Public_20251119.csv"
-
-@st.cache_data
-def load_data():
-    return pd.read_csv(CSV_PATH, encoding="utf-8")
+from mintic import graficos
+from mintic.cache_figuras import obtener_cache_figuras
+from mintic.metricas import obtener_metricas
 
-df = load_data()
+# Métricas precalculadas y compartidas (se recalculan solo si cambia el CSV)
+m = obtener_metricas()
+# Figuras ya construidas por versión del dataset (JSON de Plotly)
+figuras = obtener_cache_figuras()
 
 
 # ===============================================================
@@ -55,7 +55,13 @@ tab1, tab2, tab3, tab4 = st.tabs([
     "📐 Completitud",
     "⏱ Actualización",
     "📊 Cobertura Temática"
-])
+], on_change="rerun")
+
+# Con on_change="rerun" cada pestaña sabe si está abierta: solo se calcula
+# el contenido de la visible. `open` es None si Streamlit no sigue el estado,
+# y en ese caso se dibujan todas como antes.
+def visible(tab) -> bool:
+    return tab.open is not False
 
 
 
@@ -63,18 +69,19 @@ tab1, tab2, tab3, tab4 = st.tabs([
 # TAB 1 – INTRODUCCIÓN
 # ===============================================================
 
-with tab1:
-    st.markdown("<div class='section-title'>Introducción</div>", unsafe_allow_html=True)
-    st.markdown("""
-    El análisis del inventario de activos de datos abiertos se construyó a partir de:
+if visible(tab1):
+    with tab1:
+        st.markdown("<div class='section-title'>Introducción</div>", unsafe_allow_html=True)
+        st.markdown("""
+        El análisis del inventario de activos de datos abiertos se construyó a partir de:
 
-    - Completitud de metadatos  
-    - Frecuencia de actualización  
-    - Cobertura temática por sector  
-    - Revisión general de consistencia  
-    
-    A continuación se presentan visualizaciones interactivas para profundizar en el estado real del inventario.
-    """)
+        - Completitud de metadatos  
+        - Frecuencia de actualización  
+        - Cobertura temática por sector  
+        - Revisión general de consistencia  
+        
+        A continuación se presentan visualizaciones interactivas para profundizar en el estado real del inventario.
+        """)
 
 
 
@@ -82,25 +89,33 @@ with tab1:
 # TAB 2 – COMPLTITUD
 # ===============================================================
 
-with tab2:
-    st.markdown("<div class='section-title'>1️⃣ Completitud de Metadatos</div>", unsafe_allow_html=True)
+if visible(tab2):
+    with tab2:
+        st.markdown("<div class='section-title'>1️⃣ Completitud de Metadatos</div>", unsafe_allow_html=True)
+
+        completitud = m.completitud * 100
+        tabla_completitud = completitud.reset_index()
+        tabla_completitud.columns = ["Columna", "Completitud (%)"]
 
-    completitud = (df.notna().mean() * 100).sort_values(ascending=False)
-    tabla_completitud = completitud.reset_index()
-    tabla_completitud.columns = ["Columna", "Completitud (%)"]
+        st.dataframe(tabla_completitud, use_container_width=True)
 
-    st.dataframe(tabla_completitud, use_container_width=True)
+        def construir_completitud():
+            fig = graficos.figura(
+                "bar",
+                tabla_completitud,
+                x="Columna",
+                y="Completitud (%)",
+                etiquetas=True,
+                top_n=len(tabla_completitud),   # todas las columnas, sin "Otros"
+                nombre="completitud",
+                title="Completitud por Columna (%)",
+                height=600
+            )
+            fig.update_layout(xaxis_tickangle=-45)
+            return fig
 
-    fig = px.bar(
-        tabla_completitud,
-        x="Columna",
-        y="Completitud (%)",
-        title="Completitud por Columna (%)",
-        text="Completitud (%)",
-        height=600
-    )
-    fig.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+        fig = figuras.plotly((m.huella, "p3-completitud", 600), construir_completitud)
+        st.plotly_chart(fig, use_container_width=True)
 
 
 
@@ -108,39 +123,41 @@ with tab2:
 # TAB 3 – FRECUENCIA DE ACTUALIZACIÓN
 # ===============================================================
 
-with tab3:
+if visible(tab3):
+    with tab3:
 
-    st.markdown("<div class='section-title'>2️⃣ Frecuencia de Actualización</div>", unsafe_allow_html=True)
+        st.markdown("<div class='section-title'>2️⃣ Frecuencia de Actualización</div>", unsafe_allow_html=True)
 
-    # Columnas detectables
-    update_cols = [
-        "Fecha de última actualización de datos (UTC)",
-        "Fecha de última actualización de metadatos (UTC)",
-        "Common Core: Last Update"
-    ]
+        update_col = m.columna_actualizacion
 
-    update_col = next((c for c in update_cols if c in df.columns), None)
+        if update_col:
+            st.success(f"Usando columna de actualización: **{update_col}**")
 
-    if update_col:
-        st.success(f"Usando columna de actualización: **{update_col}**")
+            # Tabla nueva con el mes como fecha (no se modifica la métrica compartida)
+            mensuales = m.actualizaciones_mensuales
+            conteo_mensual = pd.DataFrame({
+                "Mes": mensuales.index.to_timestamp(),
+                "N° de activos": mensuales.to_numpy(),
+            })
 
-        df["fecha_upd"] = pd.to_datetime(df[update_col], errors="coerce")
-        df["mes"] = df["fecha_upd"].dt.to_period("M").astype(str)
+            def construir_actualizaciones():
+                fig2 = graficos.figura(
+                    "line",
+                    conteo_mensual,
+                    x="Mes",
+                    y="N° de activos",
+                    nombre="actualizaciones",
+                    title="Línea de tiempo – Actualizaciones mensuales",
+                    markers=True
+                )
+                fig2.update_traces(line=dict(width=3))
+                return fig2
 
-        conteo_mensual = df["mes"].value_counts().sort_index()
+            fig2 = figuras.plotly((m.huella, "p3-actualizaciones", update_col), construir_actualizaciones)
+            st.plotly_chart(fig2, use_container_width=True)
 
-        fig2 = px.line(
-            conteo_mensual,
-            labels={"value": "N° de activos", "index": "Mes"},
-            title="Línea de tiempo – Actualizaciones mensuales",
-            markers=True
-        )
-
-        fig2.update_traces(line=dict(width=3))
-        st.plotly_chart(fig2, use_container_width=True)
-
-    else:
-        st.error("⚠ No se detectó una columna de actualización válida.")
+        else:
+            st.error("⚠ No se detectó una columna de actualización válida.")
 
 
 
@@ -148,46 +165,61 @@ with tab3:
 # TAB 4 – COBERTURA TEMÁTICA (SECTOR)
 # ===============================================================
 
-with tab4:
+if visible(tab4):
+    with tab4:
+
+        st.markdown("<div class='section-title'>3️⃣ Cobertura Temática por Sector</div>", unsafe_allow_html=True)
+
+        sector_col = m.columna_sector
 
-    st.markdown("<div class='section-title'>3️⃣ Cobertura Temática por Sector</div>", unsafe_allow_html=True)
+        if sector_col:
+            st.success(f"Columna temática detectada: **{sector_col}**")
 
-    # Detectar cualquier columna que contenga "sector"
-    sector_col = next((c for c in df.columns if "sector" in c.lower()), None)
+            conteo_sector = m.conteo_sector.reset_index()
+            conteo_sector.columns = ["Sector", "Activos"]
 
-    if sector_col:
-        st.success(f"Columna temática detectada: **{sector_col}**")
+            # Tabla
+            st.dataframe(conteo_sector, use_container_width=True)
 
-        conteo_sector = df[sector_col].fillna("Sin sector").value_counts().reset_index()
-        conteo_sector.columns = ["Sector", "Activos"]
+            # Gráfica estilo dashboard
+            # Sectores de la cola larga agrupados en "Otros"
+            def construir_sectores():
+                fig3 = graficos.figura(
+                    "bar",
+                    conteo_sector,
+                    x="Sector",
+                    y="Activos",
+                    etiquetas=True,
+                    nombre="sectores",
+                    title="Distribución de Activos por Sector",
+                    height=600
+                )
+                fig3.update_layout(xaxis_tickangle=-45)
+                return fig3
 
-        # Tabla
-        st.dataframe(conteo_sector, use_container_width=True)
+            fig3 = figuras.plotly((m.huella, "p3-sectores", sector_col, graficos.TOP_N), construir_sectores)
+            st.plotly_chart(fig3, use_container_width=True)
 
-        # Gráfica estilo dashboard
-        fig3 = px.bar(
-            conteo_sector,
-            x="Sector",
-            y="Activos",
-            title="Distribución de Activos por Sector",
-            text="Activos",
-            height=600
-        )
-        fig3.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig3, use_container_width=True)
+            # Pie chart interactivo
+            def construir_torta():
+                # Los 10 primeros sin "Otros": así las porciones son las del Top 10
+                fig4 = graficos.figura(
+                    "pie",
+                    conteo_sector.head(10),
+                    x="Sector",
+                    y="Activos",
+                    top_n=10,
+                    nombre="top-sectores",
+                    title="Top 10 Sectores",
+                )
+                fig4.update_traces(textposition="inside")
+                return fig4
 
-        # Pie chart interactivo
-        fig4 = px.pie(
-            conteo_sector.head(10),
-            names="Sector",
-            values="Activos",
-            title="Top 10 Sectores",
-        )
-        fig4.update_traces(textposition="inside")
-        st.plotly_chart(fig4, use_container_width=True)
+            fig4 = figuras.plotly((m.huella, "p3-torta", sector_col, 10), construir_torta)
+            st.plotly_chart(fig4, use_container_width=True)
 
-    else:
-        st.error("⚠ No se detectó ninguna columna relacionada con 'sector'.")
+        else:
+            st.error("⚠ No se detectó ninguna columna relacionada con 'sector'.")
 
 
 
@@ -199,7 +231,7 @@ st.markdown("---")
 
 st.markdown("<div class='section-title'>📝 Conclusiones Generales</div>", unsafe_allow_html=True)
 
-completitud_prom = round(df.notna().mean().mean() * 100, 2)
+completitud_prom = round(m.completitud.mean() * 100, 2)
 
 st.markdown(f"""
 - La completitud promedio de los metadatos es **{completitud_prom}%**.  
@@ -0,0 +1,48 @@
+"""
+Fixtures compartidas. El inventario es el CSV sintético de bench.generar
+(mismas columnas y tipos que el real), tipado como lo hace la app; la caché
+de mintic va a una carpeta temporal. El recurso SODA es el simulado de
+bench.simulados, uno por módulo de pruebas.
+"""
+
+import os
+import tempfile
+
+# Antes de importar mintic: CACHE_DIR se lee al importar mintic.datos
+os.environ.setdefault("MINTIC_CACHE_DIR", tempfile.mkdtemp(prefix="mintic-pruebas-"))
+
+import pytest  # noqa: E402
+
+FILAS = 2000
+
+
+@pytest.fixture(scope="session")
+def inventario(tmp_path_factory):
+    from bench import generar
+    from mintic import datos, tipos
+
+    ruta = generar.generar(FILAS, str(tmp_path_factory.mktemp("inventario") / "inventario.csv"))
+    return tipos.a_pandas(tipos.aplicar(datos.leer_csv(ruta)))
+
+
+@pytest.fixture(scope="module")
+def servidor_soda():
+    from bench import simulados
+    from mintic import soda
+
+    # Más filas que una página: la descarga completa pide dos páginas en paralelo
+    servidores = simulados.arrancar(latencia_soda=0.0, filas_soda=soda.TAM_PAGINA + 2000)
+    yield f"http://127.0.0.1:{servidores[1].server_port}"
+    for servidor in servidores:
+        servidor.shutdown()
+
+
+@pytest.fixture
+def copia_local(servidor_soda, tmp_path, monkeypatch):
+    """Snapshot y estado en una carpeta propia de la prueba."""
+    from mintic import soda
+
+    monkeypatch.setattr(soda, "SODA_DOMINIO", servidor_soda)
+    monkeypatch.setattr(soda, "SNAPSHOT", str(tmp_path / "soda.arrow"))
+    monkeypatch.setattr(soda, "ESTADO", str(tmp_path / "soda.json"))
+    return tmp_path
@@ -0,0 +1,14 @@
+from mintic import busqueda
+
+
+def test_dos_versiones_conservan_su_indice_bm25(inventario):
+    csv = inventario.copy()
+    csv.attrs["huella"] = "csv-busqueda"
+    api = inventario.copy()
+    api.attrs["huella"] = "soda-busqueda"
+
+    indice_csv = busqueda.obtener_indice(csv)
+    indice_api = busqueda.obtener_indice(api)
+    # Alternar fuentes no vuelve a cargar el .npz ni a construir el índice
+    assert busqueda.obtener_indice(csv) is indice_csv
+    assert busqueda.obtener_indice(api) is indice_api
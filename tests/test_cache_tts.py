@@ -0,0 +1,26 @@
+import os
+
+from mintic.cache_tts import CacheTTS, clave
+
+
+def _en_disco(ruta):
+    nombres = os.listdir(ruta)
+    return len(nombres), sum(os.path.getsize(os.path.join(ruta, n)) for n in nombres)
+
+
+def test_contadores_siguen_al_disco_y_expulsan_por_lru(tmp_path):
+    cache = CacheTTS(str(tmp_path), max_bytes=10_000)
+    for i in range(12):
+        cache.guardar(f"Oración {i}.", "alloy", "tts", bytes(1000))
+        # Fechas de uso crecientes: la oración 0 es la menos usada
+        os.utime(cache._ruta(clave(f"Oración {i}.", "alloy", "tts")), (i, i))
+    # Reemplazar un audio no suma una entrada nueva
+    cache.guardar("Oración 11.", "alloy", "tts", bytes(500))
+
+    stats = cache.estadisticas()
+    assert (stats["entradas"], stats["bytes"]) == _en_disco(tmp_path)
+    assert stats["bytes"] <= 10_000
+    assert cache.obtener("Oración 0.", "alloy", "tts") is None
+    assert cache.obtener("Oración   11.", "alloy", "tts") == bytes(500)
+    # Una instancia nueva arranca con lo que ya hay en la carpeta
+    assert CacheTTS(str(tmp_path), max_bytes=10_000).estadisticas()["bytes"] == stats["bytes"]
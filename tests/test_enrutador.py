@@ -0,0 +1,55 @@
+import pytest
+
+from mintic.enrutador import Vocabulario, clasificar
+
+SECTOR = "Información de la Entidad: Sector"
+DEPARTAMENTO = "Información de la Entidad: Departamento"
+
+
+def conteo(x, tipo="bar"):
+    return {"accion": "graficar", "tipo": tipo, "x": x, "y": "", "agregacion": "count"}
+
+
+def suma(x, y, tipo="bar"):
+    return {"accion": "graficar", "tipo": tipo, "x": x, "y": y, "agregacion": "sum"}
+
+
+# (pregunta, instrucción esperada; None = la pregunta sigue al LLM)
+CASOS = [
+    # Conteos: antes de "por" solo hay palabras de conteo, gráfico o relleno
+    ("¿Cuántos activos hay por sector?", conteo(SECTOR)),
+    ("distribución por sector", conteo(SECTOR)),
+    ("¿cuál es la distribución de activos por tipo?", conteo("Tipo")),
+    ("cantidad de activos por departamento en un gráfico de barras", conteo(DEPARTAMENTO)),
+    ("gráfico de torta por categoría", conteo("Categoría", "pie")),
+    # Sumas: la medida nombra una columna numérica
+    ("total de descargas por sector", suma(SECTOR, "Descargas")),
+    ("suma de vistas por tipo", suma("Tipo", "Vistas")),
+    ("muestra el número de vistas por tipo", suma("Tipo", "Vistas")),
+    ("número de filas por sector", suma(SECTOR, "Número de Filas")),
+    ("grafica las vistas por sector", suma(SECTOR, "Vistas")),
+    ("número de descargas por tipo en torta", suma("Tipo", "Descargas", "pie")),
+    # Filtros y tablas
+    ("filtra por departamento Antioquia",
+     {"accion": "filtrar", "columna": DEPARTAMENTO, "valor": "Antioquia"}),
+    ("activos del sector Educación", {"accion": "filtrar", "columna": SECTOR, "valor": "Educación"}),
+    ("muéstrame título y dueño", {"accion": "tabla", "columnas": ["Titulo", "Dueño"]}),
+    ("dame una tabla con el título y el sector de los activos",
+     {"accion": "tabla", "columnas": ["Titulo", SECTOR]}),
+    # Sin una intención clara: al LLM
+    ("cuántos activos de Educación por departamento", None),
+    ("filtra por sector Educación y grafica por departamento", None),
+    ("suma de títulos por sector", None),
+    ("hola qué tal", None),
+    ("", None),
+]
+
+
+@pytest.fixture(scope="module")
+def vocabulario(inventario):
+    return Vocabulario(inventario)
+
+
+@pytest.mark.parametrize("pregunta, esperada", CASOS)
+def test_clasificar(vocabulario, pregunta, esperada):
+    assert clasificar(vocabulario, pregunta) == esperada
@@ -0,0 +1,15 @@
+import pandas as pd
+
+from mintic import graficos, trazas
+
+
+def test_figura_queda_en_la_traza_en_curso():
+    datos = pd.DataFrame({"sector": [f"Sector {i % 30}" for i in range(300)]})
+    with trazas.traza("prueba") as traza:
+        with trazas.etapa("render"):
+            graficos.figura("bar", datos, "sector", "sector", nombre="prueba-bar")
+
+    grafico = next(e for e in traza.a_dict()["etapas"] if e["etapa"] == "grafico")
+    assert grafico["figura"] == "prueba-bar"
+    assert (grafico["puntos_entrada"], grafico["puntos"]) == (300, graficos.TOP_N + 1)
+    assert grafico["bytes"] == traza.contadores["bytes_graficos"] > 0
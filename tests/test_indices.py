@@ -0,0 +1,24 @@
+from mintic import indices
+
+
+def test_dos_versiones_conservan_sus_indices(inventario):
+    csv = inventario.copy()
+    csv.attrs["huella"] = "csv-prueba"
+    api = inventario.copy()
+    api.attrs["huella"] = "soda-prueba"
+
+    primeros = [(indices.codificar(df, "Tipo")[0], indices.obtener_indice(df, "Vistas"))
+                for df in (csv, api)]
+    # Alternar fuentes no reconstruye nada: mismos objetos en ambas versiones
+    for df, (codigos, indice) in zip((csv, api, csv, api), primeros * 2):
+        assert indices.codificar(df, "Tipo")[0] is codigos
+        assert indices.obtener_indice(df, "Vistas") is indice
+
+
+def test_las_versiones_en_memoria_estan_acotadas(inventario):
+    for i in range(indices.MAX_VERSIONES + 3):
+        df = inventario[["Vistas"]].copy()
+        df.attrs["huella"] = f"version-{i}"
+        indices.obtener_indice(df, "Vistas")
+    assert len(indices._INDICES) == indices.MAX_VERSIONES
+    assert "version-0" not in indices._INDICES
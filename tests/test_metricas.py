@@ -0,0 +1,28 @@
+import pandas as pd
+
+from mintic import datos, tipos
+from mintic.metricas import calcular_metricas
+
+
+def test_completitud_se_mide_sobre_el_csv_sin_tipar(tmp_path):
+    ruta = tmp_path / "inventario.csv"
+    ruta.write_text(
+        "UID,Vistas,Fecha de creación (UTC),Descripción\n"
+        "a,10,2024-01-05T10:00:00.000,uno\n"
+        "b,N/D,ayer,\n"
+        "c,,2024-02-01T08:30:00.000,tres\n"
+        "d,7,,cuatro\n",
+        encoding="utf-8",
+    )
+    tabla = tipos.aplicar(datos.leer_csv(str(ruta)))
+    # El tipado vuelve nulos los valores inválidos...
+    assert tabla.column("Vistas").null_count == 2
+    assert tabla.column("Fecha de creación (UTC)").null_count == 2
+
+    m = calcular_metricas(tabla, "prueba")
+    # ...pero la completitud es la del CSV, como la mide pandas
+    esperada = 1 - pd.read_csv(ruta).isna().mean()
+    pd.testing.assert_series_equal(
+        m.completitud.sort_index(), esperada.sort_index(), check_names=False
+    )
+    assert m.nulos_por_fila == 3 / 4
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mintic import busqueda
+from mintic.motor import ejecutar
+
+
+def buscar(k):
+    return {"accion": "buscar", "consulta": "subsidios", "k": k}
+
+
+@pytest.mark.parametrize("k, esperado", [
+    (None, busqueda.TOP_K),
+    (3, 3),
+    ("4", 4),
+    (0, busqueda.TOP_K),       # "k" vacío o cero: el valor por omisión
+    (-5, 1),
+    (10_000, busqueda.TOP_K_MAX),
+])
+def test_buscar_acota_k(inventario, k, esperado):
+    resultado = ejecutar(inventario, buscar(k))
+    assert resultado.clase == "tabla"
+    assert len(resultado.datos) == esperado
+
+
+@pytest.mark.parametrize("k", ["diez", [3], "3.5"])
+def test_buscar_con_k_invalido_devuelve_aviso(inventario, k):
+    resultado = ejecutar(inventario, buscar(k))
+    assert resultado.clase == "aviso"
+    assert repr(k) in resultado.mensaje
+
+
+def test_filtrar_sobre_un_resultado_conserva_su_orden(inventario):
+    previo = ejecutar(inventario, buscar(30)).filas
+    assert (previo != sorted(previo)).any()   # orden de relevancia, no de id
+    filtro = {"columna": "Vistas", "operador": ">=", "valor": 0}
+    esperadas = previo[inventario["Vistas"].iloc[previo].ge(0).fillna(False).to_numpy()]
+
+    filtrado = ejecutar(inventario, {"accion": "filtrar", **filtro}, sobre=previo)
+    plan = ejecutar(inventario, {"accion": "plan", "filtro": filtro,
+                                 "pasos": [{"accion": "tabla", "columnas": ["Titulo"]}]},
+                    sobre=previo)
+    assert filtrado.filas.tolist() == esperadas.tolist()
+    assert plan.partes[0].filas.tolist() == esperadas.tolist()
+
+
+@pytest.mark.parametrize("instruccion", [
+    {"accion": "filtrar", "condiciones": ["Sector"]},
+    {"accion": "filtrar", "condiciones": "Sector"},
+    {"accion": "plan", "filtro": {"condiciones": [None]},
+     "pasos": [{"accion": "tabla", "columnas": ["Titulo"]}]},
+])
+def test_condiciones_que_no_son_objetos_devuelven_aviso(inventario, instruccion):
+    resultado = ejecutar(inventario, instruccion)
+    assert resultado.clase == "aviso"
+    assert "condición" in resultado.mensaje
+
+
+@pytest.mark.parametrize("valor, desde, hasta", [
+    ("2021", "2021-01-01", "2022-01-01"),
+    ("2021-03", "2021-03-01", "2021-04-01"),
+    ("2021/12", "2021-12-01", "2022-01-01"),
+    ("2021-03-05", "2021-03-05", "2021-03-06"),
+])
+def test_prefijo_de_fecha_es_un_rango_semiabierto(inventario, valor, desde, hasta):
+    columna = "Fecha de creación (UTC)"
+    fechas = inventario[columna]
+    esperadas = np.flatnonzero(((fechas >= pd.Timestamp(desde, tz="UTC"))
+                                & (fechas < pd.Timestamp(hasta, tz="UTC"))).fillna(False))
+    resultado = ejecutar(inventario, {"accion": "filtrar", "columna": columna,
+                                      "operador": "prefijo", "valor": valor})
+    assert resultado.clase == "tabla"
+    assert resultado.filas.tolist() == esperadas.tolist()
+
+
+def test_prefijo_sin_formato_de_fecha_devuelve_aviso(inventario):
+    resultado = ejecutar(inventario, {"accion": "filtrar", "columna": "Fecha de creación (UTC)",
+                                      "operador": "prefijo", "valor": "marzo"})
+    assert resultado.clase == "aviso"
@@ -0,0 +1,78 @@
+import pyarrow.compute as pc
+
+from bench import simulados
+from mintic import soda
+from mintic.http_cache import obtener_cache_http
+
+
+def test_fila_borrada_en_el_origen_fuerza_descarga_completa(copia_local):
+    sesion = soda.crear_sesion()
+    inicial = soda.sincronizar(sesion)
+    borrada = inicial["uid"][0].as_py()
+
+    simulados.modificar_soda('DELETE FROM t WHERE "uid" = ?', (borrada,))
+    assert soda.hay_cambios(sesion)
+
+    # El delta incremental viene vacío: sin la descarga completa la fila seguiría ahí
+    tabla = soda.sincronizar(sesion)
+    assert tabla.num_rows == inicial.num_rows - 1
+    assert borrada not in tabla["uid"].to_pylist()
+    assert not soda.hay_cambios(sesion)
+    # El estado se escribe de forma atómica: no quedan temporales
+    assert sorted(p.name for p in copia_local.iterdir()) == ["soda.arrow", "soda.json"]
+
+
+def test_sincronizacion_incremental_fusiona_la_fila_modificada(copia_local, monkeypatch):
+    sesion = soda.crear_sesion()
+    inicial = soda.sincronizar(sesion)
+    assert inicial.num_rows == soda.contar_filas(sesion) > soda.TAM_PAGINA
+    assert pc.count_distinct(inicial["uid"]).as_py() == inicial.num_rows
+
+    # Sin cambios en el origen la sonda se revalida con un 304
+    cache = obtener_cache_http()
+    assert not soda.hay_cambios(sesion)
+    revalidadas = cache.revalidadas
+    assert not soda.hay_cambios(sesion)
+    assert cache.revalidadas == revalidadas + 1
+
+    uid = inicial["uid"][5].as_py()
+    simulados.modificar_soda(
+        'UPDATE t SET "titulo" = ?, ":updated_at" = ? WHERE "uid" = ?',
+        ("Título corregido", "2099-01-01T00:00:00.000", uid),
+    )
+    assert soda.hay_cambios(sesion)
+
+    descargas = []
+    original = soda.descargar
+
+    def descargar(sesion, where=None, **kwargs):
+        descargas.append(where)
+        return original(sesion, where, **kwargs)
+
+    monkeypatch.setattr(soda, "descargar", descargar)
+    tabla = soda.sincronizar(sesion)
+    # Solo se pidió el delta, no el recurso completo
+    assert len(descargas) == 1 and descargas[0].startswith(soda.CAMPO_ACTUALIZACION)
+
+    assert tabla.num_rows == inicial.num_rows
+    assert sorted(tabla["uid"].to_pylist()) == sorted(inicial["uid"].to_pylist())
+    fila = tabla.filter(pc.equal(tabla["uid"], uid))
+    assert fila["titulo"].to_pylist() == ["Título corregido"]
+    assert not soda.hay_cambios(sesion)
+
+
+def test_sondas_y_sincronizaciones_comparten_una_sesion(copia_local, monkeypatch):
+    creadas = []
+    crear = soda.crear_sesion
+
+    def crear_sesion(*args, **kwargs):
+        creadas.append(crear(*args, **kwargs))
+        return creadas[-1]
+
+    monkeypatch.setattr(soda, "crear_sesion", crear_sesion)
+    monkeypatch.setattr(soda, "_SESION", None)
+    soda.sincronizar()
+    for _ in range(3):
+        soda.hay_cambios()
+    soda.sincronizar()
+    assert len(creadas) == 1 and soda.obtener_sesion() is creadas[0]
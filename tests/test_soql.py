@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from mintic import soql
+
+
+@pytest.mark.parametrize("instruccion", [
+    {"accion": "filtrar", "condiciones": ["Sector"]},
+    {"accion": "filtrar", "condiciones": [None]},
+    {"accion": "filtrar", "condiciones": "Sector"},
+])
+def test_condiciones_que_no_son_objetos_no_se_traducen(inventario, instruccion):
+    with pytest.raises(soql.NoTraducible):
+        soql.traducir(inventario, instruccion)
+
+
+SECTOR = "informaci_n_de_la_entidad_sector"
+
+
+@pytest.fixture(scope="module")
+def copia_api(servidor_soda, tmp_path_factory):
+    """Copia local del recurso simulado, tipada como la arma mintic.dataset."""
+    from mintic import soda, tipos
+
+    carpeta = tmp_path_factory.mktemp("soda")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(soda, "SODA_DOMINIO", servidor_soda)
+        mp.setattr(soda, "SNAPSHOT", str(carpeta / "soda.arrow"))
+        mp.setattr(soda, "ESTADO", str(carpeta / "soda.json"))
+        tabla = soda.sincronizar(soda.crear_sesion())
+    return tipos.a_pandas(tipos.aplicar(soda.sin_campos_sistema(tabla)))
+
+
+@pytest.mark.parametrize("instruccion", [
+    {"accion": "graficar", "tipo": "bar", "x": SECTOR, "y": "", "agregacion": "count"},
+    {"accion": "graficar", "tipo": "bar", "x": "tipo", "y": "descargas", "agregacion": "sum"},
+    {"accion": "filtrar", "condiciones": [
+        {"columna": "tipo", "valor": "DATASET"},
+        {"columna": "vistas", "operador": ">=", "valor": 100},
+    ]},
+    {"accion": "filtrar", "columna": SECTOR, "operador": "prefijo", "valor": "edu",
+     "orden": "descargas", "descendente": True},
+    {"accion": "tabla", "columnas": ["titulo", "vistas", "p_blico", "fecha_de_creaci_n_utc"],
+     "orden": "vistas", "descendente": True},
+    {"accion": "tabla", "columnas": ["uid", "descargas"], "orden": "descargas"},
+])
+def test_servidor_y_motor_local_dan_el_mismo_resultado(servidor_soda, copia_api, monkeypatch,
+                                                       instruccion):
+    from mintic import motor, soda
+
+    monkeypatch.setattr(soda, "SODA_DOMINIO", servidor_soda)
+    remoto = soql.ClienteSoql().ejecutar(copia_api, instruccion)
+    local = motor.ejecutar(copia_api, instruccion)
+    assert remoto is not None, "la instrucción debía resolverse en el servidor"
+    assert remoto.clase == local.clase
+
+    servidor, motor_local = remoto.datos, local.datos
+    if remoto.clase == "grafico":
+        # El servidor ordena los grupos alfabéticamente; el motor, por aparición
+        servidor = servidor.sort_values(remoto.x, ignore_index=True)
+        motor_local = motor_local.sort_values(local.x, ignore_index=True)
+    else:
+        servidor = servidor.reset_index(drop=True)
+        motor_local = motor_local[servidor.columns].reset_index(drop=True)
+    pd.testing.assert_frame_equal(servidor, motor_local, check_categorical=False)